@@ -21,6 +21,7 @@ import webbrowser
 import os
 import signal
 import shutil
+import shlex
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 PORT = 5173
@@ -331,6 +332,41 @@ def run_my_website():
         sys.exit(1)
 
 
+def run_emulator_harness():
+    print("\n----------------------------------------------------------------")
+    print("🚀 LAUNCHING SHARDED EMULATOR HARNESS 🚀")
+    print("----------------------------------------------------------------")
+
+    instances = input("Emulator instances [Default: half the CPU cores]: ").strip()
+    seed = input("Seed snapshot / backup / emulator export [Default: none]: ").strip()
+    command = input("Command per shard ({host}, {port}, {shard}, {shards}) [Default: keep emulators running]: ").strip()
+
+    cmd = [sys.executable, os.path.join(PROJECT_ROOT, 'scripts', 'emulator_harness.py')]
+    if instances:
+        cmd += ['--instances', instances]
+    if seed:
+        is_export = os.path.exists(os.path.join(seed, 'firebase-export-metadata.json'))
+        cmd += ['--import' if is_export else '--seed', seed]
+    if command:
+        cmd += ['--'] + shlex.split(command, posix=(os.name != 'nt'))
+    else:
+        cmd += ['--keep']
+
+    proc = None
+    try:
+        proc = subprocess.Popen(cmd, cwd=PROJECT_ROOT)
+        proc.wait()
+    except KeyboardInterrupt:
+        # The harness gets the Ctrl+C too and stops its emulators
+        if proc:
+            proc.wait()
+        sys.exit(0)
+    except Exception as e:
+        print(f"Failed to start emulator harness: {e}")
+        sys.exit(1)
+    sys.exit(proc.returncode)
+
+
 def main():
     print('Start script running in:', PROJECT_ROOT)
 
@@ -343,14 +379,16 @@ def main():
     print("4) VISUAL BOT   (Actually opens browser & operates app)")
     print("5) APPROVE SBA   (License Management Portal)")
     print("6) MY WEBSITE    (Main Portfolio/Pricing Page)")
+    print("7) EMULATOR HARNESS (K emulators, sharded tests/benchmarks)")
     print("----------------------------------------------------------------")
-    choice = input("Enter 1, 2, 3, 4, 5 or 6 [Default: 2]: ").strip()
+    choice = input("Enter 1, 2, 3, 4, 5, 6 or 7 [Default: 2]: ").strip()
     
     DEBUG_MODE = (choice == '1')
     LOAD_TEST_MODE = (choice == '3')
     VISUAL_BOT_MODE = (choice == '4')
     APPROVE_SBA_MODE = (choice == '5')
     MY_WEBSITE_MODE = (choice == '6')
+    EMULATOR_HARNESS_MODE = (choice == '7')
     
     RUN_DIR = PROJECT_ROOT
     if LOAD_TEST_MODE:
@@ -364,6 +402,10 @@ def main():
     if MY_WEBSITE_MODE:
         run_my_website()
         return
+
+    if EMULATOR_HARNESS_MODE:
+        run_emulator_harness()
+        return
     emulator_proc = None
 
     # Step 0: Check for Debug Mode and Emulators
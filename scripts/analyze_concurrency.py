@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Concurrency Analytics
+Rebuilds user sessions from what the app already records on every term
+document, and turns them into concurrency figures for capacity planning:
+
+    userLogs         Login / Logout / Page Visit entries (logUserActivity keeps the last 20)
+    activeSessions   {userId: ISO time of the last heartbeat} (sent every minute while signed in)
+
+Sessions are keyed by user and device. A Login opens one, and each later event
+within --idle-minutes keeps it open. A Logout closes it; otherwise it ends one
+heartbeat interval after its last event. A heartbeat extends the user's latest
+session, or is counted as a one-minute session on its own.
+
+From the sessions it computes per-minute concurrency curves per school and for
+the whole database, the peak minutes, the hour-of-day profile and the page mix.
+It can also write a user profile for load_generator.py --profile: users =
+peak concurrency × headroom, thinkTimeSeconds and weights from the observed
+actions.
+
+Usage:
+    python scripts/analyze_concurrency.py --database 1
+    python scripts/analyze_concurrency.py --database 1 --since 2025-01-06 --profile-out profile.json
+    python scripts/analyze_concurrency.py --emulator --json report.json --curve-out curve.csv
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import math
+import time
+
+from firestore_admin import add_connection_args, connect_from_args, describe_target, iter_schools
+
+SCHOOL_FIELDS = ['userLogs', 'activeSessions', 'settings.schoolName']
+HEARTBEAT_SECONDS = 60
+# load_generator.py operation each page mostly costs
+PAGE_OPERATIONS = {
+    'Dashboard': 'main_read',
+    'Report Viewer': 'main_read',
+    'Data Management': 'main_read',
+    'Subjects': 'load_metadata',
+    'Assessment Types': 'load_metadata',
+    'Grading System': 'load_metadata',
+    'School Setup': 'load_metadata',
+    'Teachers': 'load_metadata',
+    'Students': 'load_students',
+    'Student Progress': 'load_students',
+    'Score Entry': 'bucket_save',
+    'Score Summary': 'bucket_save',
+}
+
+
+def parse_time(value):
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        moment = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return moment.timestamp()
+
+
+def minute_text(minute):
+    return datetime.datetime.fromtimestamp(minute * 60, datetime.timezone.utc).strftime('%Y-%m-%d %H:%M')
+
+
+# -----------------------------------------------------------------------------
+# Sessions
+# -----------------------------------------------------------------------------
+
+def build_sessions(logs, active_sessions, idle_seconds, since=None):
+    """[{userId, device, start, end, events, pages}] for one term document."""
+    events = {}
+    for log in logs or []:
+        at = parse_time(log.get('timestamp'))
+        if at is None or (since and at < since):
+            continue
+        key = (str(log.get('userId')), log.get('deviceId') or '')
+        events.setdefault(key, []).append((at, log.get('action'), log.get('pageName')))
+
+    sessions = []
+    for (user_id, device), items in events.items():
+        current = None
+        for at, action, page in sorted(items, key=lambda item: item[0]):
+            if current and (action == 'Login' or at - current['last'] > idle_seconds):
+                sessions.append(current)
+                current = None
+            if current is None:
+                current = {'userId': user_id, 'device': device, 'start': at, 'last': at, 'end': None,
+                           'closed': False, 'events': 0, 'pages': {}}
+            current['last'] = at
+            current['events'] += 1
+            if page:
+                current['pages'][page] = current['pages'].get(page, 0) + 1
+            if action == 'Logout':
+                current['end'] = at
+                current['closed'] = True
+                sessions.append(current)
+                current = None
+        if current:
+            sessions.append(current)
+
+    for session in sessions:
+        if session['end'] is None:
+            session['end'] = session['last'] + HEARTBEAT_SECONDS
+
+    for user_id, stamp in (active_sessions or {}).items():
+        at = parse_time(stamp)
+        if at is None or (since and at < since):
+            continue
+        own = [s for s in sessions if s['userId'] == str(user_id)]
+        latest = max(own, key=lambda s: s['last'], default=None)
+        if latest and not latest['closed'] and latest['last'] <= at <= latest['last'] + idle_seconds:
+            latest['end'] = max(latest['end'], at + HEARTBEAT_SECONDS)
+        elif not latest or at > latest['end']:
+            sessions.append({'userId': str(user_id), 'device': '', 'start': at, 'last': at,
+                             'end': at + HEARTBEAT_SECONDS, 'closed': False, 'events': 0, 'pages': {}})
+    return sessions
+
+
+# -----------------------------------------------------------------------------
+# Curves
+# -----------------------------------------------------------------------------
+
+class ConcurrencyCurve:
+    """Per-minute count of open sessions, kept as +1/-1 changes."""
+
+    def __init__(self):
+        self.changes = {}
+
+    def add(self, start, end):
+        first, last = int(start // 60), int(end // 60)
+        self.changes[first] = self.changes.get(first, 0) + 1
+        self.changes[last + 1] = self.changes.get(last + 1, 0) - 1
+
+    def merge(self, other):
+        for minute, change in other.changes.items():
+            self.changes[minute] = self.changes.get(minute, 0) + change
+
+    def points(self):
+        """[(minute, concurrent)] for every minute from the first to the last session."""
+        if not self.changes:
+            return []
+        result, level = [], 0
+        minutes = sorted(self.changes)
+        for minute, following in zip(minutes, minutes[1:] + [None]):
+            level += self.changes[minute]
+            if level > 0 and following is not None:
+                result.extend((m, level) for m in range(minute, following))
+        return result
+
+    def summary(self, top=5):
+        points = self.points()
+        if not points:
+            return {'peak': 0, 'p95': 0, 'mean': 0, 'activeMinutes': 0, 'peakMinutes': [], 'byHour': {}}
+        levels = sorted(level for _, level in points)
+        by_hour = {}
+        for minute, level in points:
+            hour = (minute // 60) % 24
+            total, count = by_hour.get(hour, (0, 0))
+            by_hour[hour] = (total + level, count + 1)
+        peaks = sorted(points, key=lambda p: (-p[1], p[0]))[:top]
+        return {
+            'peak': levels[-1],
+            'p95': levels[min(len(levels) - 1, math.ceil(0.95 * len(levels)) - 1)],
+            'mean': round(sum(levels) / len(levels), 2),
+            'activeMinutes': len(levels),
+            'peakMinutes': [{'minute': minute_text(m), 'users': level} for m, level in peaks],
+            'byHour': {f"{hour:02d}": round(total / count, 2) for hour, (total, count) in sorted(by_hour.items())},
+        }
+
+
+# -----------------------------------------------------------------------------
+# Load profile
+# -----------------------------------------------------------------------------
+
+def load_profile(sessions, peak, headroom):
+    """load_generator.py profile: users, thinkTimeSeconds and per-operation weights."""
+    counts = {'main_read': 0, 'load_metadata': 0, 'load_students': 0, 'bucket_save': 0, 'heartbeat': 0, 'log_activity': 0}
+    online_seconds = 0.0
+    for session in sessions:
+        online_seconds += session['end'] - session['start']
+        # Sign-in: getSchoolData + loadMetadata, and the Login entry itself
+        counts['main_read'] += 1
+        counts['load_metadata'] += 1
+        counts['log_activity'] += session['events']
+        counts['heartbeat'] += max(1, int((session['end'] - session['start']) // HEARTBEAT_SECONDS))
+        for page, visits in session['pages'].items():
+            op = PAGE_OPERATIONS.get(page)
+            if op:
+                counts[op] += visits
+    actions = sum(counts.values())
+    return {
+        'users': max(1, math.ceil(peak * headroom)),
+        'thinkTimeSeconds': round(online_seconds / actions, 2) if actions else HEARTBEAT_SECONDS,
+        'weights': {op: round(100 * n / actions, 1) for op, n in counts.items() if n} if actions else {},
+        'source': {'sessions': len(sessions), 'observedPeak': peak, 'headroom': headroom, 'actions': counts},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency curves and load profiles from userLogs and heartbeats")
+    add_connection_args(parser)
+    parser.add_argument('--prefix', help='Only schools whose docId starts with this prefix')
+    parser.add_argument('--since', help='Ignore activity before this date (YYYY-MM-DD or ISO time)')
+    parser.add_argument('--idle-minutes', type=float, default=30, help='Gap that ends a session (default: 30)')
+    parser.add_argument('--top', type=int, default=10, help='Schools and peak minutes listed (default: 10)')
+    parser.add_argument('--headroom', type=float, default=1.0, help='Multiplier on the peak for --profile-out (default: 1.0)')
+    parser.add_argument('--profile-out', help='Write a load_generator.py --profile JSON file')
+    parser.add_argument('--curve-out', help='Write the database per-minute curve as CSV')
+    parser.add_argument('--json', help='Write the full report as JSON to this file')
+    args = parser.parse_args()
+
+    since = parse_time(args.since) if args.since else None
+    if args.since and since is None:
+        parser.error(f"--since: cannot parse {args.since!r}")
+
+    db = connect_from_args(args)
+    print(f"👥 Reading userLogs and heartbeats from {describe_target(args)}...")
+    started = time.time()
+    database_curve = ConcurrencyCurve()
+    all_sessions = []
+    schools = {}
+    documents = 0
+    for snap in iter_schools(db, prefix=args.prefix, field_paths=SCHOOL_FIELDS):
+        documents += 1
+        data = snap.to_dict() or {}
+        sessions = build_sessions(data.get('userLogs'), data.get('activeSessions'), args.idle_minutes * 60, since)
+        if not sessions:
+            continue
+        curve = ConcurrencyCurve()
+        for session in sessions:
+            curve.add(session['start'], session['end'])
+        database_curve.merge(curve)
+        all_sessions.extend(sessions)
+        schools[snap.id] = {
+            'schoolName': ((data.get('settings') or {}).get('schoolName')) or snap.id,
+            'sessions': len(sessions),
+            'users': len({s['userId'] for s in sessions}),
+            **curve.summary(top=3),
+        }
+    read_seconds = time.time() - started
+
+    database = database_curve.summary(top=args.top)
+    page_mix = {}
+    for session in all_sessions:
+        for page, visits in session['pages'].items():
+            page_mix[page] = page_mix.get(page, 0) + visits
+    visits = sum(page_mix.values())
+    durations = sorted((s['end'] - s['start']) / 60 for s in all_sessions)
+
+    print(f"   {documents} term document(s), {len(schools)} with activity, {len(all_sessions)} session(s) "
+          f"in {read_seconds:.1f}s")
+    if not all_sessions:
+        print("\n⚠️  No sessions found")
+        return
+    print(f"\n📈 Database: peak {database['peak']} concurrent, p95 {database['p95']}, "
+          f"mean {database['mean']} over {database['activeMinutes']} active minute(s)")
+    print(f"   Median session {durations[len(durations) // 2]:.0f} min, longest {durations[-1]:.0f} min")
+    print("   Peak minutes (UTC):")
+    for point in database['peakMinutes']:
+        print(f"      {point['minute']}  {point['users']} user(s)")
+    print("   Mean concurrency by hour (UTC): " +
+          ', '.join(f"{hour}h {value}" for hour, value in database['byHour'].items()))
+
+    print("\n🏫 Busiest schools:")
+    for doc_id, school in sorted(schools.items(), key=lambda item: (-item[1]['peak'], item[0]))[:args.top]:
+        first_peak = school['peakMinutes'][0]['minute'] if school['peakMinutes'] else '-'
+        print(f"      {school['schoolName'][:32]:<32} peak {school['peak']:>3} at {first_peak}, "
+              f"{school['users']} user(s), {school['sessions']} session(s)")
+
+    if visits:
+        print(f"\n📄 Page mix ({visits} visit(s)):")
+        for page, count in sorted(page_mix.items(), key=lambda item: -item[1]):
+            print(f"      {page:<20} {100 * count / visits:5.1f}%")
+
+    profile = load_profile(all_sessions, database['peak'], args.headroom)
+    if args.profile_out:
+        with open(args.profile_out, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, indent=2)
+        print(f"\n🧪 Load profile ({profile['users']} users, think {profile['thinkTimeSeconds']}s) → {args.profile_out}")
+    if args.curve_out:
+        with open(args.curve_out, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['minute', 'users'])
+            for minute, level in database_curve.points():
+                writer.writerow([minute_text(minute), level])
+        print(f"   Curve → {args.curve_out}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'database': database, 'schools': schools, 'pageMix': page_mix, 'profile': profile,
+                       'sessions': len(all_sessions)}, f, indent=2)
+        print(f"   Report → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Document Size Analyzer
+Streams every schools/{docId} document in a database, computes the exact
+Firestore-encoded size of each top-level field and ranks the documents that are
+closest to the 1 MiB limit. Growth is measured against a previous report when
+one is given. Without one, only userLogs is projected: logUserActivity prunes it
+to the newest 20 entries, so it grows at the logged activity rate until it is
+full and not at all afterwards.
+
+Usage:
+    python scripts/analyze_document_sizes.py --database 1 --top 20 --json sizes.json
+    python scripts/analyze_document_sizes.py --emulator --previous sizes.json --include-buckets
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import datetime
+import heapq
+import json
+import time
+
+from firestore_admin import (
+    MAX_DOCUMENT_BYTES, add_connection_args, connect_from_args, describe_target, positive_int,
+    iter_schools, document_name_size, document_size, field_size, value_size,
+)
+
+# Main-document fields that grow over a term; marked with * in the breakdown
+WATCHED_FIELDS = ['users', 'userLogs', 'activeSessions', 'deviceCredentials', 'settings', 'reportData']
+# logUserActivity (services/firebaseService.ts) keeps only the newest entries
+USER_LOGS_CAP = 20
+
+
+def parse_iso(text):
+    try:
+        return datetime.datetime.fromisoformat(str(text).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def settings_image_bytes(data):
+    settings = data.get('settings') or {}
+    return {key: value_size(settings.get(key)) for key in ('logo', 'headmasterSignature') if settings.get(key)}
+
+
+def notification_bytes(data):
+    total = 0
+    for user in data.get('users') or []:
+        if isinstance(user, dict) and user.get('notifications'):
+            total += field_size('notifications', user['notifications'])
+    return total
+
+
+def log_activity(data):
+    """Return (entries_per_day, average_entry_bytes) observed in userLogs, or (None, None)."""
+    logs = [log for log in (data.get('userLogs') or []) if isinstance(log, dict)]
+    stamps = sorted(filter(None, (parse_iso(log.get('timestamp')) for log in logs)))
+    if len(stamps) < 2:
+        return None, None
+    span_days = (stamps[-1] - stamps[0]).total_seconds() / 86400
+    if span_days <= 0:
+        return None, None
+    average = sum(value_size(log) for log in logs) / len(logs)
+    return (len(stamps) - 1) / span_days, average
+
+
+def analyze_school(snapshot, previous, now):
+    data = snapshot.to_dict() or {}
+    path = snapshot.reference.path
+    total = document_size(path, data)
+    fields = {key: field_size(key, value) for key, value in data.items()}
+
+    rate, entry_bytes = log_activity(data)
+    entries = len(data.get('userLogs') or [])
+    growth, source, cap_bytes = None, None, None
+    before = previous.get(snapshot.id)
+    if before:
+        days = (now - datetime.datetime.fromisoformat(before['measuredAt'])).total_seconds() / 86400
+        if days > 0:
+            growth, source = (total - before['bytes']) / days, 'previous report'
+    if growth is None and rate is not None and entries < USER_LOGS_CAP:
+        # Each logged event adds an entry only until the array reaches its cap
+        growth, source = rate * entry_bytes, 'userLogs rate until capped'
+        cap_bytes = (USER_LOGS_CAP - entries) * entry_bytes
+
+    headroom = MAX_DOCUMENT_BYTES - total
+    days_left = headroom / growth if growth and growth > 0 else None
+    if days_left is not None and cap_bytes is not None and cap_bytes < headroom:
+        days_left = None
+
+    return {
+        'docId': snapshot.id,
+        'path': path,
+        'bytes': total,
+        'percentOfLimit': round(100 * total / MAX_DOCUMENT_BYTES, 2),
+        'nameBytes': document_name_size(path),
+        'fields': dict(sorted(fields.items(), key=lambda item: -item[1])),
+        'images': settings_image_bytes(data),
+        'notificationBytes': notification_bytes(data),
+        'userLogEntries': entries,
+        'logEntriesPerDay': round(rate, 2) if rate is not None else None,
+        'growthBytesPerDay': round(growth, 1) if growth is not None else None,
+        'growthSource': source,
+        'userLogsGrowthLeftBytes': round(cap_bytes) if cap_bytes is not None else None,
+        'daysToLimit': round(days_left, 1) if days_left is not None else None,
+        'measuredAt': now.isoformat(),
+    }
+
+
+def analyze_buckets(db, top):
+    """Rank score_buckets documents across all schools by size (they share the same limit)."""
+    ranked = []
+    for snap in db.collection_group('score_buckets').stream():
+        size = document_size(snap.reference.path, snap.to_dict())
+        item = (size, snap.reference.path)
+        if len(ranked) < top:
+            heapq.heappush(ranked, item)
+        else:
+            heapq.heappushpop(ranked, item)
+    return sorted(ranked, reverse=True)
+
+
+def print_report(results, field_totals, count, top):
+    print(f"\n📊 Largest school documents (limit {MAX_DOCUMENT_BYTES:,} bytes)")
+    print("-" * 100)
+    print(f"{'Doc ID':<48} {'Bytes':>10} {'% limit':>8} {'Growth/day':>11} {'Days left':>10}")
+    print("-" * 100)
+    for result in results[:top]:
+        growth = f"{result['growthBytesPerDay']:,.0f}" if result['growthBytesPerDay'] is not None else '-'
+        days = f"{result['daysToLimit']:,.0f}" if result['daysToLimit'] is not None else '-'
+        print(f"{result['docId'][:48]:<48} {result['bytes']:>10,} {result['percentOfLimit']:>7.1f}% {growth:>11} {days:>10}")
+        biggest = list(result['fields'].items())[:4]
+        print("      " + ", ".join(f"{name}={size:,}" for name, size in biggest))
+
+    if count:
+        print(f"\n📦 Average bytes per field across {count} documents")
+        for name, size in sorted(field_totals.items(), key=lambda item: -item[1])[:12]:
+            marker = ' *' if name in WATCHED_FIELDS else ''
+            print(f"   {name:<28} {size / count:>12,.0f}{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank school documents by Firestore-encoded size")
+    add_connection_args(parser)
+    parser.add_argument('--top', type=positive_int, default=20, help='Documents to show (default: 20)')
+    parser.add_argument('--prefix', help='Only analyze docIds starting with this prefix')
+    parser.add_argument('--previous', help='Earlier JSON report; growth is measured against it')
+    parser.add_argument('--json', help='Write the full report to this file')
+    parser.add_argument('--include-buckets', action='store_true', help='Also rank score_buckets documents')
+    args = parser.parse_args()
+
+    previous = {}
+    if args.previous:
+        with open(args.previous, 'r', encoding='utf-8') as f:
+            previous = {item['docId']: item for item in json.load(f)['schools']}
+
+    db = connect_from_args(args)
+    print(f"🔍 Analyzing school documents in {describe_target(args)}...")
+    now = datetime.datetime.now(datetime.timezone.utc)
+    started = time.time()
+
+    # Only the top-N and per-field totals are kept while streaming.
+    ranked, all_results, field_totals, count, at_risk = [], [], {}, 0, 0
+    for snapshot in iter_schools(db, prefix=args.prefix):
+        result = analyze_school(snapshot, previous, now)
+        count += 1
+        if result['daysToLimit'] is not None and result['daysToLimit'] < 90:
+            at_risk += 1
+        for name, size in result['fields'].items():
+            field_totals[name] = field_totals.get(name, 0) + size
+        if args.json:
+            all_results.append(result)
+        entry = (result['bytes'], result['docId'], result)
+        if len(ranked) < args.top:
+            heapq.heappush(ranked, entry)
+        else:
+            heapq.heappushpop(ranked, entry)
+
+    results = [item[2] for item in sorted(ranked, key=lambda item: item[0], reverse=True)]
+    print_report(results, field_totals, count, args.top)
+    print(f"\n✅ Analyzed {count} documents in {time.time() - started:.1f}s")
+
+    if not previous:
+        print(f"ℹ️  No --previous report: only userLogs growth up to its {USER_LOGS_CAP}-entry cap is projected")
+    if at_risk:
+        print(f"⚠️  {at_risk} document(s) projected to reach the limit within 90 days")
+
+    buckets = analyze_buckets(db, args.top) if args.include_buckets else []
+    if buckets:
+        print("\n🍱 Largest score buckets")
+        for size, path in buckets:
+            print(f"   {path:<70} {size:>10,} ({100 * size / MAX_DOCUMENT_BYTES:.1f}%)")
+
+    if args.json:
+        all_results.sort(key=lambda r: -r['bytes'])
+        report = {
+            'target': describe_target(args),
+            'measuredAt': now.isoformat(),
+            'schools': all_results,
+            'buckets': [{'path': path, 'bytes': size} for size, path in buckets],
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+UserLogs Archiver
+Moves userLogs entries older than a cutoff out of the main schools/{docId}
+document into monthly documents under schools/{docId}/userLogs_archive/{YYYY-MM}.
+
+Archive documents are written first (arrayUnion, so re-running is harmless) and
+the main document's array is then trimmed in a transaction, so entries appended
+by logUserActivity while the job runs are never lost. Completed schools are
+checkpointed and skipped when an interrupted or failed run is resumed; the
+checkpoint is removed once a run finishes cleanly.
+
+Usage:
+    python scripts/archive_user_logs.py --database 1 --older-than-days 30
+    python scripts/archive_user_logs.py --emulator --before 2025-01-01 --dry-run
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import datetime
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from firestore_admin import (
+    firestore, add_connection_args, connect_from_args, describe_target, positive_int,
+    iter_schools, commit_in_batches, run_transaction, Checkpoint, default_checkpoint_path,
+)
+
+ARCHIVE_COLLECTION = 'userLogs_archive'
+
+
+def parse_timestamp(text):
+    try:
+        stamp = datetime.datetime.fromisoformat(str(text).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=datetime.timezone.utc)
+
+
+def partition_old_logs(logs, cutoff):
+    """Group logs older than cutoff by month. Entries with unreadable timestamps stay put."""
+    months = {}
+    for log in logs:
+        if not isinstance(log, dict):
+            continue
+        stamp = parse_timestamp(log.get('timestamp'))
+        if stamp is not None and stamp < cutoff:
+            months.setdefault(stamp.strftime('%Y-%m'), []).append(log)
+    return months
+
+
+def log_key(log):
+    return (log.get('id'), log.get('timestamp'), log.get('userId'))
+
+
+def archive_school(db, doc_id, cutoff, dry_run):
+    """Archive one school's old logs. Returns (archived_count, months)."""
+    school_ref = db.collection('schools').document(doc_id)
+    snap = school_ref.get(['userLogs'])
+    logs = (snap.to_dict() or {}).get('userLogs') or []
+    months = partition_old_logs(logs, cutoff)
+    archived = sum(len(entries) for entries in months.values())
+    if not archived or dry_run:
+        return archived, sorted(months)
+
+    operations = []
+    for month, entries in months.items():
+        operations.append(('merge', school_ref.collection(ARCHIVE_COLLECTION).document(month), {
+            'month': month,
+            'entries': firestore.ArrayUnion(entries),
+            'updatedAt': firestore.SERVER_TIMESTAMP,
+        }))
+    commit_in_batches(db, operations)
+
+    archived_keys = {log_key(log) for entries in months.values() for log in entries}
+
+    def trim(transaction):
+        current = school_ref.get(['userLogs'], transaction=transaction)
+        current_logs = (current.to_dict() or {}).get('userLogs') or []
+        kept = [log for log in current_logs if not (isinstance(log, dict) and log_key(log) in archived_keys)]
+        if len(kept) != len(current_logs):
+            transaction.update(school_ref, {'userLogs': kept})
+
+    run_transaction(db, trim, documents=[school_ref.path])
+    return archived, sorted(months)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old userLogs into monthly archive documents")
+    add_connection_args(parser)
+    cutoff_group = parser.add_mutually_exclusive_group(required=True)
+    cutoff_group.add_argument('--older-than-days', type=positive_int, help='Archive logs older than N days')
+    cutoff_group.add_argument('--before', help='Archive logs before this date (YYYY-MM-DD, UTC)')
+    parser.add_argument('--prefix', help='Only process docIds starting with this prefix')
+    parser.add_argument('--workers', type=positive_int, default=8, help='Schools processed at once (default: 8)')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: .checkpoints/archive_user_logs-<db>.json)')
+    parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be archived')
+    args = parser.parse_args()
+
+    if args.before:
+        try:
+            cutoff = datetime.datetime.strptime(args.before, '%Y-%m-%d').replace(tzinfo=datetime.timezone.utc)
+        except ValueError as e:
+            print(f"❌ Invalid date: {e}")
+            sys.exit(1)
+    else:
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=args.older_than_days)
+
+    checkpoint_path = args.checkpoint or default_checkpoint_path('archive_user_logs', args)
+    checkpoint = Checkpoint(None if args.dry_run else checkpoint_path)
+    if args.older_than_days and checkpoint.state.get('cutoff') and not args.restart:
+        # A relative cutoff moves with the clock; resume an unfinished run with the one it started with
+        cutoff = datetime.datetime.fromisoformat(checkpoint.state['cutoff'])
+    cutoff_text = cutoff.isoformat()
+    if checkpoint.state.get('cutoff') not in (None, cutoff_text) and not args.restart:
+        print(f"❌ Checkpoint {checkpoint_path} was made with cutoff {checkpoint.state['cutoff']}; use --restart")
+        sys.exit(1)
+    if args.restart:
+        checkpoint.state = {'done': {}}
+    checkpoint.state['cutoff'] = cutoff_text
+
+    db = connect_from_args(args)
+    print(f"🔄 Archiving userLogs before {cutoff_text} in {describe_target(args)}{' (dry run)' if args.dry_run else ''}")
+
+    doc_ids = [snap.id for snap in iter_schools(db, prefix=args.prefix, field_paths=[])]
+    todo = [doc_id for doc_id in doc_ids if not checkpoint.is_done(doc_id)]
+    if len(todo) < len(doc_ids):
+        print(f"   Resuming: {len(doc_ids) - len(todo)} of {len(doc_ids)} schools already done")
+
+    started = time.time()
+    total, failures = 0, 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(archive_school, db, doc_id, cutoff, args.dry_run): doc_id for doc_id in todo}
+        for future in as_completed(futures):
+            doc_id = futures[future]
+            try:
+                archived, months = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"   ❌ {doc_id}: {e}")
+                continue
+            total += archived
+            checkpoint.mark(doc_id, {'archived': archived, 'months': months})
+            if archived:
+                print(f"   📦 {doc_id}: {archived} entries → {', '.join(months)}")
+
+    elapsed = time.time() - started
+    verb = 'Would archive' if args.dry_run else 'Archived'
+    print(f"\n✅ {verb} {total} log entries from {len(todo) - failures} schools in {elapsed:.1f}s")
+    if failures:
+        print(f"⚠️  {failures} school(s) failed; re-run to retry them")
+        sys.exit(1)
+    # Finished: the next run starts over with its own cutoff
+    checkpoint.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Database Backup & Restore
+Streams every schools/* document and its subcollections from one FIREBASE_CONFIGS
+database into zstd-compressed JSONL chunks with SHA-256 checksums, and restores
+them with parallel batched writes.
+
+Usage:
+    python scripts/backup_database.py backup --out backups/db1-full --database 1
+    python scripts/backup_database.py backup --out backups/db1-incr --base backups/db1-full
+    python scripts/backup_database.py restore --src backups/db1-incr --emulator
+    python scripts/backup_database.py verify --src backups/db1-incr --emulator
+
+Requires Firebase Admin SDK and zstandard
+"""
+
+import argparse
+import datetime
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from firestore_admin import (
+    BATCH_SIZE, add_connection_args, connect_from_args, describe_target, positive_int,
+    iter_schools, iter_documents, last_updated_fingerprint, encode_value, decode_value, commit_in_batches,
+)
+
+try:
+    import zstandard
+except ImportError:
+    print("❌ zstandard not installed")
+    print("Install with: pip install zstandard")
+    sys.exit(1)
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+class _HashingFile:
+    """File wrapper that hashes and counts the compressed bytes as they are written."""
+
+    def __init__(self, path):
+        self._file = open(path, 'wb')
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ChunkWriter:
+    """Writes JSONL records into rotating chunk-NNNNN.jsonl.zst files."""
+
+    def __init__(self, out_dir, docs_per_chunk, level):
+        self.out_dir = out_dir
+        self.docs_per_chunk = docs_per_chunk
+        self.compressor = zstandard.ZstdCompressor(level=level)
+        self.chunks = []
+        self._raw = None
+        self._stream = None
+        self._docs = 0
+
+    def write(self, record):
+        if self._stream is None:
+            self._open()
+        line = json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n'
+        self._stream.write(line.encode('utf-8'))
+        self._docs += 1
+        if self._docs >= self.docs_per_chunk:
+            self._close()
+
+    def finish(self):
+        if self._stream is not None:
+            self._close()
+        return self.chunks
+
+    def _open(self):
+        name = f"chunk-{len(self.chunks) + 1:05d}.jsonl.zst"
+        self._raw = _HashingFile(os.path.join(self.out_dir, name))
+        self._stream = self.compressor.stream_writer(self._raw)
+        self._name = name
+        self._docs = 0
+
+    def _close(self):
+        self._stream.close()
+        self.chunks.append({
+            'file': self._name,
+            'docs': self._docs,
+            'bytes': self._raw.size,
+            'sha256': self._raw.sha256.hexdigest(),
+        })
+        self._stream = None
+        self._raw = None
+
+
+def load_manifest(backup_dir):
+    with open(os.path.join(backup_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version in {backup_dir}: {manifest.get('version')}")
+    return manifest
+
+
+def resolve_chain(backup_dir):
+    """Return [(dir, manifest)] from newest to oldest following the incremental base links."""
+    chain = []
+    current = os.path.abspath(backup_dir)
+    while current:
+        manifest = load_manifest(current)
+        chain.append((current, manifest))
+        current = manifest.get('base')
+    return chain
+
+
+def covers(manifest, doc_id):
+    """Whether a backup looked at this school (a --prefix backup only sees part of the database)."""
+    return not manifest.get('prefix') or doc_id.startswith(manifest['prefix'])
+
+
+def plan_sources(chain):
+    """
+    Map each school docId to the newest backup directory that holds a full copy of it.
+    A school is live if the newest backup that covers its docId lists it (copied or
+    unchanged), so schools outside a --prefix backup are carried forward from its base
+    and schools that were deleted since an older backup are left out.
+    """
+    listed = set()
+    for _, manifest in chain:
+        listed.update(manifest['schools'], manifest['unchanged'])
+    live = set()
+    for doc_id in listed:
+        manifest = next(m for _, m in chain if covers(m, doc_id))
+        if doc_id in manifest['schools'] or doc_id in manifest['unchanged']:
+            live.add(doc_id)
+    owners = {}
+    for backup_dir, manifest in chain:
+        for doc_id in manifest['schools']:
+            if doc_id in live:
+                owners.setdefault(doc_id, backup_dir)
+    return owners
+
+
+def read_chunk(backup_dir, chunk):
+    """Verify a chunk's checksum and yield its decoded records."""
+    path = os.path.join(backup_dir, chunk['file'])
+    with open(path, 'rb') as f:
+        payload = f.read()
+    digest = hashlib.sha256(payload).hexdigest()
+    if digest != chunk['sha256']:
+        raise ValueError(f"Checksum mismatch in {path}: expected {chunk['sha256']}, got {digest}")
+
+    reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(payload))
+    for line in io.TextIOWrapper(reader, encoding='utf-8'):
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_backup_records(chain, owners, prefix=None):
+    """Yield the records that make up the restored state of the newest backup in the chain."""
+    for backup_dir, manifest in chain:
+        for chunk in manifest['chunks']:
+            for record in read_chunk(backup_dir, chunk):
+                doc_id = record['path'].split('/')[1]
+                if owners.get(doc_id) != backup_dir:
+                    continue
+                if prefix and not doc_id.startswith(prefix):
+                    continue
+                yield record
+
+
+def record_digest(data):
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def fetch_school(snapshot):
+    """Read one school's main document and every document below it."""
+    records = [{'path': snapshot.reference.path, 'data': encode_value(snapshot.to_dict())}]
+    for path, snap in iter_documents(snapshot.reference):
+        records.append({'path': path, 'data': encode_value(snap.to_dict())})
+    return records
+
+
+# -----------------------------------------------------------------------------
+# BACKUP
+# -----------------------------------------------------------------------------
+
+def run_backup(args):
+    db = connect_from_args(args)
+    os.makedirs(args.out, exist_ok=True)
+    if os.path.exists(os.path.join(args.out, MANIFEST_NAME)):
+        print(f"❌ {args.out} already contains a backup")
+        sys.exit(1)
+
+    base_schools = {}
+    if args.base:
+        for _, manifest in reversed(resolve_chain(args.base)):
+            for doc_id, info in manifest['schools'].items():
+                base_schools[doc_id] = info['fingerprint']
+            for doc_id, fingerprint in manifest['unchanged'].items():
+                base_schools[doc_id] = fingerprint
+
+    print(f"🔄 Backing up {describe_target(args)} → {args.out}")
+    writer = ChunkWriter(args.out, args.chunk_docs, args.level)
+    schools, unchanged = {}, {}
+    total_docs = 0
+    started = time.time()
+
+    def drain(future, doc_id, fingerprint):
+        nonlocal total_docs
+        records = future.result()
+        for record in records:
+            writer.write(record)
+        schools[doc_id] = {'fingerprint': fingerprint, 'docs': len(records)}
+        total_docs += len(records)
+        elapsed = max(time.time() - started, 1e-9)
+        print(f"   📦 {doc_id}: {len(records)} docs ({total_docs / elapsed:.0f} docs/s overall)")
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        # Results are written in submission order so chunks are reproducible.
+        pending = deque()
+        for snapshot in iter_schools(db, prefix=args.prefix):
+            fingerprint = last_updated_fingerprint(snapshot.to_dict())
+            if fingerprint and base_schools.get(snapshot.id) == fingerprint:
+                unchanged[snapshot.id] = fingerprint
+                continue
+            pending.append((pool.submit(fetch_school, snapshot), snapshot.id, fingerprint))
+            while len(pending) >= args.workers * 2:
+                wait([pending[0][0]])
+                drain(*pending.popleft())
+        while pending:
+            drain(*pending.popleft())
+
+    chunks = writer.finish()
+    elapsed = max(time.time() - started, 1e-9)
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'createdAt': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'target': describe_target(args),
+        'base': os.path.abspath(args.base) if args.base else None,
+        'prefix': args.prefix,
+        'chunks': chunks,
+        'schools': schools,
+        'unchanged': unchanged,
+        'totalDocs': total_docs,
+        'seconds': round(elapsed, 3),
+    }
+    with open(os.path.join(args.out, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    compressed = sum(c['bytes'] for c in chunks)
+    print(f"\n✅ Backed up {len(schools)} schools ({len(unchanged)} unchanged) — {total_docs} docs in {elapsed:.1f}s")
+    print(f"   Throughput: {total_docs / elapsed:.0f} docs/s, {len(chunks)} chunks, {compressed / 1024 / 1024:.2f} MB compressed")
+
+
+# -----------------------------------------------------------------------------
+# RESTORE
+# -----------------------------------------------------------------------------
+
+def run_restore(args):
+    chain = resolve_chain(args.src)
+    owners = plan_sources(chain)
+    db = connect_from_args(args)
+    print(f"🔄 Restoring {args.src} ({len(owners)} schools, {len(chain)} backup(s) in chain) → {describe_target(args)}")
+
+    def commit(records):
+        commit_in_batches(db, [('set', db.document(r['path']), decode_value(r['data'], db)) for r in records])
+        return len(records)
+
+    restored = 0
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        in_flight = set()
+        pending = []
+
+        def collect(done):
+            nonlocal restored
+            for future in done:
+                restored += future.result()
+
+        for record in iter_backup_records(chain, owners, args.prefix):
+            pending.append(record)
+            if len(pending) >= BATCH_SIZE:
+                in_flight.add(pool.submit(commit, pending))
+                pending = []
+            if len(in_flight) >= args.workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        if pending:
+            in_flight.add(pool.submit(commit, pending))
+        done, _ = wait(in_flight)
+        collect(done)
+
+    elapsed = max(time.time() - started, 1e-9)
+    print(f"\n✅ Restored {restored} docs in {elapsed:.1f}s ({restored / elapsed:.0f} docs/s)")
+
+
+# -----------------------------------------------------------------------------
+# VERIFY
+# -----------------------------------------------------------------------------
+
+def run_verify(args):
+    """Compare every backed-up document with the live database (round-trip fidelity check)."""
+    chain = resolve_chain(args.src)
+    owners = plan_sources(chain)
+    db = connect_from_args(args)
+    print(f"🔍 Verifying {args.src} against {describe_target(args)}")
+
+    expected = {}
+    for record in iter_backup_records(chain, owners, args.prefix):
+        expected[record['path']] = record_digest(record['data'])
+
+    school_ids = sorted({path.split('/')[1] for path in expected})
+
+    def live_digests(doc_id):
+        ref = db.collection('schools').document(doc_id)
+        snap = ref.get()
+        digests = {}
+        if snap.exists:
+            digests[ref.path] = record_digest(encode_value(snap.to_dict()))
+        for path, child in iter_documents(ref):
+            digests[path] = record_digest(encode_value(child.to_dict()))
+        return digests
+
+    started = time.time()
+    actual = {}
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for digests in pool.map(live_digests, school_ids):
+            actual.update(digests)
+
+    missing = [p for p in expected if p not in actual]
+    changed = [p for p in expected if p in actual and actual[p] != expected[p]]
+    extra = [p for p in actual if p not in expected]
+    elapsed = max(time.time() - started, 1e-9)
+
+    print(f"   Checked {len(expected)} docs in {elapsed:.1f}s ({len(expected) / elapsed:.0f} docs/s)")
+    for label, paths in (('Missing', missing), ('Different', changed), ('Not in backup', extra)):
+        if paths:
+            print(f"   {label}: {len(paths)}")
+            for path in paths[:10]:
+                print(f"     - {path}")
+    if missing or changed:
+        print("❌ Round-trip verification failed")
+        sys.exit(1)
+    print("✅ Live data matches the backup")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backup and restore schools/* from a Firestore database")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    backup = add_connection_args(sub.add_parser('backup', help='Stream a database into compressed chunks'))
+    backup.add_argument('--out', required=True, help='Output directory for chunks and manifest')
+    backup.add_argument('--base', help='Previous backup directory; unchanged schools are skipped')
+    backup.add_argument('--prefix', help='Only back up docIds starting with this prefix')
+    backup.add_argument('--workers', type=positive_int, default=8, help='Concurrent school fetchers (default: 8)')
+    backup.add_argument('--chunk-docs', type=positive_int, default=5000, help='Documents per chunk (default: 5000)')
+    backup.add_argument('--level', type=int, default=6, help='zstd compression level (default: 6)')
+
+    for name, text in (('restore', 'Write a backup into a database'), ('verify', 'Compare a backup with a database')):
+        cmd = add_connection_args(sub.add_parser(name, help=text))
+        cmd.add_argument('--src', required=True, help='Backup directory (newest in an incremental chain)')
+        cmd.add_argument('--prefix', help='Only use docIds starting with this prefix')
+        cmd.add_argument('--workers', type=positive_int, default=8, help='Concurrent workers (default: 8)')
+
+    args = parser.parse_args()
+    {'backup': run_backup, 'restore': run_restore, 'verify': run_verify}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
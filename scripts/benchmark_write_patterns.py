@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Score Write-Pattern Benchmark
+Measures how score saves scale with concurrent teachers for alternative score
+layouts, so the layout can be chosen with data. Every writer is a teacher
+saving marks for their own class in the same subject, which is the case where
+saveDataTransaction's subject buckets contend.
+
+Layouts:
+    subject_bucket        score_buckets/subject_{id}, read-modify-write of the whole bucket in a transaction
+    class_subject_bucket  score_buckets/class_{classId}_subject_{id}, same transaction on a per-class bucket
+    per_score_docs        one document per score, blind batched sets (the legacy `scores` shape)
+    field_update          batched update() of scoresMap.{scoreId} on the subject bucket, no read
+
+For each layout and writer count the report shows saves/s, latency percentiles,
+transaction retries and failed saves. Data lives in a scratch school document
+that is reset before each run.
+
+Usage:
+    python scripts/benchmark_write_patterns.py --emulator
+    python scripts/benchmark_write_patterns.py --emulator --writers 1 5 10 20 --duration 30
+    python scripts/benchmark_write_patterns.py --emulator --layouts subject_bucket field_update --metadata --json writes.json
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from firestore_admin import (
+    firestore, FieldPath, add_connection_args, connect_from_args, describe_target, positive_int,
+    iter_documents, commit_in_batches,
+)
+from perf_stats import LatencyHistogram, summary_header, format_summary_row
+from seed_emulator import generate_term
+
+SCRATCH_DOC_ID = 'benchmark_write_patterns'
+SUBJECT_ID = 3
+LAYOUTS = ['subject_bucket', 'class_subject_bucket', 'per_score_docs', 'field_update']
+
+
+def class_bucket_id(class_id, subject_id):
+    return f"class_{class_id}_subject_{subject_id}"
+
+
+def load_fixture(classes, students_per_class, seed):
+    """Scores of one subject from the seeder, grouped by class: {classId: {scoreId: score}}."""
+    _, _, subs = generate_term(seed, 0, classes, students_per_class, '2024/2025', 'First Term', prefix='bench')
+    class_of = {student['id']: student['class'] for student in subs['students'].values()}
+    class_ids = {data['name']: data['id'] for data in subs['classes'].values()}
+    by_class = {}
+    for score_id, score in subs['score_buckets'][f"subject_{SUBJECT_ID}"]['scoresMap'].items():
+        by_class.setdefault(class_ids[class_of[score['studentId']]], {})[score_id] = score
+    return by_class
+
+
+def clear_scratch(db):
+    school_ref = db.collection('schools').document(SCRATCH_DOC_ID)
+    deletes = [('delete', snap.reference, None) for _, snap in iter_documents(school_ref)]
+    commit_in_batches(db, deletes + [('delete', school_ref, None)])
+    return school_ref
+
+
+def reset_scratch(db, layout, fixture):
+    """Delete the scratch school and lay the fixture out in the layout under test."""
+    school_ref = clear_scratch(db)
+
+    operations = [('set', school_ref, {'metadata': {'lastUpdated': {}}})]
+    buckets = school_ref.collection('score_buckets')
+    if layout in ('subject_bucket', 'field_update'):
+        merged = {score_id: score for scores in fixture.values() for score_id, score in scores.items()}
+        operations.append(('set', buckets.document(f"subject_{SUBJECT_ID}"), {'scoresMap': merged}))
+    elif layout == 'class_subject_bucket':
+        for class_id, scores in fixture.items():
+            operations.append(('set', buckets.document(class_bucket_id(class_id, SUBJECT_ID)), {'scoresMap': scores}))
+    else:
+        for scores in fixture.values():
+            for score_id, score in scores.items():
+                operations.append(('set', school_ref.collection('scores').document(score_id), score))
+    commit_in_batches(db, operations)
+    return school_ref
+
+
+def edited_scores(rng, scores, count):
+    """A teacher's save: one new mark for `count` students of their class."""
+    edits = {}
+    for score_id in rng.sample(sorted(scores), min(count, len(scores))):
+        score = dict(scores[score_id])
+        marks = dict(score.get('assessmentScores') or {})
+        marks[str(rng.randint(1, 4))] = [f"{rng.randint(0, 20)}/20"]
+        score['assessmentScores'] = marks
+        edits[score_id] = score
+    return edits
+
+
+class Writer:
+    def __init__(self, db, school_ref, layout, class_id, scores, args, seed):
+        self.db = db
+        self.school_ref = school_ref
+        self.layout = layout
+        self.class_id = class_id
+        self.scores = scores
+        self.args = args
+        self.rng = random.Random(seed)
+        self.histogram = LatencyHistogram()
+        self.attempts = 0
+        self.failures = {}
+
+    def metadata_update(self, write):
+        # saveDataTransaction touches the main document on every save
+        if self.args.metadata:
+            write.update(self.school_ref, {'metadata.lastUpdated.scores': firestore.SERVER_TIMESTAMP})
+
+    def save_bucket(self, bucket_ref, edits):
+        def save(transaction):
+            self.attempts += 1
+            snap = bucket_ref.get(transaction=transaction)
+            scores_map = (snap.to_dict() or {}).get('scoresMap') or {}
+            scores_map.update(edits)
+            transaction.set(bucket_ref, {'scoresMap': scores_map})
+            self.metadata_update(transaction)
+
+        firestore.transactional(save)(self.db.transaction(max_attempts=self.args.max_attempts))
+
+    def save(self):
+        edits = edited_scores(self.rng, self.scores, self.args.scores_per_save)
+        buckets = self.school_ref.collection('score_buckets')
+        if self.layout == 'subject_bucket':
+            self.save_bucket(buckets.document(f"subject_{SUBJECT_ID}"), edits)
+            return
+        if self.layout == 'class_subject_bucket':
+            self.save_bucket(buckets.document(class_bucket_id(self.class_id, SUBJECT_ID)), edits)
+            return
+
+        self.attempts += 1
+        batch = self.db.batch()
+        if self.layout == 'per_score_docs':
+            for score_id, score in edits.items():
+                batch.set(self.school_ref.collection('scores').document(score_id), score)
+        else:
+            bucket_ref = buckets.document(f"subject_{SUBJECT_ID}")
+            batch.update(bucket_ref, {
+                FieldPath('scoresMap', score_id).to_api_repr(): score for score_id, score in edits.items()
+            })
+        self.metadata_update(batch)
+        batch.commit()
+
+    def run(self, duration, start_barrier):
+        start_barrier.wait()
+        deadline = time.monotonic() + duration
+        saves = 0
+        while time.monotonic() < deadline and (not self.args.saves or saves < self.args.saves):
+            started = time.perf_counter()
+            try:
+                self.save()
+            except Exception as e:
+                key = type(e).__name__
+                self.failures[key] = self.failures.get(key, 0) + 1
+            else:
+                self.histogram.record((time.perf_counter() - started) * 1000)
+            saves += 1
+
+
+def run_case(db, layout, writers, fixture, args):
+    school_ref = reset_scratch(db, layout, fixture)
+    class_ids = sorted(fixture)
+    workers = [
+        Writer(db, school_ref, layout, class_ids[i % len(class_ids)], fixture[class_ids[i % len(class_ids)]], args, args.seed * 1000 + i)
+        for i in range(writers)
+    ]
+    start_barrier = threading.Barrier(writers + 1)
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        futures = [pool.submit(w.run, args.duration, start_barrier) for w in workers]
+        start_barrier.wait()
+        started = time.monotonic()
+        for future in futures:
+            future.result()
+        elapsed = time.monotonic() - started
+
+    histogram = LatencyHistogram()
+    failures = {}
+    for w in workers:
+        histogram.merge(w.histogram)
+        for key, count in w.failures.items():
+            failures[key] = failures.get(key, 0) + count
+    saves = histogram.count
+    transactional = layout in ('subject_bucket', 'class_subject_bucket')
+    return {
+        'layout': layout,
+        'writers': writers,
+        'seconds': round(elapsed, 2),
+        'saves': saves,
+        'savesPerSecond': round(saves / elapsed, 1) if elapsed else 0.0,
+        'latency': histogram.summary(),
+        'retries': sum(w.attempts for w in workers) - saves - sum(failures.values()) if transactional else 0,
+        'failures': failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent score writes for alternative layouts")
+    add_connection_args(parser)
+    parser.add_argument('--layouts', nargs='+', choices=LAYOUTS, default=LAYOUTS, help='Layouts to run (default: all)')
+    parser.add_argument('--writers', nargs='+', type=positive_int, default=[1, 5, 10, 20],
+                        help='Concurrent writer counts (default: 1 5 10 20)')
+    parser.add_argument('--duration', type=positive_int, default=20, help='Seconds per run (default: 20)')
+    parser.add_argument('--saves', type=int, default=0, help='Stop each writer after this many saves (default: duration only)')
+    parser.add_argument('--classes', type=positive_int, default=10, help='Classes sharing the subject (default: 10)')
+    parser.add_argument('--students', type=positive_int, default=40, help='Students per class (default: 40)')
+    parser.add_argument('--scores-per-save', type=positive_int, default=10, help='Students changed per save (default: 10)')
+    parser.add_argument('--metadata', action='store_true', help='Also update metadata.lastUpdated on the main doc, as the app does')
+    parser.add_argument('--max-attempts', type=positive_int, default=5, help='Transaction attempts before a save fails (default: 5)')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed (default: 7)')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    if not args.emulator:
+        print("❌ The benchmark rewrites a scratch school; run it against the emulator (--emulator)")
+        sys.exit(1)
+
+    db = connect_from_args(args)
+    fixture = load_fixture(args.classes, args.students, args.seed)
+    print(f"🏁 Write benchmark on {describe_target(args)}: {args.classes} classes x {args.students} students, "
+          f"{args.scores_per_save} scores per save, {args.duration}s per run")
+
+    results = []
+    for layout in args.layouts:
+        print(f"\n{layout}")
+        print(f"{summary_header(12)} {'Saves/s':>9} {'Retries':>8} {'Failed':>7}")
+        for writers in args.writers:
+            result = run_case(db, layout, writers, fixture, args)
+            results.append(result)
+            print(f"{format_summary_row(f'{writers} writers', result['latency'], 12)} "
+                  f"{result['savesPerSecond']:>9.1f} {result['retries']:>8} {sum(result['failures'].values()):>7}")
+            for key, count in result['failures'].items():
+                print(f"{'':<14}{key}: {count}")
+
+    clear_scratch(db)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'target': describe_target(args), 'config': vars(args), 'results': results}, f, indent=2)
+        print(f"\n📝 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
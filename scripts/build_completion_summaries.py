@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Completion Summary Builder
+Computes per-class, per-subject completion (scores entered, remarks missing,
+attendance recorded) the way useClassStatistics does on the client, and stores
+it in one small document per term:
+
+    schools/{docId}/summaries/completion
+        classes.{classId}                    name, students, remarks, attendance
+        classes.{classId}.subjects.{subjectId}  entered/expected cells, complete/partial/none students
+        sources                              bucket update times and metadata fingerprints seen
+        digests.{classId}.{cell}             input hashes used to find dirty cells
+
+Runs are incremental: only score buckets whose update time changed are read,
+and only cells whose inputs (class roster, assessments, that class's scores or
+report data) hash differently are rewritten. A change to classes, subjects or
+assessments, or a removed bucket, rebuilds the whole summary.
+
+Usage:
+    python scripts/build_completion_summaries.py --emulator
+    python scripts/build_completion_summaries.py --database 1 --prefix myschool --workers 8
+    python scripts/build_completion_summaries.py --database 1 --full --dry-run
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from firestore_admin import (
+    firestore, add_connection_args, connect_from_args, describe_target, positive_int, iter_schools,
+    commit_in_batches,
+)
+
+SUMMARY_VERSION = 1
+# Same fields and labels as useClassStatistics
+REMARK_FIELDS = {
+    'attendance': 'Attendance',
+    'conduct': 'Conduct',
+    'interest': 'Interest',
+    'attitude': 'Attitude',
+    'teacherRemark': 'Teacher Remark',
+}
+# Keys of metadata.lastUpdated that change the shape of every cell
+STRUCTURE_KEYS = ('classes', 'subjects', 'assessments')
+# Student names listed per cell for alerts; counts are always complete
+MAX_NAMES = 25
+
+
+def digest(value):
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def summary_ref(school_ref):
+    return school_ref.collection('summaries').document('completion')
+
+
+def is_entered(marks):
+    return bool(marks) and marks[0] != ''
+
+
+def subject_cell(subject, roster, assessment_ids, scores_map):
+    """Completion of one subject for one class's roster."""
+    complete = partial = 0
+    entered = 0
+    missing_names = []
+    for student in roster:
+        score = scores_map.get(f"{student['id']}-{subject['id']}") or {}
+        marks = score.get('assessmentScores') or {}
+        done = sum(1 for a in assessment_ids if is_entered(marks.get(str(a)) or marks.get(a)))
+        entered += done
+        if done == len(assessment_ids):
+            complete += 1
+        else:
+            partial += 1 if done else 0
+            if len(missing_names) < MAX_NAMES:
+                missing_names.append(student['name'])
+    return {
+        'subject': subject.get('subject', ''),
+        'entered': entered,
+        'expected': len(roster) * len(assessment_ids),
+        'complete': complete,
+        'partial': partial,
+        'none': len(roster) - complete - partial,
+        'missingStudents': missing_names,
+    }
+
+
+def remarks_cell(roster, report_by_student):
+    """Remarks and attendance for one class from reportData."""
+    missing_counts = {field: 0 for field in REMARK_FIELDS}
+    missing_remarks = []
+    complete = 0
+    attendance_values = []
+    for student in roster:
+        data = report_by_student.get(student['id']) or {}
+        missing = [label for field, label in REMARK_FIELDS.items()
+                   if not data.get(field) or (isinstance(data.get(field), str) and not data[field].strip())]
+        for field, label in REMARK_FIELDS.items():
+            if label in missing:
+                missing_counts[field] += 1
+        if missing:
+            if len(missing_remarks) < MAX_NAMES:
+                missing_remarks.append({'studentName': student['name'], 'missingDetails': missing})
+        else:
+            complete += 1
+        try:
+            attendance_values.append(float(data.get('attendance')))
+        except (TypeError, ValueError):
+            pass
+    return {
+        'remarks': {'complete': complete, 'missing': missing_counts, 'missingStudents': missing_remarks},
+        'attendance': {
+            'present': len(attendance_values),
+            'average': round(sum(attendance_values) / len(attendance_values), 1) if attendance_values else None,
+        },
+    }
+
+
+def build_school(db, doc_id, full=False, dry_run=False):
+    started = time.time()
+    school_ref = db.collection('schools').document(doc_id)
+    main = school_ref.get(['reportData', 'metadata']).to_dict() or {}
+    last_updated = ((main.get('metadata') or {}).get('lastUpdated')) or {}
+    fingerprints = {key: str(last_updated.get(key)) for key in STRUCTURE_KEYS + ('students',)}
+
+    previous = None if full else summary_ref(school_ref).get().to_dict()
+    if previous and previous.get('version') != SUMMARY_VERSION:
+        previous = None
+    bucket_times = {snap.id: snap.update_time.isoformat()
+                    for snap in school_ref.collection('score_buckets').select([]).stream()}
+    report_digest = digest(main.get('reportData') or [])
+
+    rebuild = previous is None
+    if previous:
+        sources = previous.get('sources') or {}
+        seen_buckets = sources.get('buckets') or {}
+        if any(sources.get('lastUpdated', {}).get(k) != fingerprints[k] for k in STRUCTURE_KEYS):
+            rebuild = True
+        elif set(seen_buckets) - set(bucket_times):
+            rebuild = True
+        changed_buckets = [b for b, t in bucket_times.items() if seen_buckets.get(b) != t]
+        students_changed = sources.get('lastUpdated', {}).get('students') != fingerprints['students']
+        report_changed = sources.get('reportData') != report_digest
+        if not rebuild and not changed_buckets and not students_changed and not report_changed:
+            return {'status': 'up to date', 'cells': 0, 'dirty': 0, 'bucketsRead': 0, 'seconds': round(time.time() - started, 2)}
+
+    classes = [s.to_dict() for s in school_ref.collection('classes').stream()]
+    subjects = [s.to_dict() for s in school_ref.collection('subjects').stream()]
+    assessment_ids = sorted(a.to_dict().get('id') for a in school_ref.collection('assessments').stream())
+    students = [s.to_dict() for s in school_ref.collection('students').stream()]
+    rosters = {c['id']: sorted((s for s in students if s.get('class') == c.get('name')), key=lambda s: s['id'])
+               for c in classes}
+    roster_digests = {cid: digest([s['id'] for s in roster] + [s.get('name') for s in roster]) for cid, roster in rosters.items()}
+
+    # A rebuild replaces the whole summary, so every cell has to be in it
+    previous_digests = {} if rebuild else (previous or {}).get('digests') or {}
+    roster_changed = any(previous_digests.get(str(cid), {}).get('_roster') != d for cid, d in roster_digests.items())
+    if rebuild or roster_changed:
+        to_read = list(bucket_times)
+    else:
+        to_read = changed_buckets
+    buckets = {}
+    for bucket_id in to_read:
+        buckets[bucket_id] = (school_ref.collection('score_buckets').document(bucket_id).get().to_dict() or {}).get('scoresMap') or {}
+
+    report_by_student = {r.get('studentId'): r for r in (main.get('reportData') or [])}
+    classes_out, digests_out, dirty = {}, {}, {}
+    cells = 0
+    for cls in classes:
+        cid = str(cls['id'])
+        roster = rosters[cls['id']]
+        class_digests = {'_roster': roster_digests[cls['id']]}
+        remarks_input = digest([report_by_student.get(s['id']) for s in roster])
+        class_digests['_remarks'] = remarks_input
+        remarks = remarks_cell(roster, report_by_student)
+        class_out = {'name': cls.get('name', ''), 'students': len(roster), **remarks, 'subjects': {}}
+        if previous_digests.get(cid, {}).get('_remarks') != remarks_input or previous_digests.get(cid, {}).get('_roster') != class_digests['_roster']:
+            dirty[f"classes.{cid}.name"] = class_out['name']
+            dirty[f"classes.{cid}.students"] = class_out['students']
+            dirty[f"classes.{cid}.remarks"] = remarks['remarks']
+            dirty[f"classes.{cid}.attendance"] = remarks['attendance']
+        cells += 1
+
+        for subject in subjects:
+            sid = str(subject['id'])
+            bucket_id = f"subject_{subject['id']}"
+            cells += 1
+            if bucket_id not in buckets and not rebuild:
+                # Bucket unchanged and roster unchanged: keep the stored cell
+                class_digests[sid] = previous_digests.get(cid, {}).get(sid)
+                continue
+            scores_map = buckets.get(bucket_id, {})
+            class_scores = {f"{s['id']}-{subject['id']}": scores_map.get(f"{s['id']}-{subject['id']}") for s in roster}
+            cell_digest = digest([assessment_ids, class_digests['_roster'], subject.get('subject'), class_scores])
+            class_digests[sid] = cell_digest
+            if previous_digests.get(cid, {}).get(sid) == cell_digest:
+                continue
+            cell = subject_cell(subject, roster, assessment_ids, scores_map)
+            class_out['subjects'][sid] = cell
+            dirty[f"classes.{cid}.subjects.{sid}"] = cell
+        classes_out[cid] = class_out
+        digests_out[cid] = class_digests
+
+    sources = {'buckets': bucket_times, 'lastUpdated': fingerprints, 'reportData': report_digest}
+    result = {
+        'status': 'rebuilt' if rebuild else 'updated',
+        'cells': cells,
+        'dirty': len([k for k in dirty if '.subjects.' in k or k.endswith('.remarks')]),
+        'bucketsRead': len(to_read),
+    }
+    if not dry_run:
+        ref = summary_ref(school_ref)
+        if rebuild:
+            commit_in_batches(db, [('set', ref, {
+                'version': SUMMARY_VERSION, 'generatedAt': firestore.SERVER_TIMESTAMP,
+                'classes': classes_out, 'digests': digests_out, 'sources': sources,
+            })])
+        else:
+            updates = dict(dirty)
+            updates.update({f"digests.{cid}": d for cid, d in digests_out.items()})
+            updates['sources'] = sources
+            updates['generatedAt'] = firestore.SERVER_TIMESTAMP
+            commit_in_batches(db, [('update', ref, updates)])
+    result['seconds'] = round(time.time() - started, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain per-term class completion summaries")
+    add_connection_args(parser)
+    parser.add_argument('--prefix', help='Only process docIds starting with this prefix')
+    parser.add_argument('--workers', type=positive_int, default=8, help='Schools processed at once (default: 8)')
+    parser.add_argument('--full', action='store_true', help='Ignore stored summaries and rebuild everything')
+    parser.add_argument('--dry-run', action='store_true', help='Compute but do not write summaries')
+    args = parser.parse_args()
+
+    db = connect_from_args(args)
+    doc_ids = [snap.id for snap in iter_schools(db, prefix=args.prefix, field_paths=[])]
+    print(f"📋 Updating completion summaries for {len(doc_ids)} school term(s) in {describe_target(args)}...")
+
+    started = time.time()
+    failures = 0
+    totals = {'dirty': 0, 'cells': 0, 'bucketsRead': 0}
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(build_school, db, doc_id, args.full, args.dry_run): doc_id for doc_id in doc_ids}
+        for future in as_completed(futures):
+            doc_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"   ❌ {doc_id}: {e}")
+                continue
+            for key in totals:
+                totals[key] += result[key]
+            if result['status'] != 'up to date':
+                print(f"   ✏️  {doc_id}: {result['status']}, {result['dirty']} dirty cell(s), "
+                      f"{result['bucketsRead']} bucket(s) read in {result['seconds']}s")
+
+    verb = 'Would write' if args.dry_run else 'Wrote'
+    print(f"\n✅ {verb} {totals['dirty']} dirty cell(s) of {totals['cells']}, reading {totals['bucketsRead']} bucket(s), "
+          f"in {time.time() - started:.1f}s")
+    if failures:
+        print(f"⚠️  {failures} school(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
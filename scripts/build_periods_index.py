@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Academic Periods Index
+Keeps one document per school base name listing every term it has in every
+FIREBASE_CONFIGS database, so the year/term picker needs one read instead of
+getSchoolYearsAndTerms' docId-prefix query against each database:
+
+    school_periods/{baseName}
+        schoolName   display name of the most recent term
+        databases    database indexes holding terms of this school
+        periods      [{year, term, docId, databaseIndex, schoolName}, ...]
+                     sorted like getSchoolYearsAndTerms (year descending, then term)
+
+The document is written to every database in which the school has terms, so
+the login screen can read it from whichever database it is connected to.
+The first run backfills all databases in parallel; later runs only rewrite
+schools whose periods changed (tracked in a checkpoint).
+
+Usage:
+    python scripts/build_periods_index.py
+    python scripts/build_periods_index.py --databases 1 2 --workers 6
+    python scripts/build_periods_index.py --emulator --database 2
+    python scripts/build_periods_index.py --restart --dry-run
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from firestore_admin import (
+    PROJECT_ROOT, firestore, add_connection_args, connect, connect_from_args, positive_int,
+    load_firebase_configs, iter_schools, school_base_name, commit_in_batches,
+    Checkpoint, default_checkpoint_path,
+)
+
+INDEX_COLLECTION = 'school_periods'
+PERIOD_FIELDS = ['settings.schoolName', 'settings.academicYear', 'settings.academicTerm']
+
+
+def scan_database(db, database_index):
+    """{baseName: [period]} for one database, read with a field projection."""
+    started = time.time()
+    grouped = {}
+    for snap in iter_schools(db, field_paths=PERIOD_FIELDS):
+        settings = (snap.to_dict() or {}).get('settings') or {}
+        grouped.setdefault(school_base_name(snap.id), []).append({
+            'year': settings.get('academicYear') or 'Unknown Year',
+            'term': settings.get('academicTerm') or 'Unknown Term',
+            'docId': snap.id,
+            'databaseIndex': database_index,
+            'schoolName': settings.get('schoolName') or '',
+        })
+    return grouped, time.time() - started
+
+
+def sort_periods(periods):
+    # Same order as getSchoolYearsAndTerms: year descending, then term ascending
+    ordered = sorted(periods, key=lambda p: (p['term'], p['databaseIndex'], p['docId']))
+    return sorted(ordered, key=lambda p: p['year'], reverse=True)
+
+
+def build_documents(scans):
+    """Merge per-database scans into {baseName: index document}."""
+    merged = {}
+    for grouped in scans.values():
+        for base, periods in grouped.items():
+            merged.setdefault(base, []).extend(periods)
+    documents = {}
+    for base, periods in merged.items():
+        periods = sort_periods(periods)
+        documents[base] = {
+            'schoolName': next((p['schoolName'] for p in periods if p['schoolName']), base),
+            'databases': sorted({p['databaseIndex'] for p in periods}),
+            'periods': periods,
+        }
+    return documents
+
+
+def digest(document):
+    return hashlib.sha1(json.dumps(document, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def plan_writes(documents, checkpoint, connected):
+    """Operations per database index for schools that changed since the checkpoint."""
+    operations = {index: [] for index in connected}
+    changed = {}
+    for base in sorted(set(documents) | set(checkpoint.state['done'])):
+        document = documents.get(base)
+        previous = checkpoint.state['done'].get(base) or {}
+        state = {'digest': digest(document), 'databases': document['databases']} if document else None
+        if state == previous or (state is None and not previous):
+            continue
+        changed[base] = state
+        targets = set(state['databases']) if state else set()
+        for index in targets:
+            if index in operations:
+                operations[index].append(('set', base, dict(document, updatedAt=firestore.SERVER_TIMESTAMP)))
+        for index in set(previous.get('databases') or []) - targets:
+            if index in operations:
+                operations[index].append(('delete', base, None))
+    return operations, changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain school_periods/{baseName} documents across databases")
+    add_connection_args(parser)
+    parser.add_argument('--databases', type=int, nargs='+', help='FIREBASE_CONFIGS indexes to cover (default: all)')
+    parser.add_argument('--workers', type=positive_int, default=4, help='Databases scanned/written at once (default: 4)')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: .checkpoints/build_periods_index-<target>.json)')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and rewrite every school')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be written')
+    args = parser.parse_args()
+
+    if args.emulator:
+        # One emulator stands in for the database selected with --database
+        clients = {args.database: connect_from_args(args)}
+        checkpoint_path = args.checkpoint or default_checkpoint_path('build_periods_index', args)
+    else:
+        indexes = args.databases or sorted(load_firebase_configs())
+        clients = {index: connect(index, args.service_account) for index in indexes}
+        checkpoint_path = args.checkpoint or os.path.join(
+            PROJECT_ROOT, '.checkpoints', f"build_periods_index-db{'-'.join(map(str, indexes))}.json")
+    checkpoint = Checkpoint(checkpoint_path)
+    if args.restart:
+        checkpoint.state = {'done': {}}
+
+    started = time.time()
+    print(f"📅 Scanning {len(clients)} database(s) for school terms...")
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {index: pool.submit(scan_database, db, index) for index, db in clients.items()}
+        scans = {}
+        for index, future in futures.items():
+            scans[index], seconds = future.result()
+            terms = sum(len(p) for p in scans[index].values())
+            print(f"   🗄️  Database {index}: {terms} terms of {len(scans[index])} schools in {seconds:.1f}s")
+
+    documents = build_documents(scans)
+    operations, changed = plan_writes(documents, checkpoint, clients)
+    writes = sum(len(ops) for ops in operations.values())
+    print(f"   {len(documents)} schools, {len(changed)} changed since the last run → {writes} write(s)")
+    if args.dry_run:
+        for base in sorted(changed)[:20]:
+            print(f"      {base}")
+        return
+
+    def write_database(index):
+        db = clients[index]
+        batch_ops = []
+        for op, base, document in operations[index]:
+            batch_ops.append((op, db.collection(INDEX_COLLECTION).document(base), document))
+        commit_in_batches(db, batch_ops)
+        return index, len(batch_ops)
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for future in [pool.submit(write_database, index) for index in clients]:
+            try:
+                index, count = future.result()
+                print(f"   ✏️  Database {index}: {count} index document(s) written")
+            except Exception as e:
+                failures += 1
+                print(f"   ❌ {e}")
+
+    if failures:
+        print(f"⚠️  {failures} database(s) failed; the checkpoint was not advanced")
+        sys.exit(1)
+    done = dict(checkpoint.state['done'])
+    for base, state in changed.items():
+        if state is None:
+            done.pop(base, None)
+        else:
+            done[base] = state
+    checkpoint.replace(done)
+    print(f"\n✅ Periods index up to date in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
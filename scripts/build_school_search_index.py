@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+School Search Index
+Maintains a prefix index so login search reads one small document instead of
+scanning `schools`. For every school (docId base name) the index stores its
+display name and years → terms → docIds, under each 2-10 character prefix of
+every word of the name and of the compact name:
+
+    school_search/{prefix}
+        schools.{baseName}   {name, years: {academicYear: {academicTerm: docId}}}
+        truncated            true when more than MAX_ENTRIES schools share the prefix
+
+A search reads the document for the longest typed word (cut to 10 characters)
+and filters it by the remaining words. Locked terms (Access == false) are left
+out, as getSchoolList does.
+
+Usage:
+    python scripts/build_school_search_index.py build --database 1
+    python scripts/build_school_search_index.py build --all-databases --rebuild
+    python scripts/build_school_search_index.py build --emulator --watch
+    python scripts/build_school_search_index.py search --emulator "st mary"
+    python scripts/build_school_search_index.py benchmark --emulator --queries 200
+
+Builds are incremental: term fingerprints from the last run are kept in a
+checkpoint, and only schools that were added or changed are rewritten.
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+
+from firestore_admin import (
+    firestore, FieldPath, add_connection_args, connect, connect_from_args, describe_target, positive_int,
+    load_firebase_configs, iter_schools, school_base_name, commit_in_batches, run_transaction,
+    Checkpoint, default_checkpoint_path, document_size,
+)
+
+INDEX_COLLECTION = 'school_search'
+MIN_PREFIX = 2
+MAX_PREFIX = 10
+MAX_ENTRIES = 100
+TERM_FIELDS = ['settings.schoolName', 'settings.academicYear', 'settings.academicTerm', 'schoolName', 'Access']
+
+
+def normalize(text):
+    return re.sub(r'[^a-z0-9]', '', (text or '').lower())
+
+
+def name_words(text):
+    return [w for w in re.split(r'[^a-z0-9]+', (text or '').lower()) if w]
+
+
+def index_tokens(name, base):
+    tokens = set()
+    for word in name_words(name) + [normalize(name), normalize(base)]:
+        for length in range(MIN_PREFIX, min(len(word), MAX_PREFIX) + 1):
+            tokens.add(word[:length])
+    return tokens
+
+
+def term_fingerprint(data):
+    settings = data.get('settings') or {}
+    return [settings.get('schoolName') or data.get('schoolName') or '',
+            settings.get('academicYear') or '', settings.get('academicTerm') or '',
+            data.get('Access') is not False]
+
+
+def build_entry(base, terms):
+    """Index entry for one school from {docId: fingerprint}, or None when no term is visible."""
+    visible = {doc_id: fp for doc_id, fp in terms.items() if fp[3]}
+    if not visible:
+        return None
+    years = {}
+    for doc_id, (_, year, term, _) in visible.items():
+        years.setdefault(year or 'Unknown Year', {})[term or 'Unknown Term'] = doc_id
+    # Display name of the most recent term
+    latest = max(visible, key=lambda d: (visible[d][1], visible[d][2], d))
+    return {'name': visible[latest][0] or base, 'years': years}
+
+
+def scan_terms(db):
+    grouped = {}
+    for snap in iter_schools(db, field_paths=TERM_FIELDS):
+        grouped.setdefault(school_base_name(snap.id), {})[snap.id] = term_fingerprint(snap.to_dict() or {})
+    return grouped
+
+
+def index_ref(db, token):
+    return db.collection(INDEX_COLLECTION).document(token)
+
+
+def rebuild_index(db, grouped):
+    """Delete and rewrite the whole index. Returns {base: tokens} for the checkpoint."""
+    docs, tokens_by_base = {}, {}
+    for base, terms in sorted(grouped.items()):
+        entry = build_entry(base, terms)
+        if entry is None:
+            continue
+        tokens_by_base[base] = sorted(index_tokens(entry['name'], base))
+        for token in tokens_by_base[base]:
+            doc = docs.setdefault(token, {'schools': {}, 'truncated': False})
+            if len(doc['schools']) < MAX_ENTRIES:
+                doc['schools'][base] = entry
+            else:
+                doc['truncated'] = True
+
+    deletes = [('delete', snap.reference, None) for snap in db.collection(INDEX_COLLECTION).select([]).stream()]
+    commit_in_batches(db, deletes)
+    commit_in_batches(db, [('set', index_ref(db, token), doc) for token, doc in docs.items()])
+    return tokens_by_base, len(docs)
+
+
+def apply_school(db, base, entry, old_tokens):
+    """Point every token of one school at its new entry and drop it from tokens it no longer has."""
+    new_tokens = index_tokens(entry['name'], base) if entry else set()
+    field = FieldPath('schools', base)
+
+    def upsert(transaction, ref):
+        snap = ref.get(transaction=transaction)
+        schools = (snap.to_dict() or {}).get('schools') or {} if snap.exists else {}
+        if base in schools or len(schools) < MAX_ENTRIES:
+            transaction.set(ref, {'schools': {base: entry}}, merge=[field])
+        else:
+            transaction.set(ref, {'truncated': True}, merge=True)
+
+    for token in sorted(new_tokens):
+        ref = index_ref(db, token)
+        run_transaction(db, upsert, ref, documents=[ref.path])
+    removals = [('update', index_ref(db, token), {field.to_api_repr(): firestore.DELETE_FIELD})
+                for token in sorted(set(old_tokens) - new_tokens)]
+    commit_in_batches(db, [op for op in removals if op[1].get([]).exists])
+    return sorted(new_tokens)
+
+
+def sync_changed(db, grouped, checkpoint, bases=None):
+    """Rewrite schools whose terms differ from the checkpoint. Returns the number of schools written."""
+    changed = 0
+    known = checkpoint.state['done']
+    for base in sorted(bases if bases is not None else set(grouped) | set(known)):
+        terms = grouped.get(base, {})
+        previous = known.get(base) or {}
+        if previous.get('terms') == terms:
+            continue
+        tokens = apply_school(db, base, build_entry(base, terms), previous.get('tokens') or [])
+        checkpoint.mark(base, {'terms': terms, 'tokens': tokens})
+        changed += 1
+    return changed
+
+
+def checkpoint_for(args, database_index=None):
+    if database_index is not None:
+        return Checkpoint(default_checkpoint_path('build_school_search_index', argparse.Namespace(emulator=False, database=database_index)))
+    return Checkpoint(args.checkpoint or default_checkpoint_path('build_school_search_index', args))
+
+
+def build_database(db, label, checkpoint, rebuild):
+    started = time.time()
+    grouped = scan_terms(db)
+    if rebuild:
+        tokens_by_base, token_docs = rebuild_index(db, grouped)
+        checkpoint.replace({base: {'terms': terms, 'tokens': tokens_by_base.get(base, [])} for base, terms in grouped.items()})
+        print(f"   🔁 {label}: rebuilt {token_docs} prefix documents for {len(tokens_by_base)} schools "
+              f"in {time.time() - started:.1f}s")
+        return
+    changed = sync_changed(db, grouped, checkpoint)
+    print(f"   ✏️  {label}: {changed} of {len(grouped)} schools updated in {time.time() - started:.1f}s")
+
+
+def watch(db, checkpoint):
+    """
+    Keep the index current from a listener on schools/* until interrupted.
+    Listeners cannot project fields, so every write to a term (heartbeats,
+    userLogs, scores metadata) arrives here; only changes to the indexed
+    fields are queued, and they are applied to the checkpointed terms without
+    reading the school again.
+    """
+    # docId -> fingerprint last indexed or queued; only touched by the listener
+    seen = {doc_id: fingerprint for info in checkpoint.state['done'].values()
+            for doc_id, fingerprint in ((info or {}).get('terms') or {}).items()}
+    pending = {}
+    wake = threading.Event()
+    lock = threading.Lock()
+
+    def on_change(_, changes, __):
+        with lock:
+            for change in changes:
+                doc_id = change.document.id
+                fingerprint = None if change.type.name == 'REMOVED' else term_fingerprint(change.document.to_dict() or {})
+                if fingerprint == seen.get(doc_id):
+                    continue
+                if fingerprint is None:
+                    seen.pop(doc_id, None)
+                else:
+                    seen[doc_id] = fingerprint
+                pending.setdefault(school_base_name(doc_id), {})[doc_id] = fingerprint
+            if pending:
+                wake.set()
+
+    listener = db.collection('schools').on_snapshot(on_change)
+    print("👀 Watching schools/* (Ctrl+C to stop)")
+    try:
+        while True:
+            wake.wait()
+            wake.clear()
+            with lock:
+                updates = dict(pending)
+                pending.clear()
+            for base, docs in sorted(updates.items()):
+                terms = dict((checkpoint.state['done'].get(base) or {}).get('terms') or {})
+                for doc_id, fingerprint in docs.items():
+                    if fingerprint is None:
+                        terms.pop(doc_id, None)
+                    else:
+                        terms[doc_id] = fingerprint
+                if sync_changed(db, {base: terms}, checkpoint, bases=[base]):
+                    print(f"   ✏️  {base}: {len(terms)} term(s) indexed")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.unsubscribe()
+
+
+# -----------------------------------------------------------------------------
+# SEARCH
+# -----------------------------------------------------------------------------
+
+def matches(query, base, name):
+    words = name_words(name)
+    compact = normalize(query)
+    if normalize(name).startswith(compact) or base.startswith(compact):
+        return True
+    return all(any(w.startswith(q) for w in words) for q in name_words(query))
+
+
+def search_index(db, query):
+    """Returns (results, reads, bytes, truncated) using one index read."""
+    words = [w for w in name_words(query) if len(w) >= MIN_PREFIX]
+    if not words:
+        return [], 0, 0, False
+    token = max(words, key=len)[:MAX_PREFIX]
+    snap = index_ref(db, token).get()
+    data = snap.to_dict() or {} if snap.exists else {}
+    results = sorted(base for base, entry in (data.get('schools') or {}).items() if matches(query, base, entry.get('name')))
+    size = document_size(snap.reference.path, data) if snap.exists else 0
+    return results, 1, size, bool(data.get('truncated'))
+
+
+def search_scan(db, query):
+    """getSchoolList(prefix): docId range query (limit 20) reading whole term documents."""
+    prefix = re.sub(r'\s+', '', query.strip().replace('_', '-').replace('/', '')).lower()
+    field = FieldPath.document_id()
+    schools = db.collection('schools')
+    snaps = list(schools.where(filter=firestore.FieldFilter(field, '>=', schools.document(prefix)))
+                 .where(filter=firestore.FieldFilter(field, '<=', schools.document(prefix + '\uf8ff')))
+                 .limit(20).stream())
+    results = sorted({school_base_name(s.id) for s in snaps if (s.to_dict() or {}).get('Access') is not False})
+    return results, max(1, len(snaps)), sum(document_size(s.reference.path, s.to_dict()) for s in snaps), False
+
+
+def search_full_list(db, query):
+    """getSchoolList() followed by filtering on the client: up to 500 whole term documents."""
+    snaps = list(db.collection('schools').limit(500).stream())
+    results = set()
+    for s in snaps:
+        data = s.to_dict() or {}
+        if data.get('Access') is False:
+            continue
+        name = (data.get('settings') or {}).get('schoolName') or data.get('schoolName') or s.id
+        if matches(query, school_base_name(s.id), name):
+            results.add(school_base_name(s.id))
+    return sorted(results), max(1, len(snaps)), sum(document_size(s.reference.path, s.to_dict()) for s in snaps), False
+
+
+def run_build(args):
+    if args.all_databases:
+        if args.emulator or args.watch:
+            print("❌ --all-databases cannot be combined with --emulator or --watch")
+            sys.exit(1)
+        print("🔎 Building school search index in every database...")
+        for index in sorted(load_firebase_configs()):
+            db = connect(index, args.service_account)
+            build_database(db, f"Database {index}", checkpoint_for(args, index), args.rebuild)
+        return
+
+    db = connect_from_args(args)
+    checkpoint = checkpoint_for(args)
+    print(f"🔎 Building school search index in {describe_target(args)}...")
+    build_database(db, describe_target(args), checkpoint, args.rebuild)
+    if args.watch:
+        watch(db, checkpoint)
+
+
+def run_search(args):
+    db = connect_from_args(args)
+    started = time.perf_counter()
+    results, reads, size, truncated = search_index(db, args.query)
+    elapsed = (time.perf_counter() - started) * 1000
+    for base in results:
+        print(f"   {base}")
+    print(f"{len(results)} match(es), {reads} read, {size / 1024:.1f} KB, {elapsed:.1f} ms"
+          f"{' (prefix truncated: type more characters)' if truncated else ''}")
+
+
+def run_benchmark(args):
+    db = connect_from_args(args)
+    grouped = scan_terms(db)
+    names = [(base, build_entry(base, terms)) for base, terms in grouped.items()]
+    names = [(base, entry['name']) for base, entry in names if entry]
+    if not names:
+        print("❌ No schools to search for")
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    queries = list(args.query or [])
+    while len(queries) < args.queries:
+        _, name = rng.choice(names)
+        word = rng.choice(name_words(name) or [normalize(name)])
+        queries.append(word[:rng.randint(MIN_PREFIX, max(MIN_PREFIX, min(len(word), 8)))])
+
+    print(f"⏱️  {len(queries)} searches over {len(names)} schools in {describe_target(args)}")
+    methods = [('index', search_index), ('scan: docId range', search_scan), ('scan: full list', search_full_list)]
+    print(f"\n{'Method':<20} {'Reads/search':>13} {'KB/search':>10} {'p50 ms':>8} {'p99 ms':>8} {'Recall':>8}")
+    print("-" * 72)
+    for label, method in methods:
+        reads, sizes, times, found, expected = [], [], [], 0, 0
+        for query in queries:
+            truth = {base for base, name in names if matches(query, base, name)}
+            started = time.perf_counter()
+            results, r, size, _ = method(db, query)
+            times.append((time.perf_counter() - started) * 1000)
+            reads.append(r)
+            sizes.append(size)
+            found += len(truth & set(results))
+            expected += len(truth)
+        times.sort()
+        p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+        recall = found / expected if expected else 1.0
+        print(f"{label:<20} {statistics.mean(reads):>13.1f} {statistics.mean(sizes) / 1024:>10.1f} "
+              f"{statistics.median(times):>8.1f} {p99:>8.1f} {recall:>7.0%}")
+    print("\nRecall counts schools whose name has a word starting with the query; the index")
+    print("misses only schools beyond MAX_ENTRIES on very short, truncated prefixes.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the school search prefix index")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = add_connection_args(sub.add_parser('build', help='Create or update the index'))
+    build.add_argument('--all-databases', action='store_true', help='Index every FIREBASE_CONFIGS database')
+    build.add_argument('--rebuild', action='store_true', help='Delete and rewrite the whole index')
+    build.add_argument('--watch', action='store_true', help='Keep updating from a listener after the build')
+    build.add_argument('--checkpoint', help='Checkpoint file for a single database (default: .checkpoints/build_school_search_index-<db>.json)')
+
+    search = add_connection_args(sub.add_parser('search', help='Search the index'))
+    search.add_argument('query', help='Text typed into the login search box')
+
+    bench = add_connection_args(sub.add_parser('benchmark', help='Compare index reads with collection scans'))
+    bench.add_argument('--queries', type=positive_int, default=100, help='Random searches to run (default: 100)')
+    bench.add_argument('--query', action='append', help='Extra search text (repeatable)')
+    bench.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+
+    args = parser.parse_args()
+    {'build': run_build, 'search': run_search, 'benchmark': run_benchmark}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Referential Integrity Checker
+Finds dangling references inside school terms: scores of deleted students,
+score buckets of removed subjects, reportData of students who are gone, users
+whose allowedClasses name classes that no longer exist, and the rest of the
+references types.ts defines between a term's entities. Orphans inflate every
+read of a bucket or of the main document and break reports.
+
+Each term is read once: students (id and class only, page by page), classes,
+subjects and assessments go into sets, then the score buckets and legacy score
+documents are streamed one at a time and checked against them, then the main
+document. Schools are checked concurrently and each gets its own timing.
+
+Finding types (repairable ones marked *):
+    score-student*        bucket score whose student no longer exists
+    score-assessment*     marks kept for an assessment that no longer exists
+    score-misfiled        bucket score whose id or subject does not match its bucket
+    bucket-subject*       score_buckets/subject_{id} of a removed subject
+    legacy-score*         legacy scores/ document of a missing student or subject
+    student-class         student in a class that does not exist
+    report-student*       reportData of a missing student
+    report-promoted-to    reportData.promotedTo naming no existing class
+    class-data*           classData of a missing class
+    user-class*           allowedClasses / classSubjects entry naming a missing class
+    user-subject*         allowedSubjects / classSubjects entry naming a missing subject
+    notification-context  notification about a missing class or subject
+    session-user*         activeSessions entry of a missing user
+    device-user*          deviceCredentials of a missing user
+
+--repair removes the repairable ones with batched deletes (map entries are
+removed with DELETE_FIELD, so concurrent edits to other scores survive) and
+filters the main document's arrays in a transaction. Before repairing, the ids
+are read again and only references missing in both reads are removed, so
+students, subjects or classes created while the scan ran are not taken for
+orphans. The rest need a decision and are only reported.
+
+Usage:
+    python scripts/check_integrity.py --emulator
+    python scripts/check_integrity.py --database 1 --prefix myschool --workers 8 --json
+    python scripts/check_integrity.py --database 1 --school myschool_20242025_First-Term --repair
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from firestore_admin import (
+    firestore, FieldPath, add_connection_args, connect_from_args, describe_target, positive_int,
+    iter_schools, iter_paged, commit_in_batches, run_transaction, throttle_for,
+)
+
+FINDING_TYPES = [
+    'score-student', 'score-assessment', 'score-misfiled', 'bucket-subject', 'legacy-score',
+    'student-class', 'report-student', 'report-promoted-to', 'class-data',
+    'user-class', 'user-subject', 'notification-context', 'session-user', 'device-user',
+]
+REPAIRABLE = {
+    'score-student', 'score-assessment', 'bucket-subject', 'legacy-score', 'report-student',
+    'class-data', 'user-class', 'user-subject', 'session-user', 'device-user',
+}
+MAIN_FIELDS = ['users', 'reportData', 'classData', 'activeSessions', 'deviceCredentials']
+EXAMPLES = 5
+
+
+class Findings:
+    """Counts per finding type plus the first few examples of each."""
+
+    def __init__(self, types):
+        self.types = types
+        self.counts = {}
+        self.examples = {}
+
+    def add(self, kind, detail):
+        if kind not in self.types:
+            return False
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        examples = self.examples.setdefault(kind, [])
+        if len(examples) < EXAMPLES:
+            examples.append(detail)
+        return True
+
+    def total(self):
+        return sum(self.counts.values())
+
+
+def key(value):
+    # Ids are numbers in the app and strings in document ids
+    return '' if value is None else str(value)
+
+
+def load_index(school_ref, page_size):
+    """Hash sets of everything a reference can point at."""
+    index = {'students': {}, 'classIds': set(), 'classNames': set(),
+             'subjectIds': set(), 'subjectNames': set(), 'assessmentIds': set()}
+    for snap in iter_paged(school_ref.collection('students').select(['class']), page_size):
+        index['students'][snap.id] = (snap.to_dict() or {}).get('class') or ''
+    for snap in school_ref.collection('classes').stream():
+        index['classIds'].add(snap.id)
+        index['classNames'].add((snap.to_dict() or {}).get('name'))
+    for snap in school_ref.collection('subjects').stream():
+        index['subjectIds'].add(snap.id)
+        index['subjectNames'].add((snap.to_dict() or {}).get('subject'))
+    for snap in school_ref.collection('assessments').select([]).stream():
+        index['assessmentIds'].add(snap.id)
+    return index
+
+
+def merge_index(scanned, current):
+    """Ids present in either read; only references missing from both are orphans."""
+    merged = {name: set(scanned[name]) | set(current[name]) for name in scanned if name != 'students'}
+    merged['students'] = {**current['students'], **scanned['students']}
+    return merged
+
+
+def orphaned(index, refs):
+    """Whether any (index key, id) reference is missing from the index."""
+    return any(ref_id not in index[name] for name, ref_id in refs)
+
+
+def check_students(index, findings):
+    for sid, class_name in index['students'].items():
+        if class_name and class_name not in index['classNames']:
+            findings.add('student-class', f"student {sid} in '{class_name}'")
+
+
+def check_bucket(snap, index, findings):
+    """
+    Findings for one score bucket and the repairs of the repairable ones, as
+    (field path, or None for the whole document, [(index key, id) it references]).
+    """
+    subject_id = snap.id[len('subject_'):] if snap.id.startswith('subject_') else None
+    if subject_id is not None and subject_id not in index['subjectIds']:
+        if findings.add('bucket-subject', f"{snap.id}"):
+            return [(None, [('subjectIds', subject_id)])]
+    repairs = []
+    scores_map = (snap.to_dict() or {}).get('scoresMap') or {}
+    for score_key, score in scores_map.items():
+        if not isinstance(score, dict):
+            continue
+        student_id, score_subject = key(score.get('studentId')), key(score.get('subjectId'))
+        if student_id not in index['students']:
+            if findings.add('score-student', f"{snap.id}/{score_key}"):
+                repairs.append((FieldPath('scoresMap', score_key).to_api_repr(), [('students', student_id)]))
+                continue
+        if score_key != f"{student_id}-{score_subject}" or (subject_id is not None and score_subject != subject_id):
+            findings.add('score-misfiled', f"{snap.id}/{score_key} (subject {score_subject})")
+        for assessment_id in (score.get('assessmentScores') or {}):
+            if key(assessment_id) not in index['assessmentIds']:
+                if findings.add('score-assessment', f"{snap.id}/{score_key} assessment {assessment_id}"):
+                    path = FieldPath('scoresMap', score_key, 'assessmentScores', key(assessment_id))
+                    repairs.append((path.to_api_repr(), [('assessmentIds', key(assessment_id))]))
+    return repairs
+
+
+def check_legacy_score(snap, index, findings):
+    score = snap.to_dict() or {}
+    refs = [('students', key(score.get('studentId'))), ('subjectIds', key(score.get('subjectId')))]
+    if orphaned(index, refs) and findings.add('legacy-score', f"scores/{snap.id}"):
+        return [(None, refs)]
+    return []
+
+
+def repair_operations(pending, index):
+    """Batch operations for the scanned repairs that are still orphaned in index."""
+    operations = []
+    for ref, repairs in pending:
+        paths = [path for path, refs in repairs if orphaned(index, refs)]
+        if None in paths:
+            operations.append(('delete', ref, None))
+        elif paths:
+            operations.append(('update', ref, {path: firestore.DELETE_FIELD for path in paths}))
+    return operations
+
+
+def check_main(data, index, findings):
+    """Findings on the main document and the cleaned values of the fields that change."""
+    students, class_names, subject_names = index['students'], index['classNames'], index['subjectNames']
+    updates = {}
+
+    report_data = data.get('reportData') or []
+    kept = []
+    for report in report_data:
+        if not isinstance(report, dict):
+            kept.append(report)
+            continue
+        student_id = key(report.get('studentId'))
+        if student_id not in students and findings.add('report-student', f"student {student_id}"):
+            continue
+        promoted_to = report.get('promotedTo')
+        if promoted_to and promoted_to not in class_names:
+            findings.add('report-promoted-to', f"student {student_id} → '{promoted_to}'")
+        kept.append(report)
+    if len(kept) != len(report_data):
+        updates['reportData'] = kept
+
+    class_data = data.get('classData') or []
+    kept = [c for c in class_data if not (isinstance(c, dict) and key(c.get('classId')) not in index['classIds']
+                                          and findings.add('class-data', f"class {c.get('classId')}"))]
+    if len(kept) != len(class_data):
+        updates['classData'] = kept
+
+    users = data.get('users') or []
+    user_ids = {key(u.get('id')) for u in users if isinstance(u, dict)}
+    cleaned_users, users_changed = [], False
+    for user in users:
+        if not isinstance(user, dict):
+            cleaned_users.append(user)
+            continue
+        user = dict(user)
+        label = user.get('name') or user.get('id')
+        allowed = user.get('allowedClasses') or []
+        kept = [c for c in allowed if c in class_names or not findings.add('user-class', f"{label}: '{c}'")]
+        if len(kept) != len(allowed):
+            user['allowedClasses'], users_changed = kept, True
+        allowed = user.get('allowedSubjects') or []
+        kept = [s for s in allowed if s in subject_names or not findings.add('user-subject', f"{label}: '{s}'")]
+        if len(kept) != len(allowed):
+            user['allowedSubjects'], users_changed = kept, True
+        class_subjects = user.get('classSubjects')
+        if isinstance(class_subjects, dict):
+            cleaned = {}
+            for class_name, subjects in class_subjects.items():
+                if class_name not in class_names and findings.add('user-class', f"{label}: classSubjects '{class_name}'"):
+                    continue
+                subjects = subjects or []
+                cleaned[class_name] = [s for s in subjects if s in subject_names or not findings.add(
+                    'user-subject', f"{label}: classSubjects '{class_name}' → '{s}'")]
+            if cleaned != class_subjects:
+                user['classSubjects'], users_changed = cleaned, True
+        for notification in user.get('notifications') or []:
+            context = (notification or {}).get('context') or {}
+            class_id = context.get('classId', (notification or {}).get('classId'))
+            subject_id = context.get('subjectId')
+            if (class_id is not None and key(class_id) not in index['classIds']) or \
+                    (subject_id is not None and key(subject_id) not in index['subjectIds']):
+                findings.add('notification-context', f"{label}: {notification.get('id')}")
+        cleaned_users.append(user)
+    if users_changed:
+        updates['users'] = cleaned_users
+
+    sessions = data.get('activeSessions') or {}
+    stale = [uid for uid in sessions if uid not in user_ids and findings.add('session-user', f"user {uid}")]
+    if stale:
+        updates['activeSessions'] = {uid: seen for uid, seen in sessions.items() if uid not in stale}
+
+    devices = data.get('deviceCredentials') or []
+    kept = [d for d in devices if not (isinstance(d, dict) and key(d.get('userId')) not in user_ids
+                                       and findings.add('device-user', f"{d.get('deviceId')} → user {d.get('userId')}"))]
+    if len(kept) != len(devices):
+        updates['deviceCredentials'] = kept
+    return updates
+
+
+def check_school(db, doc_id, types, page_size, repair):
+    started = time.time()
+    school_ref = db.collection('schools').document(doc_id)
+    findings = Findings(types)
+    index = load_index(school_ref, page_size)
+    check_students(index, findings)
+
+    pending, buckets_read, legacy_read = [], 0, 0
+    for snap in school_ref.collection('score_buckets').stream():
+        buckets_read += 1
+        repairs = check_bucket(snap, index, findings)
+        if repairs:
+            pending.append((snap.reference, repairs))
+    for snap in iter_paged(school_ref.collection('scores').select(['studentId', 'subjectId']), page_size):
+        legacy_read += 1
+        repairs = check_legacy_score(snap, index, findings)
+        if repairs:
+            pending.append((snap.reference, repairs))
+
+    main = school_ref.get(MAIN_FIELDS)
+    main_updates = check_main(main.to_dict() or {}, index, findings)
+
+    written = 0
+    if repair and (pending or main_updates):
+        # Ids created since the scan started make their references valid again
+        current = merge_index(index, load_index(school_ref, page_size))
+        operations = repair_operations(pending, current)
+        stamps = {}
+        if any(ref.parent.id == 'score_buckets' for _, ref, _ in operations):
+            stamps['metadata.lastUpdated.scores'] = firestore.SERVER_TIMESTAMP
+        if stamps:
+            operations.append(('update', school_ref, stamps))
+        commit_in_batches(db, operations)
+        written = len(operations)
+
+        def clean(transaction):
+            # Re-check the current document against the re-read ids, so entries
+            # added or made valid since the scan survive
+            snap = school_ref.get(MAIN_FIELDS, transaction=transaction)
+            updates = check_main(snap.to_dict() or {}, current, Findings(types))
+            if not updates:
+                return 0
+            stamps = {f"metadata.lastUpdated.{field}": firestore.SERVER_TIMESTAMP for field in updates}
+            transaction.update(school_ref, {**updates, **stamps})
+            return 1
+
+        if main_updates:
+            written += run_transaction(db, clean, documents=[school_ref.path])
+
+    return {
+        'school': doc_id,
+        'students': len(index['students']),
+        'buckets': buckets_read,
+        'legacyScores': legacy_read,
+        'findings': findings.counts,
+        'examples': findings.examples,
+        'total': findings.total(),
+        'repairable': sum(n for kind, n in findings.counts.items() if kind in REPAIRABLE),
+        'written': written,
+        'seconds': round(time.time() - started, 2),
+    }
+
+
+def parse_types(text):
+    types = [t.strip() for t in text.split(',') if t.strip()]
+    unknown = [t for t in types if t not in FINDING_TYPES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown finding type(s): {', '.join(unknown)}")
+    return set(types)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find (and optionally repair) dangling references in school terms")
+    add_connection_args(parser)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--prefix', help='Only check docIds starting with this prefix')
+    target.add_argument('--school', help='Only check this term docId')
+    parser.add_argument('--types', type=parse_types, default=set(FINDING_TYPES),
+                        help=f"Comma-separated finding types to check (default: all of {', '.join(FINDING_TYPES)})")
+    parser.add_argument('--workers', type=positive_int, default=8, help='Schools checked at once (default: 8)')
+    parser.add_argument('--page-size', type=positive_int, default=500, help='Students read per page (default: 500)')
+    parser.add_argument('--repair', action='store_true', help='Delete the repairable findings')
+    parser.add_argument('--json', action='store_true', help='Print the per-school results as JSON')
+    args = parser.parse_args()
+
+    db = connect_from_args(args)
+    if args.school:
+        doc_ids = [args.school] if db.collection('schools').document(args.school).get([]).exists else []
+    else:
+        doc_ids = [snap.id for snap in iter_schools(db, prefix=args.prefix, field_paths=[])]
+    if args.school and not doc_ids:
+        print(f"❌ School term {args.school} not found in {describe_target(args)}")
+        sys.exit(1)
+    if not args.json:
+        action = 'Checking and repairing' if args.repair else 'Checking'
+        print(f"🔍 {action} {len(doc_ids)} school term(s) in {describe_target(args)}...")
+
+    started = time.time()
+    results, failures = [], 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(check_school, db, doc_id, args.types, args.page_size, args.repair): doc_id
+                   for doc_id in doc_ids}
+        for future in as_completed(futures):
+            doc_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures += 1
+                if not args.json:
+                    print(f"   ❌ {doc_id}: {e}")
+                continue
+            results.append(result)
+            if args.json:
+                continue
+            if not result['total']:
+                print(f"   ✅ {doc_id}: clean ({result['students']} students, {result['buckets']} buckets) "
+                      f"in {result['seconds']}s")
+                continue
+            print(f"   ⚠️  {doc_id}: {result['total']} finding(s) in {result['seconds']}s"
+                  + (f", {result['written']} write(s)" if args.repair else ''))
+            for kind in FINDING_TYPES:
+                if kind in result['findings']:
+                    print(f"      {kind:<22} {result['findings'][kind]:>6}  e.g. {'; '.join(result['examples'][kind][:3])}")
+
+    results.sort(key=lambda r: r['school'])
+    if args.json:
+        print(json.dumps({'schools': results, 'failures': failures,
+                          'seconds': round(time.time() - started, 2)}, indent=2, ensure_ascii=False))
+    else:
+        totals = {}
+        for result in results:
+            for kind, count in result['findings'].items():
+                totals[kind] = totals.get(kind, 0) + count
+        dirty = sum(1 for r in results if r['total'])
+        print(f"\n✅ Checked {len(results)} school term(s) in {time.time() - started:.1f}s: "
+              f"{sum(totals.values())} finding(s) in {dirty} term(s)")
+        for kind in FINDING_TYPES:
+            if kind in totals:
+                print(f"   {kind:<22} {totals[kind]:>6}{'' if kind in REPAIRABLE else '  (report only)'}")
+        repairable = sum(r['repairable'] for r in results)
+        if repairable and not args.repair:
+            print(f"   Run with --repair to remove the {repairable} repairable finding(s)")
+        if args.repair:
+            print(f"   🚦 {throttle_for(db).summary()}")
+    if failures:
+        if not args.json:
+            print(f"⚠️  {failures} school(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
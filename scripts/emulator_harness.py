@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Sharded Emulator Harness
+Starts K Firestore emulators side by side instead of the single one on
+port 8080 that run_server.py launches, and spreads test shards or benchmark
+workers across them so runs stop queueing on one JVM.
+
+Each instance gets its own free ports (Firestore, websocket, hub, logging) and
+a generated firebase.json under .cache/emulators/instance-N/ with the debug
+rules and the UI turned off. Instances can be seeded from:
+
+    an emulator export directory      passed to emulators:start --import
+    a snapshot (.jsonl/.json) or a    written into every instance with batched
+    backup_database.py directory      commits once it is up (see firestore_fake.py)
+
+Shards then run the given command with these environment variables set (and
+the same names usable as {placeholders} in the command):
+
+    FIRESTORE_EMULATOR_HOST / host    localhost:<port> of the shard's instance
+    EMULATOR_PORT / port              that port
+    SHARD_INDEX / shard               0 .. shards-1
+    SHARD_COUNT / shards              number of shards
+
+Shard i uses instance i % K. Every shard's wall time and exit code are
+reported, together with the total wall time and the speed-up over running the
+shards one after another.
+
+Usage:
+    python scripts/firestore_fake.py snapshot --emulator --out fixtures/seed.jsonl
+    python scripts/emulator_harness.py --instances 4 --seed fixtures/seed.jsonl -- \\
+        python scripts/load_generator.py --emulator --emulator-host {host} --seed {shard} --json reports/load-{shard}.json
+    python scripts/emulator_harness.py --instances 4 --shards 8 -- \\
+        python scripts/benchmark_write_patterns.py --emulator --emulator-host {host} --writers 10
+    python scripts/emulator_harness.py --instances 3 --import emulator-data --keep
+
+Requires Firebase CLI (npx firebase) and, for snapshot seeding, Firebase Admin SDK
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RULES_PATH = os.path.join(PROJECT_ROOT, 'firestore.debug.rules')
+HARNESS_DIR = os.path.join(PROJECT_ROOT, '.cache', 'emulators')
+# Same project the emulator is started with in run_server.py
+PROJECT_ID = 'sba-pro-master-40f08'
+PORTS_PER_INSTANCE = 4
+
+
+def default_instances():
+    # Each emulator is a JVM that keeps about one core busy under load
+    return max(1, min(8, (os.cpu_count() or 2) // 2))
+
+
+def free_ports(count):
+    """Ask the OS for distinct free ports (held open until all are chosen)."""
+    sockets, ports = [], []
+    try:
+        for _ in range(count):
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.bind(('localhost', 0))
+            sockets.append(s)
+            ports.append(s.getsockname()[1])
+    finally:
+        for s in sockets:
+            s.close()
+    return ports
+
+
+def socket_check(host, port, timeout=1.0):
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def is_emulator_export(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, 'firebase-export-metadata.json'))
+
+
+class Instance:
+    """One emulator process with its generated config and ports."""
+
+    def __init__(self, index, ports):
+        self.index = index
+        self.port, self.websocket_port, self.hub_port, self.logging_port = ports
+        self.dir = os.path.join(HARNESS_DIR, f'instance-{index}')
+        self.proc = None
+        self.log = None
+        self.boot_seconds = None
+        self.seed_seconds = None
+
+    @property
+    def host(self):
+        return f'localhost:{self.port}'
+
+    def write_config(self):
+        os.makedirs(self.dir, exist_ok=True)
+        # Rules paths resolve against the config's directory, so keep a copy beside it
+        shutil.copyfile(RULES_PATH, os.path.join(self.dir, 'firestore.debug.rules'))
+        config = {
+            'firestore': {'rules': 'firestore.debug.rules'},
+            'emulators': {
+                'firestore': {'port': self.port, 'websocketPort': self.websocket_port},
+                'hub': {'port': self.hub_port},
+                'logging': {'port': self.logging_port},
+                'ui': {'enabled': False},
+                'singleProjectMode': True,
+            },
+        }
+        path = os.path.join(self.dir, 'firebase.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=4)
+        return path
+
+    def start(self, import_dir=None):
+        config_path = self.write_config()
+        npx = 'npx.cmd' if os.name == 'nt' else 'npx'
+        cmd = [npx, 'firebase', 'emulators:start', '--only', 'firestore', '--project', PROJECT_ID,
+               '--config', config_path]
+        if import_dir:
+            cmd += ['--import', os.path.abspath(import_dir)]
+        self.log = open(os.path.join(self.dir, 'emulator.log'), 'w', encoding='utf-8')
+        # Own process group, so the JVM that npx spawns is stopped with it
+        kwargs = ({'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == 'nt'
+                  else {'start_new_session': True})
+        self.started = time.time()
+        self.proc = subprocess.Popen(cmd, cwd=self.dir, stdout=self.log, stderr=subprocess.STDOUT, **kwargs)
+
+    def wait_ready(self, timeout):
+        deadline = self.started + timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                return False
+            if socket_check('localhost', self.port):
+                self.boot_seconds = time.time() - self.started
+                return True
+            time.sleep(0.5)
+        return False
+
+    def stop(self):
+        if self.proc and self.proc.poll() is None:
+            try:
+                if os.name == 'nt':
+                    subprocess.call(['taskkill', '/PID', str(self.proc.pid), '/T', '/F'],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                else:
+                    os.killpg(self.proc.pid, signal.SIGTERM)
+                self.proc.wait(timeout=15)
+            except (OSError, subprocess.TimeoutExpired):
+                self.proc.kill()
+        if self.log:
+            self.log.close()
+
+
+def seed_instances(instances, snapshot_path, workers):
+    """Write a snapshot into every instance. Returns the number of documents per instance."""
+    # Imported here so the harness itself runs without the Admin SDK
+    from firestore_admin import connect, configure_throttle, commit_in_batches, decode_value
+    from firestore_fake import read_snapshot
+
+    records = list(read_snapshot(snapshot_path))
+    # connect() points FIRESTORE_EMULATOR_HOST at one instance at a time
+    clients = [connect(emulator=True, emulator_host=instance.host) for instance in instances]
+    for db in clients:
+        configure_throttle(db, write_rate=None)
+
+    def seed(instance, db):
+        started = time.time()
+        commit_in_batches(db, [('set', db.document(r['path']), decode_value(r['data'], db)) for r in records])
+        instance.seed_seconds = time.time() - started
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(seed, instances, clients))
+    return len(records)
+
+
+def run_shard(index, count, instance, command, log_dir):
+    values = {'host': instance.host, 'port': instance.port, 'shard': index, 'shards': count}
+    argv = [part.format(**values) for part in command]
+    env = dict(os.environ, FIRESTORE_EMULATOR_HOST=instance.host, EMULATOR_PORT=str(instance.port),
+               SHARD_INDEX=str(index), SHARD_COUNT=str(count))
+    log_path = os.path.join(log_dir, f'shard-{index}.log')
+    started = time.time()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        code = subprocess.call(argv, cwd=PROJECT_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return {'shard': index, 'instance': instance.index, 'host': instance.host, 'exitCode': code,
+            'seconds': round(time.time() - started, 2), 'log': log_path}
+
+
+def tail(path, lines=15):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.readlines()[-lines:]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Start K Firestore emulators and run sharded tests or benchmarks across them",
+        usage='%(prog)s [options] [-- command ...]')
+    parser.add_argument('--instances', type=int, default=default_instances(),
+                        help=f'Emulators to start (default: half the cores, up to 8; here {default_instances()})')
+    parser.add_argument('--shards', type=int, help='Shards to run (default: one per instance)')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--import', dest='import_dir', help='Emulator export directory to start every instance from')
+    source.add_argument('--seed', help='Snapshot (.jsonl/.json) or backup directory to write into every instance')
+    parser.add_argument('--boot-timeout', type=int, default=90, help='Seconds to wait for each emulator (default: 90)')
+    parser.add_argument('--keep', action='store_true', help='Keep the emulators running until Ctrl+C')
+    parser.add_argument('--json', help='Write the run summary to this file')
+    argv = sys.argv[1:]
+    split = argv.index('--') if '--' in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    command = argv[split + 1:]
+    if args.instances < 1 or (args.shards is not None and args.shards < 1):
+        parser.error('--instances and --shards must be >= 1')
+    if not command and not args.keep:
+        parser.error('give a command after -- or use --keep')
+    if args.import_dir and not is_emulator_export(args.import_dir):
+        parser.error(f'{args.import_dir} is not an emulator export (no firebase-export-metadata.json); '
+                     'use --seed for snapshots and backups')
+
+    shard_count = args.shards or args.instances
+    os.makedirs(HARNESS_DIR, exist_ok=True)
+    ports = free_ports(args.instances * PORTS_PER_INSTANCE)
+    instances = [Instance(i, ports[i * PORTS_PER_INSTANCE:(i + 1) * PORTS_PER_INSTANCE])
+                 for i in range(args.instances)]
+
+    stopping = threading.Event()
+
+    def _terminate(signum, frame):
+        stopping.set()
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _terminate)
+    run_started = time.time()
+    summary = {'instances': [], 'shards': []}
+    exit_code = 0
+    try:
+        print(f"🚀 Starting {args.instances} Firestore emulator(s)...")
+        for instance in instances:
+            instance.start(args.import_dir)
+        for instance in instances:
+            if not instance.wait_ready(args.boot_timeout):
+                print(f"❌ Emulator {instance.index} did not come up on {instance.host}; see {instance.dir}/emulator.log")
+                for line in tail(os.path.join(instance.dir, 'emulator.log')):
+                    print(f"   {line.rstrip()}")
+                sys.exit(1)
+            print(f"   ✅ Emulator {instance.index} on {instance.host} in {instance.boot_seconds:.1f}s")
+
+        if args.seed:
+            documents = seed_instances(instances, args.seed, args.instances)
+            print(f"🌱 Seeded {documents} document(s) into each instance "
+                  f"(slowest {max(i.seed_seconds for i in instances):.1f}s)")
+
+        summary['instances'] = [{'index': i.index, 'host': i.host, 'bootSeconds': round(i.boot_seconds, 2),
+                                 'seedSeconds': round(i.seed_seconds, 2) if i.seed_seconds is not None else None}
+                                for i in instances]
+
+        if command:
+            log_dir = os.path.join(HARNESS_DIR, 'shards')
+            os.makedirs(log_dir, exist_ok=True)
+            print(f"🧪 Running {shard_count} shard(s) of: {' '.join(command)}")
+            shards_started = time.time()
+            with ThreadPoolExecutor(max_workers=shard_count) as pool:
+                futures = [pool.submit(run_shard, i, shard_count, instances[i % len(instances)], command, log_dir)
+                           for i in range(shard_count)]
+                results = [f.result() for f in futures]
+            wall = time.time() - shards_started
+            serial = sum(r['seconds'] for r in results)
+            summary['shards'] = results
+            summary['shardWallSeconds'] = round(wall, 2)
+            summary['speedup'] = round(serial / wall, 2) if wall else None
+
+            for r in results:
+                mark = '✅' if r['exitCode'] == 0 else '❌'
+                print(f"   {mark} shard {r['shard']:>2} on {r['host']}: {r['seconds']:>7.1f}s (exit {r['exitCode']})")
+            failed = [r for r in results if r['exitCode'] != 0]
+            for r in failed:
+                print(f"\n--- shard {r['shard']} ({r['log']}) ---")
+                for line in tail(r['log']):
+                    print(f"   {line.rstrip()}")
+            print(f"\n⏱️  Shards took {wall:.1f}s wall, {serial:.1f}s summed ({summary['speedup']}x); "
+                  f"slowest shard {max(r['seconds'] for r in results):.1f}s")
+            exit_code = 1 if failed else 0
+
+        if args.keep and not stopping.is_set():
+            print("\n👀 Emulators running (Ctrl+C to stop):")
+            for instance in instances:
+                print(f"   FIRESTORE_EMULATOR_HOST={instance.host}")
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nStopping emulators...")
+    finally:
+        for instance in instances:
+            instance.stop()
+        summary['totalSeconds'] = round(time.time() - run_started, 2)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
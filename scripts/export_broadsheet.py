@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Broadsheet Export
+Writes a whole term's broadsheet to XLSX, one sheet per class, without loading
+the term into memory the way utils/exportUtils does in the browser. Students
+are read page by page with a field projection (no pictures), score buckets are
+read one subject at a time and reduced to per-student class/exam scores, and
+rows go straight to disk through openpyxl's write-only workbook.
+
+Each sheet lists, per student: index number, name, total and grade for every
+subject the class takes, overall total, aggregate and class position, with the
+same rules as the report card (see report_math.py).
+
+Usage:
+    python scripts/export_broadsheet.py --emulator --school ayirebida_20242025_First-Term
+    python scripts/export_broadsheet.py --database 1 --school ayirebida_20242025_First-Term --out broadsheet.xlsx
+    python scripts/export_broadsheet.py --emulator --school benchschool_20242025_First-Term --json
+
+Requires Firebase Admin SDK and openpyxl
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+from firestore_admin import add_connection_args, connect_from_args, describe_target, positive_int
+from report_math import load_rosters, load_totals, class_results
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+except ImportError:
+    print("❌ openpyxl not installed")
+    print("Install with: pip install openpyxl")
+    sys.exit(1)
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then left out of the report
+    resource = None
+
+# Same header look as exportToExcel: bold, light grey, thin border, centred
+HEADER_FONT = Font(bold=True, size=12)
+HEADER_FILL = PatternFill('solid', fgColor='FFD3D3D3')
+HEADER_BORDER = Border(*(Side(style='thin'),) * 4)
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='middle')
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def sheet_title(name, used):
+    """Excel sheet names: at most 31 characters, no []:*?/\\ and unique."""
+    base = re.sub(r'[\[\]:*?/\\]', '-', name or 'Unassigned').strip() or 'Unassigned'
+    title, n = base[:31], 2
+    while title.lower() in used:
+        suffix = f" ({n})"
+        title, n = base[:31 - len(suffix)] + suffix, n + 1
+    used.add(title.lower())
+    return title
+
+
+def header_row(sheet, headers):
+    row = []
+    for text in headers:
+        cell = WriteOnlyCell(sheet, value=text)
+        cell.font, cell.fill, cell.border, cell.alignment = HEADER_FONT, HEADER_FILL, HEADER_BORDER, HEADER_ALIGNMENT
+        row.append(cell)
+    return row
+
+
+def mark(value):
+    return round(value, 1) if value else None
+
+
+def write_class(workbook, title, roster, subjects, totals, grades):
+    student_ids = [sid for sid, _, _ in roster]
+    results, relevant = class_results(student_ids, subjects, totals, grades)
+    sheet = workbook.create_sheet(title)
+    sheet.freeze_panes = 'C2'
+    headers = ['Index No', 'Student']
+    for subject in relevant:
+        headers += [subject.get('subject', ''), f"{subject.get('subject', '')} Grade"]
+    headers += ['Total', 'Aggregate', 'Position']
+    sheet.append(header_row(sheet, headers))
+
+    for sid, name, index_number in sorted(roster, key=lambda s: s[1].lower()):
+        result = results[sid]
+        row = [index_number, name]
+        for subject in relevant:
+            cell = result['subjects'][subject['id']]
+            row += [mark(cell['totalScore']), cell['grade']]
+        row += [mark(result['total']), result['aggregate'], result['position'] or None]
+        sheet.append(row)
+    return len(relevant)
+
+
+def export(db, doc_id, out_path, page_size):
+    timings = {}
+    started = time.time()
+    school_ref = db.collection('schools').document(doc_id)
+    main = school_ref.get(['grades'])
+    if not main.exists:
+        raise SystemExit(f"❌ School term {doc_id} not found")
+    grades = (main.to_dict() or {}).get('grades') or []
+    subjects = sorted((s.to_dict() for s in school_ref.collection('subjects').stream()), key=lambda s: s.get('subject', ''))
+    assessments = [a.to_dict() for a in school_ref.collection('assessments').stream()]
+    class_order = [c.get('name') for c in sorted((c.to_dict() for c in school_ref.collection('classes').stream()),
+                                                  key=lambda c: c.get('name', ''))]
+    rosters, student_count = load_rosters(school_ref, page_size)
+    timings['students'] = time.time() - started
+
+    bucket_started = time.time()
+    totals = load_totals(school_ref, subjects, assessments)
+    timings['buckets'] = time.time() - bucket_started
+
+    write_started = time.time()
+    workbook = Workbook(write_only=True)
+    used_titles = set()
+    # Known classes first in name order, then classes only named on students
+    names = [n for n in class_order if n in rosters] + sorted(n for n in rosters if n not in class_order)
+    sheets = []
+    for name in names:
+        subject_count = write_class(workbook, sheet_title(name, used_titles), rosters[name], subjects, totals, grades)
+        sheets.append({'class': name or 'Unassigned', 'students': len(rosters[name]), 'subjects': subject_count})
+    if not sheets:
+        workbook.create_sheet('Broadsheet')
+    workbook.save(out_path)
+    timings['write'] = time.time() - write_started
+
+    return {
+        'school': doc_id,
+        'out': out_path,
+        'students': student_count,
+        'classes': len(sheets),
+        'subjects': len(subjects),
+        'sheets': sheets,
+        'seconds': round(time.time() - started, 2),
+        'readStudentsSeconds': round(timings['students'], 2),
+        'readBucketsSeconds': round(timings['buckets'], 2),
+        'writeSeconds': round(timings['write'], 2),
+        'bytes': os.path.getsize(out_path),
+        'peakRssMb': round(peak_rss_mb(), 1) if resource else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a term's broadsheet to XLSX, one sheet per class")
+    add_connection_args(parser)
+    parser.add_argument('--school', required=True, help='Term docId, e.g. myschool_20242025_First-Term')
+    parser.add_argument('--out', help='Output file (default: <docId>-broadsheet.xlsx)')
+    parser.add_argument('--page-size', type=positive_int, default=500, help='Students read per page (default: 500)')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    args = parser.parse_args()
+
+    db = connect_from_args(args)
+    out_path = args.out or f"{args.school}-broadsheet.xlsx"
+    if not args.json:
+        print(f"📊 Exporting broadsheet of {args.school} from {describe_target(args)}...")
+    result = export(db, args.school, out_path, args.page_size)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for sheet in result['sheets']:
+        print(f"   📄 {sheet['class']}: {sheet['students']} students, {sheet['subjects']} subjects")
+    print(f"\n✅ {result['students']} students in {result['classes']} sheet(s) → {out_path} "
+          f"({result['bytes'] / 1024:.0f} KB)")
+    print(f"   ⏱️  {result['seconds']}s total (students {result['readStudentsSeconds']}s, "
+          f"buckets {result['readBucketsSeconds']}s, write {result['writeSeconds']}s)")
+    if result['peakRssMb'] is not None:
+        print(f"   🧠 Peak RSS {result['peakRssMb']} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,614 @@
+#!/usr/bin/env python3
+"""
+Firestore Admin Helpers
+Shared connection, traversal, batching and throttling helpers for the Python
+admin tools in scripts/. Database indexes match FIREBASE_CONFIGS in constants.ts.
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import base64
+import datetime
+import os
+import json
+import random
+import re
+import sys
+import threading
+import time
+
+try:
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+    from google.api_core import exceptions as api_exceptions
+    from google.cloud.firestore_v1.field_path import FieldPath
+except ImportError:
+    print("❌ Firebase Admin SDK not installed")
+    print("Install with: pip install firebase-admin")
+    sys.exit(1)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONSTANTS_PATH = os.path.join(PROJECT_ROOT, 'constants.ts')
+
+# Same project the emulator is started with in run_server.py
+EMULATOR_PROJECT_ID = 'sba-pro-master-40f08'
+EMULATOR_HOST = 'localhost:8080'
+
+# Safety margin below Firestore's 500 writes per batch (mirrors saveDataTransaction)
+BATCH_SIZE = 450
+
+# Subcollections hanging off schools/{docId}
+SCHOOL_SUBCOLLECTIONS = ['students', 'classes', 'subjects', 'assessments', 'score_buckets', 'scores']
+
+
+def load_firebase_configs(constants_path=CONSTANTS_PATH):
+    """Parse FIREBASE_CONFIGS from constants.ts into {index: {projectId, label, isReserved}}."""
+    with open(constants_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    match = re.search(r'export const FIREBASE_CONFIGS:.*?\{(.*?)^\};', content, re.MULTILINE | re.DOTALL)
+    if not match:
+        raise ValueError(f"Could not find FIREBASE_CONFIGS in {constants_path}")
+
+    configs = {}
+    for entry in re.finditer(r'^\s*(\d+):\s*\{(.*?)\}', match.group(1), re.MULTILINE | re.DOTALL):
+        body = entry.group(2)
+        project = re.search(r'projectId:\s*["\']([^"\']+)["\']', body)
+        label = re.search(r'label:\s*["\']([^"\']+)["\']', body)
+        reserved = re.search(r'isReserved:\s*(true|false)', body)
+        configs[int(entry.group(1))] = {
+            'projectId': project.group(1) if project else None,
+            'label': label.group(1) if label else f'Database {entry.group(1)}',
+            'isReserved': bool(reserved and reserved.group(1) == 'true'),
+        }
+    return configs
+
+
+def connect(database_index=1, service_account=None, emulator=False, emulator_host=EMULATOR_HOST):
+    """
+    Return a Firestore client for one FIREBASE_CONFIGS database.
+    In emulator mode the database index is ignored, like the web app does.
+    """
+    if emulator:
+        os.environ['FIRESTORE_EMULATOR_HOST'] = emulator_host
+        from google.auth.credentials import AnonymousCredentials
+        return firestore.Client(project=EMULATOR_PROJECT_ID, credentials=AnonymousCredentials())
+
+    configs = load_firebase_configs()
+    if database_index not in configs:
+        raise ValueError(f"Invalid database index: {database_index}")
+
+    app_name = f'sba_db_{database_index}'
+    try:
+        app = firebase_admin.get_app(app_name)
+    except ValueError:
+        cred = credentials.Certificate(service_account) if service_account else credentials.ApplicationDefault()
+        app = firebase_admin.initialize_app(cred, {'projectId': configs[database_index]['projectId']}, name=app_name)
+    return firestore.client(app)
+
+
+def connect_async(database_index=1, service_account=None, emulator=False, emulator_host=EMULATOR_HOST):
+    """AsyncClient counterpart of connect(), for asyncio tools."""
+    if emulator:
+        os.environ['FIRESTORE_EMULATOR_HOST'] = emulator_host
+        from google.auth.credentials import AnonymousCredentials
+        return firestore.AsyncClient(project=EMULATOR_PROJECT_ID, credentials=AnonymousCredentials())
+
+    configs = load_firebase_configs()
+    if database_index not in configs:
+        raise ValueError(f"Invalid database index: {database_index}")
+    cred = credentials.Certificate(service_account) if service_account else credentials.ApplicationDefault()
+    return firestore.AsyncClient(project=configs[database_index]['projectId'], credentials=cred.get_credential())
+
+
+def add_connection_args(parser):
+    """Register the standard --database/--service-account/--emulator options."""
+    group = parser.add_argument_group('connection')
+    group.add_argument('--database', type=int, default=1, help='FIREBASE_CONFIGS index (default: 1)')
+    group.add_argument('--service-account', help='Path to Firebase service account JSON')
+    group.add_argument('--emulator', action='store_true', help='Use the local Firestore emulator')
+    group.add_argument('--emulator-host', default=EMULATOR_HOST, help=f'Emulator host (default: {EMULATOR_HOST})')
+    group = parser.add_argument_group('throttling')
+    group.add_argument('--max-write-rate', type=positive_int,
+                       help=f'Database-wide writes/s to start from (default: {WRITE_RATE}, unlimited on the emulator)')
+    group.add_argument('--no-ramp', action='store_true', help='Hold the write rate instead of ramping it up 50%% every 5 minutes')
+    group.add_argument('--max-concurrency', type=positive_int, default=MAX_CONCURRENCY,
+                       help=f'Most Firestore calls in flight (default: {MAX_CONCURRENCY})')
+    return parser
+
+
+def connect_from_args(args):
+    """Connect using options registered by add_connection_args."""
+    try:
+        db = connect(args.database, args.service_account, args.emulator, args.emulator_host)
+    except Exception as e:
+        print(f"❌ Failed to initialize Firebase: {e}")
+        sys.exit(1)
+    write_rate = args.max_write_rate or (None if args.emulator else WRITE_RATE)
+    configure_throttle(db, write_rate, not args.no_ramp, args.max_concurrency)
+    return db
+
+
+def describe_target(args):
+    """Human-readable name of the database selected on the command line."""
+    if args.emulator:
+        return f"emulator ({args.emulator_host})"
+    label = load_firebase_configs().get(args.database, {}).get('label', '?')
+    return f"database {args.database} ({label})"
+
+
+def positive_int(value):
+    """argparse type for worker counts and sizes."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {value}")
+    return number
+
+
+# -----------------------------------------------------------------------------
+# THROTTLING AND RETRIES
+# https://firebase.google.com/docs/firestore/best-practices#ramping_up_traffic
+# -----------------------------------------------------------------------------
+
+# The "500/50/5" rule: start at 500 writes/s and add 50% every 5 minutes
+WRITE_RATE = 500
+WRITE_RAMP_SECONDS = 300
+WRITE_RATE_CAP = 10000
+# Sustained writes to one document (short bursts are fine)
+DOCUMENT_WRITE_RATE = 1
+DOCUMENT_WRITE_BURST = 5
+MAX_CONCURRENCY = 32
+MAX_RETRIES = 6
+
+# Quota and contention: slow down, then retry
+BACKOFF_ERRORS = (api_exceptions.ResourceExhausted, api_exceptions.Aborted)
+# Transient: retry without slowing down
+RETRY_ERRORS = BACKOFF_ERRORS + (api_exceptions.ServiceUnavailable,)
+
+
+class TokenBucket:
+    """Thread-safe token bucket. acquire() blocks and returns the seconds it waited."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, tokens=1):
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                # Requests larger than the burst go through once the bucket is full
+                needed = min(tokens, self.burst)
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def idle(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens >= self.burst
+
+
+class AdaptiveLimiter:
+    """
+    Caps calls in flight with additive increase / multiplicative decrease:
+    the limit grows by one every `limit` successes and halves on quota or
+    contention errors. Entering returns the seconds spent waiting for a slot.
+    """
+
+    def __init__(self, limit, maximum):
+        self.limit = float(limit)
+        self.maximum = maximum
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        started = time.monotonic()
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+        # Returned rather than stored: the limiter is shared between threads
+        return time.monotonic() - started
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def succeeded(self):
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def backed_off(self):
+        with self._cond:
+            self.limit = max(1.0, self.limit / 2)
+
+
+class Throttle:
+    """
+    Shared limits for one Firestore database: a ramped token bucket for
+    writes across the database, one bucket per recently written document, an
+    adaptive cap on calls in flight, and jittered exponential retries.
+    write_rate=None drops the write buckets (the emulator has no quotas).
+    """
+
+    def __init__(self, write_rate=WRITE_RATE, ramp=True, max_concurrency=MAX_CONCURRENCY, max_retries=MAX_RETRIES):
+        self.base_rate = write_rate
+        self.ramp = ramp
+        self.max_retries = max_retries
+        self.writes = TokenBucket(write_rate, write_rate) if write_rate else None
+        self.limiter = AdaptiveLimiter(min(8, max_concurrency), max_concurrency)
+        self._documents = {}
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.counters = {'calls': 0, 'ops': 0, 'retries': 0, 'backoffs': 0, 'failures': 0, 'throttledSeconds': 0.0}
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self.counters[name] += delta
+
+    def _ramped_rate(self):
+        if not self.base_rate or not self.ramp:
+            return self.base_rate
+        steps = int((time.monotonic() - self._started) // WRITE_RAMP_SECONDS)
+        return min(WRITE_RATE_CAP, self.base_rate * 1.5 ** steps)
+
+    def _document_bucket(self, path):
+        with self._lock:
+            bucket = self._documents.get(path)
+            if bucket is None:
+                if len(self._documents) >= 10000:
+                    # Forget documents that have been quiet long enough to refill
+                    self._documents = {p: b for p, b in self._documents.items() if not b.idle()}
+                bucket = self._documents[path] = TokenBucket(DOCUMENT_WRITE_RATE, DOCUMENT_WRITE_BURST)
+            return bucket
+
+    def call(self, fn, *args, writes=0, documents=(), **kwargs):
+        """
+        Run fn(*args, **kwargs) within the limits. writes is the number of
+        writes it makes and documents the paths it writes, for the buckets.
+        """
+        throttled = 0.0
+        if self.writes and writes:
+            self.writes.rate = self.writes.burst = self._ramped_rate()
+            throttled += self.writes.acquire(writes)
+            for path in set(documents):
+                throttled += self._document_bucket(path).acquire()
+
+        attempt = 0
+        while True:
+            with self.limiter as waited:
+                throttled += waited
+                try:
+                    result = fn(*args, **kwargs)
+                except RETRY_ERRORS as e:
+                    error = e
+                else:
+                    self.limiter.succeeded()
+                    self._count(calls=1, ops=writes, throttledSeconds=throttled)
+                    return result
+            if isinstance(error, BACKOFF_ERRORS):
+                self.limiter.backed_off()
+                self._count(backoffs=1)
+            if attempt >= self.max_retries:
+                self._count(failures=1, throttledSeconds=throttled)
+                raise error
+            # Full jitter: sleep somewhere in [0, 0.25s * 2^attempt], capped at 30s
+            delay = random.uniform(0, min(30.0, 0.25 * 2 ** attempt))
+            time.sleep(delay)
+            throttled += delay
+            attempt += 1
+            self._count(retries=1)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        counters['throttledSeconds'] = round(counters['throttledSeconds'], 2)
+        counters['opsPerSecond'] = round(counters['ops'] / elapsed, 1)
+        counters['writeRate'] = round(self._ramped_rate()) if self.base_rate else None
+        counters['concurrency'] = round(self.limiter.limit, 1)
+        return counters
+
+    def summary(self):
+        s = self.stats()
+        return (f"{s['ops']} write(s) in {s['calls']} call(s) at {s['opsPerSecond']} ops/s, "
+                f"{s['retries']} retr{'y' if s['retries'] == 1 else 'ies'}, {s['backoffs']} backoff(s), "
+                f"{s['throttledSeconds']}s throttled, concurrency {s['concurrency']}")
+
+
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+def throttle_for(db):
+    """The Throttle shared by everything using this client."""
+    with _throttles_lock:
+        if id(db) not in _throttles:
+            _throttles[id(db)] = Throttle()
+        return _throttles[id(db)]
+
+
+def configure_throttle(db, write_rate=WRITE_RATE, ramp=True, max_concurrency=MAX_CONCURRENCY, max_retries=MAX_RETRIES):
+    with _throttles_lock:
+        _throttles[id(db)] = Throttle(write_rate, ramp, max_concurrency, max_retries)
+        return _throttles[id(db)]
+
+
+# -----------------------------------------------------------------------------
+# SCHOOL DOCUMENTS
+# -----------------------------------------------------------------------------
+
+# Sanitizers mirror services/firebaseService.ts so docIds match the web app
+def sanitize_school_name(school_name):
+    return re.sub(r'\s+', '', school_name.strip().replace('_', '-').replace('/', '')).lower()
+
+
+def sanitize_academic_year(year):
+    return re.sub(r'\s+', '', year.strip().replace('_', '-').replace('/', '')).lower()
+
+
+def sanitize_academic_term(term):
+    return re.sub(r'\s+', '-', term.strip())
+
+
+def create_document_id(school_name, academic_year, academic_term):
+    return f"{sanitize_school_name(school_name)}_{sanitize_academic_year(academic_year)}_{sanitize_academic_term(academic_term)}"
+
+
+def parse_doc_id(doc_id):
+    """Split `{school}_{year}_{term}` into its parts (missing parts are None)."""
+    parts = doc_id.split('_')
+    school = parts[0]
+    year = parts[1] if len(parts) > 1 else None
+    term = '_'.join(parts[2:]) if len(parts) > 2 else None
+    return school, year, term
+
+
+def school_base_name(doc_id):
+    """Base school name of a term docId (the part before the first underscore)."""
+    return doc_id.split('_')[0].lower()
+
+
+def iter_schools(db, prefix=None, field_paths=None):
+    """Stream schools/* snapshots, optionally restricted to a docId prefix or field projection."""
+    query = db.collection('schools')
+    if prefix:
+        field = FieldPath.document_id()
+        query = query.where(filter=firestore.FieldFilter(field, '>=', db.collection('schools').document(prefix)))
+        query = query.where(filter=firestore.FieldFilter(field, '<=', db.collection('schools').document(prefix + '\uf8ff')))
+    if field_paths is not None:
+        query = query.select(field_paths)
+    return query.stream()
+
+
+def iter_paged(query, page_size=500):
+    """Stream a query page by page (ordered by document id) so no single response holds everything."""
+    query = query.order_by(FieldPath.document_id())
+    last = None
+    while True:
+        page = query.start_after(last) if last is not None else query
+        snaps = list(page.limit(page_size).stream())
+        yield from snaps
+        if len(snaps) < page_size:
+            return
+        last = snaps[-1]
+
+
+def iter_documents(doc_ref):
+    """Yield (path, snapshot) for every document in every subcollection below doc_ref, depth first."""
+    for collection in doc_ref.collections():
+        for snap in collection.stream():
+            yield snap.reference.path, snap
+            yield from iter_documents(snap.reference)
+
+
+def last_updated_fingerprint(data):
+    """Comparable string form of metadata.lastUpdated, used to detect changed terms."""
+    stamps = ((data or {}).get('metadata') or {}).get('lastUpdated') or {}
+    return '|'.join(f"{key}={_timestamp_text(stamps[key])}" for key in sorted(stamps))
+
+
+def _timestamp_text(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _commit_batch(db, chunk):
+    # A fresh batch per attempt, so a retried commit never reuses a failed one
+    batch = db.batch()
+    for op, ref, data in chunk:
+        if op == 'set':
+            batch.set(ref, data)
+        elif op == 'merge':
+            batch.set(ref, data, merge=True)
+        elif op == 'update':
+            batch.update(ref, data)
+        elif op == 'delete':
+            batch.delete(ref)
+        else:
+            raise ValueError(f"Unknown batch operation: {op}")
+    return batch.commit()
+
+
+def commit_in_batches(db, operations, batch_size=BATCH_SIZE):
+    """
+    Apply (op, ref, data) tuples with chunked WriteBatches, each one throttled
+    and retried through the client's Throttle.
+    op is 'set', 'merge', 'update' or 'delete'. Returns the number of commits.
+    """
+    throttle = throttle_for(db)
+    commits = 0
+    for i in range(0, len(operations), batch_size):
+        chunk = operations[i:i + batch_size]
+        throttle.call(_commit_batch, db, chunk, writes=len(chunk), documents=[ref.path for _, ref, _ in chunk])
+        commits += 1
+    return commits
+
+
+def run_transaction(db, fn, *args, documents=(), **kwargs):
+    """
+    Run fn(transaction, *args) inside a Firestore transaction with the SDK's
+    retry loop, throttled and retried again on quota errors. documents are the
+    paths the transaction writes, for the per-document limits.
+    """
+    def attempt():
+        return firestore.transactional(fn)(db.transaction(), *args, **kwargs)
+    return throttle_for(db).call(attempt, writes=max(1, len(documents)), documents=documents)
+
+
+class Checkpoint:
+    """
+    Thread-safe JSON checkpoint of completed work keys, so long jobs can resume.
+    Each mark() rewrites the file atomically.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = {'done': {}}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    def is_done(self, key):
+        return key in self.state['done']
+
+    def mark(self, key, info=True):
+        with self._lock:
+            self.state['done'][key] = info
+            self._save()
+
+    def replace(self, done):
+        """Swap in a complete set of finished keys with a single write."""
+        with self._lock:
+            self.state = {'done': dict(done)}
+            self._save()
+
+    def clear(self):
+        """Forget all finished keys and remove the file, once a run has completed."""
+        with self._lock:
+            self.state = {'done': {}}
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+def default_checkpoint_path(tool_name, args):
+    """Checkpoint file for a tool run against the database selected on the command line."""
+    target = 'emulator' if args.emulator else f'db{args.database}'
+    return os.path.join(PROJECT_ROOT, '.checkpoints', f'{tool_name}-{target}.json')
+
+
+# -----------------------------------------------------------------------------
+# JSON ENCODING OF FIRESTORE VALUES
+# -----------------------------------------------------------------------------
+
+def encode_value(value):
+    """Convert a Firestore value into plain JSON, tagging types JSON cannot express."""
+    if isinstance(value, dict):
+        return {key: encode_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [encode_value(item) for item in value]
+    if isinstance(value, datetime.datetime):
+        return {'__type__': 'timestamp', 'value': value.astimezone(datetime.timezone.utc).isoformat()}
+    if isinstance(value, bytes):
+        return {'__type__': 'bytes', 'value': base64.b64encode(value).decode('ascii')}
+    if isinstance(value, firestore.GeoPoint):
+        return {'__type__': 'geopoint', 'value': [value.latitude, value.longitude]}
+    if isinstance(value, firestore.DocumentReference):
+        return {'__type__': 'reference', 'value': value.path}
+    if isinstance(value, float) and value != value:
+        return {'__type__': 'nan'}
+    return value
+
+
+def decode_value(value, db=None):
+    """Inverse of encode_value. References need a client to be rebuilt."""
+    if isinstance(value, list):
+        return [decode_value(item, db) for item in value]
+    if isinstance(value, dict):
+        kind = value.get('__type__')
+        if kind is None or len(value) > 2:
+            return {key: decode_value(item, db) for key, item in value.items()}
+        if kind == 'timestamp':
+            return datetime.datetime.fromisoformat(value['value'])
+        if kind == 'bytes':
+            return base64.b64decode(value['value'])
+        if kind == 'geopoint':
+            return firestore.GeoPoint(*value['value'])
+        if kind == 'reference':
+            return db.document(value['value']) if db is not None else value['value']
+        if kind == 'nan':
+            return float('nan')
+        return {key: decode_value(item, db) for key, item in value.items()}
+    return value
+
+
+# -----------------------------------------------------------------------------
+# FIRESTORE STORAGE SIZE
+# https://firebase.google.com/docs/firestore/storage-size
+# -----------------------------------------------------------------------------
+
+MAX_DOCUMENT_BYTES = 1024 * 1024
+
+
+def document_name_size(path):
+    """Size of a document name: each collection/document ID plus a separator byte, plus 16."""
+    return sum(len(segment.encode('utf-8')) + 1 for segment in path.split('/')) + 16
+
+
+def value_size(value):
+    """Firestore-encoded size of a field value."""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, datetime.datetime)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode('utf-8')) + 1
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(field_size(key, item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(value_size(item) for item in value)
+    if isinstance(value, firestore.GeoPoint):
+        return 16
+    if isinstance(value, firestore.DocumentReference):
+        return document_name_size(value.path)
+    return len(str(value).encode('utf-8')) + 1
+
+
+def field_size(name, value):
+    """Size of one field: its name as a string plus its value."""
+    return len(name.encode('utf-8')) + 1 + value_size(value)
+
+
+def document_size(path, data):
+    """Total stored size of a document as counted against the 1 MiB limit."""
+    return document_name_size(path) + value_size(data or {}) + 32
@@ -0,0 +1,928 @@
+#!/usr/bin/env python3
+"""
+In-Memory Firestore Fake
+A thread-safe, in-process stand-in for the part of the firebase_admin
+firestore client that the tools in scripts/ use, so their logic can be tested
+in milliseconds without booting the emulator or sharing its port:
+
+    client.collection / document / collection_group / collections / get_all
+    documents: get (with field paths), set (merge=True or a field list),
+               update (dotted and backtick-quoted paths), create, delete,
+               collections, list_documents
+    queries:   where (FieldFilter, And/Or and the positional form), order_by,
+               limit, offset, start_at/start_after/end_at/end_before, select,
+               stream/get, on_snapshot
+    writes:    batch(), SERVER_TIMESTAMP, DELETE_FIELD, ArrayUnion,
+               ArrayRemove, Increment
+    transactions: client.transaction(), driven by firestore.transactional()
+               like a real one (begin, reads, commit or retry on Aborted)
+
+Every query evaluates Firestore's rules for ordering mixed types, implicit
+document-id ordering and cursors. Listeners are called synchronously after
+each commit, rather than on a background thread.
+
+Data is loaded from the JSONL records written by `snapshot` below (one
+{"path", "data"} object per document, encoded like backup_database.py), from a
+{path: data} JSON object, or from a backup_database.py backup directory. The
+emulator's own --export-on-exit format (LevelDB files of protobufs) is not
+read; take a snapshot of a running emulator instead:
+
+Usage:
+    python scripts/firestore_fake.py snapshot --emulator --out fixtures/emulator.jsonl
+    python scripts/firestore_fake.py snapshot --emulator --prefix seedschool --out fixtures/seed.jsonl
+    python scripts/firestore_fake.py stats fixtures/emulator.jsonl
+
+In a test:
+    from firestore_fake import Client
+    db = Client.from_snapshot('fixtures/emulator.jsonl')
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import datetime
+import enum
+import json
+import os
+import random
+import string
+import threading
+import time
+
+from firestore_admin import (
+    firestore, api_exceptions, add_connection_args, connect_from_args, describe_target,
+    iter_schools, encode_value, decode_value,
+)
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+DOCUMENT_ID = '__name__'
+MAX_ATTEMPTS = 5
+
+
+class ChangeType(enum.Enum):
+    ADDED = 1
+    REMOVED = 2
+    MODIFIED = 3
+
+
+class DocumentChange:
+    def __init__(self, type, document, old_index, new_index):
+        self.type = type
+        self.document = document
+        self.old_index = old_index
+        self.new_index = new_index
+
+
+class WriteResult:
+    def __init__(self, update_time):
+        self.update_time = update_time
+
+
+# -----------------------------------------------------------------------------
+# VALUES AND FIELD PATHS
+# -----------------------------------------------------------------------------
+
+def _copy(value):
+    # References (and their client) must not be deep-copied
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+
+def split_field_path(path):
+    """'a.b.`c-d`' or a FieldPath → ['a', 'b', 'c-d']."""
+    if hasattr(path, 'parts'):
+        return list(path.parts)
+    parts, current, quoted, i = [], '', False, 0
+    while i < len(path):
+        char = path[i]
+        if char == '\\' and quoted and i + 1 < len(path):
+            current += path[i + 1]
+            i += 2
+            continue
+        if char == '`':
+            quoted = not quoted
+        elif char == '.' and not quoted:
+            parts.append(current)
+            current = ''
+        else:
+            current += char
+        i += 1
+    parts.append(current)
+    return parts
+
+
+_MISSING = object()
+
+
+def get_field(data, parts):
+    for part in parts:
+        if not isinstance(data, dict) or part not in data:
+            return _MISSING
+        data = data[part]
+    return data
+
+
+def _type_rank(value):
+    # Firestore's cross-type order: null, booleans, numbers, timestamps, strings,
+    # bytes, references, geopoints, arrays, maps
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime.datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, DocumentReference):
+        return 6
+    if isinstance(value, firestore.GeoPoint):
+        return 7
+    if isinstance(value, list):
+        return 8
+    return 9
+
+
+def sort_key(value):
+    rank = _type_rank(value)
+    if rank == 2:
+        # NaN sorts before every other number
+        return (rank, (0, 0) if value != value else (1, value))
+    if rank == 3:
+        return (rank, value if value.tzinfo else value.replace(tzinfo=datetime.timezone.utc))
+    if rank == 6:
+        return (rank, tuple(value.path.split('/')))
+    if rank == 7:
+        return (rank, (value.latitude, value.longitude))
+    if rank == 8:
+        return (rank, tuple(sort_key(v) for v in value))
+    if rank == 9:
+        return (rank, tuple((k, sort_key(value[k])) for k in sorted(value)))
+    return (rank, value)
+
+
+def _matches(op, actual, expected):
+    if actual is _MISSING:
+        return False
+    if op == '==':
+        return sort_key(actual) == sort_key(expected)
+    if op == '!=':
+        return actual is not None and sort_key(actual) != sort_key(expected)
+    if op in ('<', '<=', '>', '>='):
+        # Range filters only match values of the same type
+        if _type_rank(actual) != _type_rank(expected):
+            return False
+        a, b = sort_key(actual), sort_key(expected)
+        return {'<': a < b, '<=': a <= b, '>': a > b, '>=': a >= b}[op]
+    if op == 'in':
+        return any(sort_key(actual) == sort_key(v) for v in expected)
+    if op == 'not-in':
+        return actual is not None and all(sort_key(actual) != sort_key(v) for v in expected)
+    if op == 'array-contains':
+        return isinstance(actual, list) and any(sort_key(v) == sort_key(expected) for v in actual)
+    if op == 'array-contains-any':
+        return isinstance(actual, list) and any(sort_key(v) == sort_key(e) for v in actual for e in expected)
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+# -----------------------------------------------------------------------------
+# WRITES
+# -----------------------------------------------------------------------------
+
+def _is_map(value):
+    return isinstance(value, dict)
+
+
+def _resolve(value, existing, now):
+    """Apply sentinels and transforms in a written value against the existing one."""
+    if value is firestore.SERVER_TIMESTAMP:
+        return now
+    if isinstance(value, firestore.ArrayUnion):
+        current = list(existing) if isinstance(existing, list) else []
+        for item in value.values:
+            if all(sort_key(item) != sort_key(c) for c in current):
+                current.append(_copy(item))
+        return current
+    if isinstance(value, firestore.ArrayRemove):
+        current = list(existing) if isinstance(existing, list) else []
+        return [c for c in current if all(sort_key(c) != sort_key(item) for item in value.values)]
+    if isinstance(value, firestore.Increment):
+        if isinstance(existing, (int, float)) and not isinstance(existing, bool):
+            return existing + value.value
+        return value.value
+    if _is_map(value):
+        return {k: _resolve(v, existing.get(k) if _is_map(existing) else None, now)
+                for k, v in value.items() if v is not firestore.DELETE_FIELD}
+    if isinstance(value, list):
+        return [_resolve(v, None, now) for v in value]
+    return value
+
+
+def _merge(target, data, now):
+    for key, value in data.items():
+        if value is firestore.DELETE_FIELD:
+            target.pop(key, None)
+        elif _is_map(value):
+            if not _is_map(target.get(key)):
+                target[key] = {}
+            _merge(target[key], value, now)
+        else:
+            target[key] = _resolve(value, target.get(key), now)
+
+
+def _set_path(target, parts, value, now):
+    for part in parts[:-1]:
+        if not _is_map(target.get(part)):
+            target[part] = {}
+        target = target[part]
+    if value is firestore.DELETE_FIELD:
+        target.pop(parts[-1], None)
+    else:
+        target[parts[-1]] = _resolve(value, target.get(parts[-1]), now)
+
+
+def _apply_write(kind, current, data, option, now):
+    """New document data (None when deleted) for one write against the current data."""
+    if kind == 'delete':
+        return None
+    if kind == 'create' and current is not None:
+        raise api_exceptions.AlreadyExists("Document already exists")
+    if kind == 'update' and current is None:
+        raise api_exceptions.NotFound("No document to update")
+    if kind in ('set', 'create') and not option:
+        return _resolve(data, None, now)
+    result = _copy(current) if current is not None else {}
+    if kind == 'set' and option is True:
+        _merge(result, data, now)
+    elif kind == 'set':
+        # merge=[field paths]: only the listed fields are written
+        for path in option:
+            parts = split_field_path(path)
+            value = get_field(data, parts)
+            _set_path(result, parts, firestore.DELETE_FIELD if value is _MISSING else value, now)
+    else:
+        for path, value in data.items():
+            _set_path(result, split_field_path(path), value, now)
+    return result
+
+
+# -----------------------------------------------------------------------------
+# REFERENCES AND SNAPSHOTS
+# -----------------------------------------------------------------------------
+
+class DocumentSnapshot:
+    def __init__(self, reference, data, create_time, update_time, read_time, field_paths=None):
+        self.reference = reference
+        self._data = data
+        self.create_time = create_time
+        self.update_time = update_time
+        self.read_time = read_time
+        if data is not None and field_paths is not None:
+            projected = {}
+            for path in field_paths:
+                parts = split_field_path(path)
+                value = get_field(data, parts)
+                if value is not _MISSING:
+                    target = projected
+                    for part in parts[:-1]:
+                        target = target.setdefault(part, {})
+                    target[parts[-1]] = value
+            self._data = projected
+
+    @property
+    def id(self):
+        return self.reference.id
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return _copy(self._data) if self._data is not None else None
+
+    def get(self, field_path):
+        value = get_field(self._data or {}, split_field_path(field_path))
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return _copy(value)
+
+
+class DocumentReference:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+
+    def __eq__(self, other):
+        return isinstance(other, DocumentReference) and other._client is self._client and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __repr__(self):
+        return f"<DocumentReference {self.path}>"
+
+    @property
+    def id(self):
+        return self.path.rsplit('/', 1)[-1]
+
+    @property
+    def parent(self):
+        return CollectionReference(self._client, self.path.rsplit('/', 1)[0])
+
+    def collection(self, collection_id):
+        return CollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def collections(self):
+        return self._client._child_collections(self.path)
+
+    def get(self, field_paths=None, transaction=None):
+        if transaction is not None:
+            return transaction.get(self, field_paths)
+        return self._client._snapshot(self, field_paths)
+
+    def set(self, document_data, merge=False):
+        return self._client._commit([('set', self, document_data, merge)])[0]
+
+    def create(self, document_data):
+        return self._client._commit([('create', self, document_data, None)])[0]
+
+    def update(self, field_updates):
+        return self._client._commit([('update', self, field_updates, None)])[0]
+
+    def delete(self):
+        return self._client._commit([('delete', self, None, None)])[0]
+
+
+class Query:
+    def __init__(self, client, parent_path=None, collection_id=None, all_descendants=False):
+        self._client = client
+        self._parent_path = parent_path
+        self._collection_id = collection_id
+        self._all_descendants = all_descendants
+        self._filters = []
+        self._orders = []
+        self._limit = None
+        self._offset = 0
+        self._start = None
+        self._end = None
+        self._projection = None
+
+    def _copy_with(self, **changes):
+        query = Query.__new__(Query)
+        query.__dict__.update(self.__dict__)
+        query._filters = list(self._filters)
+        query._orders = list(self._orders)
+        query.__dict__.update(changes)
+        return query
+
+    # -- building ------------------------------------------------------------
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        condition = filter if filter is not None else (field_path, op_string, value)
+        return self._copy_with(_filters=self._filters + [condition])
+
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy_with(_orders=self._orders + [(field_path, direction)])
+
+    def limit(self, count):
+        return self._copy_with(_limit=count)
+
+    def offset(self, num_to_skip):
+        return self._copy_with(_offset=num_to_skip)
+
+    def select(self, field_paths):
+        return self._copy_with(_projection=list(field_paths))
+
+    def start_at(self, document_fields_or_snapshot):
+        return self._copy_with(_start=(document_fields_or_snapshot, True))
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy_with(_start=(document_fields_or_snapshot, False))
+
+    def end_at(self, document_fields_or_snapshot):
+        return self._copy_with(_end=(document_fields_or_snapshot, True))
+
+    def end_before(self, document_fields_or_snapshot):
+        return self._copy_with(_end=(document_fields_or_snapshot, False))
+
+    # -- evaluating ----------------------------------------------------------
+
+    def _value(self, path, reference, data):
+        if path == DOCUMENT_ID:
+            return reference
+        return get_field(data, split_field_path(path))
+
+    def _passes(self, condition, reference, data):
+        if isinstance(condition, tuple):
+            field, op, expected = condition
+        elif hasattr(condition, 'filters'):
+            results = (self._passes(f, reference, data) for f in condition.filters)
+            return any(results) if type(condition).__name__ == 'Or' else all(results)
+        else:
+            field, op, expected = condition.field_path, condition.op_string, condition.value
+        if field == DOCUMENT_ID:
+            expected = self._as_reference(expected)
+        return _matches(op, self._value(field, reference, data), expected)
+
+    def _as_reference(self, value):
+        if isinstance(value, list):
+            return [self._as_reference(v) for v in value]
+        if isinstance(value, str):
+            base = self._parent_path if not self._all_descendants else None
+            return self._client.document(f"{base}/{value}" if base else value)
+        return value
+
+    def _normalized_orders(self):
+        orders = list(self._orders)
+        ordered = {field for field, _ in orders}
+        if not orders:
+            # An inequality filter orders by its field first, as Firestore requires
+            for condition in self._filters:
+                if isinstance(condition, tuple):
+                    field, op = condition[0], condition[1]
+                else:
+                    field, op = getattr(condition, 'field_path', None), getattr(condition, 'op_string', None)
+                if op in ('<', '<=', '>', '>=', '!=', 'not-in') and field not in ordered:
+                    orders.append((field, ASCENDING))
+                    ordered.add(field)
+        if DOCUMENT_ID not in ordered:
+            orders.append((DOCUMENT_ID, orders[-1][1] if orders else ASCENDING))
+        return orders
+
+    def _cursor_values(self, cursor, orders):
+        if isinstance(cursor, DocumentSnapshot):
+            return [cursor.reference if f == DOCUMENT_ID else get_field(cursor._data or {}, split_field_path(f))
+                    for f, _ in orders]
+        if isinstance(cursor, dict):
+            values = []
+            for field, _ in orders:
+                key = field if field in cursor else None
+                if key is None:
+                    break
+                values.append(self._as_reference(cursor[key]) if field == DOCUMENT_ID else cursor[key])
+            return values
+        values = list(cursor)
+        return [self._as_reference(v) if f == DOCUMENT_ID else v for (f, _), v in zip(orders, values)]
+
+    @staticmethod
+    def _compare(row, values, orders):
+        for (field, direction), actual, expected in zip(orders, row, values):
+            a, b = sort_key(actual), sort_key(expected)
+            if a != b:
+                result = -1 if a < b else 1
+                return -result if direction == DESCENDING else result
+        return 0
+
+    def _run(self, read_time):
+        """Matching (reference, data, create_time, update_time) rows in query order."""
+        orders = self._normalized_orders()
+        rows = []
+        for reference, doc in self._client._candidates(self):
+            data = doc['data']
+            if not all(self._passes(c, reference, data) for c in self._filters):
+                continue
+            values = [self._value(field, reference, data) for field, _ in orders]
+            # Ordering by a field drops documents that do not have it
+            if any(v is _MISSING for v in values):
+                continue
+            rows.append((values, reference, doc))
+
+        for index in range(len(orders) - 1, -1, -1):
+            field, direction = orders[index]
+            rows.sort(key=lambda row: sort_key(row[0][index]), reverse=direction == DESCENDING)
+
+        if self._start is not None:
+            values = self._cursor_values(self._start[0], orders)
+            inclusive = self._start[1]
+            rows = [r for r in rows if (self._compare(r[0], values, orders) >= 0 if inclusive
+                                        else self._compare(r[0], values, orders) > 0)]
+        if self._end is not None:
+            values = self._cursor_values(self._end[0], orders)
+            inclusive = self._end[1]
+            rows = [r for r in rows if (self._compare(r[0], values, orders) <= 0 if inclusive
+                                        else self._compare(r[0], values, orders) < 0)]
+        rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return [DocumentSnapshot(reference, doc['data'], doc['create_time'], doc['update_time'], read_time,
+                                 self._projection) for _, reference, doc in rows]
+
+    def stream(self, transaction=None):
+        if transaction is not None:
+            yield from transaction.get(self)
+            return
+        with self._client._lock:
+            snapshots = self._run(self._client._now())
+        yield from snapshots
+
+    def get(self, transaction=None):
+        return list(self.stream(transaction=transaction))
+
+    def on_snapshot(self, callback):
+        return self._client._listen(self, callback)
+
+
+class CollectionReference(Query):
+    def __init__(self, client, path):
+        parent_path, _, collection_id = path.rpartition('/')
+        super().__init__(client, parent_path or None, collection_id)
+        self.path = path
+
+    def __repr__(self):
+        return f"<CollectionReference {self.path}>"
+
+    @property
+    def id(self):
+        return self._collection_id
+
+    @property
+    def parent(self):
+        return DocumentReference(self._client, self._parent_path) if self._parent_path else None
+
+    def document(self, document_id=None):
+        if document_id is None:
+            document_id = ''.join(random.choices(string.ascii_letters + string.digits, k=20))
+        return DocumentReference(self._client, f"{self.path}/{document_id}")
+
+    def add(self, document_data, document_id=None):
+        reference = self.document(document_id)
+        result = reference.create(document_data)
+        return result.update_time, reference
+
+    def list_documents(self):
+        """Existing documents plus missing ones that still have subcollections, like the SDK."""
+        with self._client._lock:
+            ids = set(self._client._collections.get(self.path, {}))
+            prefix = self.path + '/'
+            for path in self._client._collections:
+                if path.startswith(prefix):
+                    ids.add(path[len(prefix):].split('/', 1)[0])
+        return [self.document(doc_id) for doc_id in sorted(ids)]
+
+
+# -----------------------------------------------------------------------------
+# BATCHES AND TRANSACTIONS
+# -----------------------------------------------------------------------------
+
+class WriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(('set', reference, document_data, merge))
+
+    def create(self, reference, document_data):
+        self._writes.append(('create', reference, document_data, None))
+
+    def update(self, reference, field_updates):
+        self._writes.append(('update', reference, field_updates, None))
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference, None, None))
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes)
+
+    def __len__(self):
+        return len(self._writes)
+
+
+class Transaction(WriteBatch):
+    """
+    Reads record what they saw; the commit fails with Aborted if any of it changed.
+    Implements the private begin/commit/rollback calls firestore.transactional()
+    makes on the SDK's Transaction.
+    """
+
+    def __init__(self, client, max_attempts=MAX_ATTEMPTS, read_only=False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._read_versions = {}
+
+    @property
+    def in_progress(self):
+        return self._id is not None
+
+    def get(self, ref_or_query, field_paths=None):
+        if self._writes:
+            raise ValueError("Transactions must perform all reads before all writes")
+        with self._client._lock:
+            if isinstance(ref_or_query, DocumentReference):
+                snapshot = self._client._snapshot(ref_or_query, field_paths)
+                self._read_versions[ref_or_query.path] = snapshot.update_time
+                return snapshot
+            snapshots = ref_or_query._run(self._client._now())
+            for snapshot in snapshots:
+                self._read_versions[snapshot.reference.path] = snapshot.update_time
+            return iter(snapshots)
+
+    def get_all(self, references, field_paths=None):
+        return [self.get(reference, field_paths) for reference in references]
+
+    def _clean_up(self):
+        self._writes, self._read_versions, self._id = [], {}, None
+
+    def _begin(self, retry_id=None):
+        if self.in_progress:
+            raise ValueError(f"The transaction has already begun. Current transaction ID: {self._id!r}.")
+        self._id = os.urandom(8)
+
+    def _rollback(self):
+        if not self.in_progress:
+            raise ValueError("The transaction has not begun, so it cannot be rolled back.")
+        self._clean_up()
+
+    def _commit(self):
+        if not self.in_progress:
+            raise ValueError("The transaction has not begun, so it cannot be committed.")
+        if self._read_only and self._writes:
+            raise ValueError("Cannot perform write operation in read-only transaction.")
+        results = self._client._commit(self._writes, self._read_versions)
+        self._clean_up()
+        return results
+
+
+# -----------------------------------------------------------------------------
+# CLIENT
+# -----------------------------------------------------------------------------
+
+class Client:
+    def __init__(self, project='fake-project'):
+        self.project = project
+        self._collections = {}   # collection path -> {doc id: {data, create_time, update_time}}
+        self._lock = threading.RLock()
+        self._clock = datetime.datetime.fromtimestamp(0, datetime.timezone.utc)
+        self._listeners = []
+        self.commits = 0
+
+    def _now(self):
+        # Strictly increasing, so every commit gets its own update time
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self._clock = max(now, self._clock + datetime.timedelta(microseconds=1))
+        return self._clock
+
+    # -- references ----------------------------------------------------------
+
+    def collection(self, *path):
+        return CollectionReference(self, '/'.join(path))
+
+    def document(self, *path):
+        return DocumentReference(self, '/'.join(path))
+
+    def collection_group(self, collection_id):
+        return Query(self, collection_id=collection_id, all_descendants=True)
+
+    def collections(self):
+        return self._child_collections(None)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def transaction(self, max_attempts=MAX_ATTEMPTS, read_only=False):
+        return Transaction(self, max_attempts, read_only)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        for reference in references:
+            yield reference.get(field_paths, transaction=transaction)
+
+    # -- storage -------------------------------------------------------------
+
+    def _child_collections(self, parent_path):
+        with self._lock:
+            ids = set()
+            for path, docs in self._collections.items():
+                parent, _, collection_id = path.rpartition('/')
+                if (parent or None) == parent_path and docs:
+                    ids.add(collection_id)
+            return [CollectionReference(self, f"{parent_path}/{i}" if parent_path else i) for i in sorted(ids)]
+
+    def _candidates(self, query):
+        if query._all_descendants:
+            for path, docs in self._collections.items():
+                if path.rpartition('/')[2] == query._collection_id:
+                    for doc_id, doc in docs.items():
+                        yield DocumentReference(self, f"{path}/{doc_id}"), doc
+            return
+        path = f"{query._parent_path}/{query._collection_id}" if query._parent_path else query._collection_id
+        for doc_id, doc in self._collections.get(path, {}).items():
+            yield DocumentReference(self, f"{path}/{doc_id}"), doc
+
+    def _stored(self, path):
+        collection, _, doc_id = path.rpartition('/')
+        return self._collections.get(collection, {}).get(doc_id)
+
+    def _snapshot(self, reference, field_paths=None):
+        with self._lock:
+            doc = self._stored(reference.path)
+            read_time = self._now()
+            if doc is None:
+                return DocumentSnapshot(reference, None, None, None, read_time)
+            return DocumentSnapshot(reference, doc['data'], doc['create_time'], doc['update_time'], read_time,
+                                    field_paths)
+
+    def _commit(self, writes, read_versions=None):
+        """Apply writes atomically. Returns a WriteResult per write."""
+        with self._lock:
+            for path, seen in (read_versions or {}).items():
+                doc = self._stored(path)
+                if (doc['update_time'] if doc else None) != seen:
+                    raise api_exceptions.Aborted(f"Transaction lost a race on {path}")
+            now = self._now()
+            staged = {}
+            for kind, reference, data, option in writes:
+                if reference.path in staged:
+                    current = staged[reference.path]
+                else:
+                    stored = self._stored(reference.path)
+                    current = stored['data'] if stored else None
+                staged[reference.path] = _apply_write(kind, current, data, option, now)
+            for path, data in staged.items():
+                collection, _, doc_id = path.rpartition('/')
+                docs = self._collections.setdefault(collection, {})
+                if data is None:
+                    docs.pop(doc_id, None)
+                else:
+                    previous = docs.get(doc_id)
+                    docs[doc_id] = {'data': data, 'update_time': now,
+                                    'create_time': previous['create_time'] if previous else now}
+            self.commits += 1
+            notifications = self._pending_notifications(now)
+        for callback, args in notifications:
+            callback(*args)
+        return [WriteResult(now) for _ in writes]
+
+    # -- listeners -----------------------------------------------------------
+
+    def _listen(self, query, callback):
+        listener = {'query': query, 'callback': callback, 'seen': {}}
+        with self._lock:
+            now = self._now()
+            snapshots = query._run(now)
+            listener['seen'] = {s.reference.path: (i, s.update_time) for i, s in enumerate(snapshots)}
+            self._listeners.append(listener)
+        changes = [DocumentChange(ChangeType.ADDED, s, -1, i) for i, s in enumerate(snapshots)]
+        callback(snapshots, changes, now)
+        return _Watch(self, listener)
+
+    def _pending_notifications(self, now):
+        notifications = []
+        for listener in self._listeners:
+            snapshots = listener['query']._run(now)
+            seen = listener['seen']
+            current = {s.reference.path: (i, s.update_time) for i, s in enumerate(snapshots)}
+            changes = []
+            for path, (old_index, _) in seen.items():
+                if path not in current:
+                    changes.append(DocumentChange(ChangeType.REMOVED, DocumentSnapshot(
+                        self.document(path), None, None, None, now), old_index, -1))
+            for i, snapshot in enumerate(snapshots):
+                previous = seen.get(snapshot.reference.path)
+                if previous is None:
+                    changes.append(DocumentChange(ChangeType.ADDED, snapshot, -1, i))
+                elif previous[1] != snapshot.update_time:
+                    changes.append(DocumentChange(ChangeType.MODIFIED, snapshot, previous[0], i))
+            listener['seen'] = current
+            if changes:
+                notifications.append((listener['callback'], (snapshots, changes, now)))
+        return notifications
+
+    # -- loading and saving ---------------------------------------------------
+
+    def load(self, records):
+        """Store {'path', 'data'} records (data encoded with encode_value). Returns the count."""
+        count = 0
+        with self._lock:
+            now = self._now()
+            for record in records:
+                collection, _, doc_id = record['path'].rpartition('/')
+                self._collections.setdefault(collection, {})[doc_id] = {
+                    'data': decode_value(record['data'], self), 'create_time': now, 'update_time': now,
+                }
+                count += 1
+        return count
+
+    def records(self):
+        """Every document as an encoded {'path', 'data'} record, in path order."""
+        with self._lock:
+            for collection in sorted(self._collections):
+                for doc_id in sorted(self._collections[collection]):
+                    yield {'path': f"{collection}/{doc_id}",
+                           'data': encode_value(self._collections[collection][doc_id]['data'])}
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in self.records():
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    @classmethod
+    def from_snapshot(cls, path, project='fake-project'):
+        client = cls(project)
+        client.load(read_snapshot(path))
+        return client
+
+
+class _Watch:
+    def __init__(self, client, listener):
+        self._client = client
+        self._listener = listener
+
+    def unsubscribe(self):
+        with self._client._lock:
+            if self._listener in self._client._listeners:
+                self._client._listeners.remove(self._listener)
+
+
+def read_snapshot(path):
+    """Yield records from a snapshot JSONL file, a {path: data} JSON file or a backup directory."""
+    if os.path.isdir(path):
+        # Imported here: backup_database needs zstandard
+        from backup_database import resolve_chain, plan_sources, iter_backup_records
+        chain = resolve_chain(path)
+        yield from iter_backup_records(chain, plan_sources(chain))
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        content = json.load(f)
+    if isinstance(content, dict):
+        yield from ({'path': p, 'data': data} for p, data in content.items())
+    else:
+        yield from content
+
+
+# -----------------------------------------------------------------------------
+# COMMAND LINE
+# -----------------------------------------------------------------------------
+
+def iter_tree(collections):
+    """Every existing document below the given collections, depth first."""
+    for collection in collections:
+        for snap in collection.stream():
+            yield snap
+            yield from iter_tree(snap.reference.collections())
+
+
+def run_snapshot(args):
+    db = connect_from_args(args)
+    print(f"📸 Snapshotting {describe_target(args)} → {args.out}")
+    started = time.time()
+    count = 0
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    if args.prefix:
+        docs = (doc for school in iter_schools(db, prefix=args.prefix)
+                for doc in [school, *iter_tree(school.reference.collections())])
+    else:
+        docs = iter_tree(db.collections())
+    with open(args.out, 'w', encoding='utf-8') as f:
+        for snap in docs:
+            f.write(json.dumps({'path': snap.reference.path, 'data': encode_value(snap.to_dict())},
+                               ensure_ascii=False) + '\n')
+            count += 1
+    print(f"✅ {count} document(s) in {time.time() - started:.1f}s ({os.path.getsize(args.out) / 1024:.0f} KB)")
+
+
+def run_stats(args):
+    started = time.time()
+    client = Client.from_snapshot(args.snapshot)
+    elapsed = time.time() - started
+    counts = {}
+    for path, docs in client._collections.items():
+        group = path.rpartition('/')[2]
+        counts[group] = counts.get(group, 0) + len(docs)
+    print(f"📦 {args.snapshot}: {sum(counts.values())} document(s) loaded in {elapsed * 1000:.0f} ms")
+    for group, count in sorted(counts.items()):
+        print(f"   {group:<24} {count:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory Firestore fake: snapshot fixtures and inspect them")
+    sub = parser.add_subparsers(dest='command', required=True)
+    snapshot = add_connection_args(sub.add_parser('snapshot', help='Write every document of a database to JSONL'))
+    snapshot.add_argument('--out', required=True, help='Output .jsonl file')
+    snapshot.add_argument('--prefix', help='Only schools whose docId starts with this prefix (and nothing else)')
+    stats = sub.add_parser('stats', help='Load a snapshot into the fake and count its documents')
+    stats.add_argument('snapshot', help='Snapshot .jsonl/.json file or backup directory')
+    args = parser.parse_args()
+
+    if args.command == 'snapshot':
+        run_snapshot(args)
+    else:
+        run_stats(args)
+
+
+if __name__ == "__main__":
+    main()
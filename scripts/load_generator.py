@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Headless Load Generator
+Replays the web app's Firestore access patterns for thousands of asyncio virtual
+users against the emulator (or a test database) and records an HDR-style
+latency histogram per operation, contention/abort counts and a JSON report that
+can be compared between runs.
+
+Each virtual user logs in (main document read + the loadMetadata trio) and then
+loops over weighted actions with random think time:
+
+    main_read       getSchoolData                     schools/{docId}
+    load_metadata   loadMetadata                      classes + subjects + assessments
+    load_students   loadStudents                      students
+    bucket_save     fetchScoresForClass + saveDataTransaction (bucket merge + metadata update)
+    heartbeat       updateHeartbeat                   activeSessions.{userId}
+    log_activity    logUserActivity                   read + rewrite userLogs
+
+Usage:
+    python scripts/seed_emulator.py --emulator --schools 10
+    python scripts/load_generator.py --emulator --users 2000 --duration 120 --json run-a.json
+    python scripts/load_generator.py --emulator --users 2000 --duration 120 --compare run-a.json
+    python scripts/load_generator.py --emulator --profile profile.json --transactional
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import sys
+import time
+
+from firestore_admin import (
+    firestore, FieldPath, add_connection_args, connect_async, describe_target, positive_int,
+)
+from perf_stats import LatencyHistogram, format_summary_row, summary_header, percent_change
+
+# Relative frequency of each action; roughly a teacher entering marks
+DEFAULT_WEIGHTS = {
+    'main_read': 5,
+    'load_metadata': 5,
+    'load_students': 10,
+    'bucket_save': 30,
+    'heartbeat': 40,
+    'log_activity': 10,
+}
+DEFAULT_USERS = 500
+DEFAULT_THINK_TIME = 2.0
+
+
+class Stats:
+    def __init__(self):
+        self.histograms = {}
+        self.errors = {}
+        self.retries = 0
+
+    def record(self, op, ms):
+        self.histograms.setdefault(op, LatencyHistogram()).record(ms)
+
+    def error(self, op, exc):
+        key = f"{op}:{type(exc).__name__}"
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+class VirtualUser:
+    def __init__(self, db, stats, school, user_id, rng, weights, think_time, transactional):
+        self.db = db
+        self.stats = stats
+        self.school = school
+        self.user_id = user_id
+        self.rng = rng
+        self.weights = weights
+        self.think_time = think_time
+        self.transactional = transactional
+        self.ref = db.collection('schools').document(school['docId'])
+
+    async def timed(self, op, coro_fn):
+        started = time.perf_counter()
+        try:
+            await coro_fn()
+        except Exception as e:
+            self.stats.error(op, e)
+            return
+        self.stats.record(op, (time.perf_counter() - started) * 1000)
+
+    async def main_read(self):
+        await self.ref.get()
+
+    async def load_metadata(self):
+        await asyncio.gather(*(self.ref.collection(name).get() for name in ('classes', 'subjects', 'assessments')))
+
+    async def load_students(self):
+        await self.ref.collection('students').get()
+
+    async def bucket_save(self):
+        subject_id = self.rng.choice(self.school['subjectIds'])
+        bucket_ref = self.ref.collection('score_buckets').document(f"subject_{subject_id}")
+
+        if self.transactional:
+            attempts = 0
+
+            @firestore.async_transactional
+            async def save(transaction):
+                nonlocal attempts
+                attempts += 1
+                snap = await bucket_ref.get(transaction=transaction)
+                edits = self.edit_scores((snap.to_dict() or {}).get('scoresMap') or {})
+                transaction.set(bucket_ref, {'scoresMap': edits}, merge=True)
+                transaction.update(self.ref, {'metadata.lastUpdated.scores': firestore.SERVER_TIMESTAMP})
+
+            try:
+                await save(self.db.transaction())
+            finally:
+                self.stats.retries += max(0, attempts - 1)
+            return
+
+        # saveDataTransaction: read the bucket for display, then a blind batch merge
+        snap = await bucket_ref.get()
+        edits = self.edit_scores((snap.to_dict() or {}).get('scoresMap') or {})
+        batch = self.db.batch()
+        batch.set(bucket_ref, {'scoresMap': edits}, merge=True)
+        batch.update(self.ref, {'metadata.lastUpdated.scores': firestore.SERVER_TIMESTAMP})
+        await batch.commit()
+
+    def edit_scores(self, scores_map):
+        """Change one assessment mark for a handful of students, as a teacher's save would."""
+        edits = {}
+        for score_id in self.rng.sample(sorted(scores_map), min(5, len(scores_map))):
+            score = dict(scores_map[score_id])
+            marks = dict(score.get('assessmentScores') or {})
+            marks[str(self.rng.randint(1, 4))] = [f"{self.rng.randint(0, 20)}/20"]
+            score['assessmentScores'] = marks
+            edits[score_id] = score
+        return edits
+
+    async def heartbeat(self):
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        await self.ref.update({f"activeSessions.{self.user_id}": now})
+
+    async def log_activity(self):
+        snap = await self.ref.get(['userLogs'])
+        logs = (snap.to_dict() or {}).get('userLogs') or []
+        logs.append({
+            'id': f"{int(time.time() * 1000)}-{self.rng.randint(0, 99999)}",
+            'userId': self.user_id, 'userName': f"VU {self.user_id}", 'role': 'Teacher',
+            'action': 'Page Visit', 'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'pageName': self.rng.choice(['Score Entry', 'Students', 'Dashboard']),
+        })
+        await self.ref.update({'userLogs': logs[-20:]})
+
+    async def run(self, deadline):
+        await self.timed('main_read', self.main_read)
+        await self.timed('load_metadata', self.load_metadata)
+        ops, weights = zip(*self.weights.items())
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+            if time.monotonic() >= deadline:
+                break
+            op = self.rng.choices(ops, weights)[0]
+            await self.timed(op, getattr(self, op))
+
+
+async def discover_schools(db, prefix, limit):
+    query = db.collection('schools')
+    if prefix:
+        # Same range as firestore_admin.iter_schools, which only takes a sync client
+        field = FieldPath.document_id()
+        query = query.where(filter=firestore.FieldFilter(field, '>=', db.collection('schools').document(prefix)))
+        query = query.where(filter=firestore.FieldFilter(field, '<=', db.collection('schools').document(prefix + '\uf8ff')))
+    schools = []
+    async for snap in query.select([]).limit(limit).stream():
+        subject_ids = [int(s.id.split('_')[-1]) async for s in snap.reference.collection('score_buckets').select([]).stream()
+                       if s.id.split('_')[-1].isdigit()]
+        if subject_ids:
+            schools.append({'docId': snap.id, 'subjectIds': subject_ids})
+    return schools
+
+
+async def run_load(args, profile):
+    db = connect_async(args.database, args.service_account, args.emulator, args.emulator_host)
+    schools = await discover_schools(db, args.prefix, args.schools)
+    if not schools:
+        print("❌ No schools with score buckets found (seed the emulator first)")
+        sys.exit(1)
+
+    # Defaults, then the profile, then flags given on the command line
+    users = args.users if args.users is not None else profile.get('users', DEFAULT_USERS)
+    weights = {op: w for op, w in profile.get('weights', DEFAULT_WEIGHTS).items() if op in DEFAULT_WEIGHTS and w > 0}
+    think_time = args.think_time if args.think_time is not None else profile.get('thinkTimeSeconds', DEFAULT_THINK_TIME)
+    print(f"🚀 {users} virtual users on {len(schools)} schools in {describe_target(args)} "
+          f"for {args.duration}s (think {think_time}s{', transactional' if args.transactional else ''})")
+
+    stats = Stats()
+    rng = random.Random(args.seed)
+    started = time.monotonic()
+    deadline = started + args.duration
+    tasks = []
+    for index in range(users):
+        school = schools[index % len(schools)]
+        user = VirtualUser(db, stats, school, 1000 + index, random.Random(rng.random()), weights, think_time, args.transactional)
+        tasks.append(asyncio.create_task(user.run(deadline)))
+        if args.ramp_up and index % 50 == 49:
+            await asyncio.sleep(args.ramp_up * 50 / users)
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - started
+
+    total_ops = sum(h.count for h in stats.histograms.values())
+    return {
+        'target': describe_target(args),
+        'startedAt': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'config': {'users': users, 'schools': len(schools), 'duration': args.duration, 'thinkTimeSeconds': think_time,
+                   'weights': weights, 'transactional': args.transactional, 'seed': args.seed},
+        'seconds': round(elapsed, 2),
+        'opsPerSecond': round(total_ops / elapsed, 1),
+        'operations': {op: h.to_dict() for op, h in sorted(stats.histograms.items())},
+        'errors': stats.errors,
+        'transactionRetries': stats.retries,
+    }
+
+
+def print_report(report, baseline=None):
+    print("\n" + summary_header())
+    print("-" * 80)
+    for op, data in report['operations'].items():
+        print(format_summary_row(op, data['summary']))
+        if baseline and op in baseline['operations']:
+            before = baseline['operations'][op]['summary']
+            deltas = []
+            for key in ('p50', 'p99'):
+                change = percent_change(before[key], data['summary'][key])
+                if change is not None:
+                    deltas.append(f"{key} {change:+.0f}%")
+            print(f"{'':<24}   vs baseline: {', '.join(deltas)}")
+
+    print(f"\nThroughput: {report['opsPerSecond']} ops/s over {report['seconds']}s")
+    if baseline:
+        change = percent_change(baseline['opsPerSecond'], report['opsPerSecond'])
+        if change is not None:
+            print(f"   vs baseline: {change:+.1f}%")
+    print(f"Transaction retries: {report['transactionRetries']}")
+    if report['errors']:
+        print("Errors / aborts:")
+        for key, count in sorted(report['errors'].items(), key=lambda item: -item[1]):
+            print(f"   {key}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="asyncio load generator replaying the app's Firestore access patterns")
+    add_connection_args(parser)
+    parser.add_argument('--users', type=positive_int, help=f'Virtual users (default: profile or {DEFAULT_USERS})')
+    parser.add_argument('--duration', type=positive_int, default=60, help='Seconds to run (default: 60)')
+    parser.add_argument('--think-time', type=float,
+                        help=f'Mean seconds between actions (default: profile or {DEFAULT_THINK_TIME:g})')
+    parser.add_argument('--ramp-up', type=float, default=10.0, help='Seconds to start all users (default: 10)')
+    parser.add_argument('--schools', type=positive_int, default=50, help='Max schools to spread users over (default: 50)')
+    parser.add_argument('--prefix', help='Only use docIds starting with this prefix')
+    parser.add_argument('--profile', help='JSON user profile (users, thinkTimeSeconds, weights) overriding the defaults; '
+                        '--users and --think-time still take precedence')
+    parser.add_argument('--transactional', action='store_true', help='Save buckets in read-modify-write transactions')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    parser.add_argument('--json', help='Write the report to this file')
+    parser.add_argument('--compare', help='Earlier JSON report to compare against')
+    args = parser.parse_args()
+
+    profile = {}
+    if args.profile:
+        with open(args.profile, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+
+    report = asyncio.run(run_load(args, profile))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
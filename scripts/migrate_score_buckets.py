@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Legacy Scores → score_buckets Migration
+Finds school terms that still keep one document per score in the legacy
+schools/{docId}/scores subcollection and groups them into the subject buckets
+(schools/{docId}/score_buckets/subject_{subjectId}, field scoresMap) that
+fetchScoresForClass reads first.
+
+Entries already present in a bucket are never overwritten (they are newer than
+the legacy copy). Each finished school is checkpointed, and a verify pass
+compares per-subject counts and checksums between the legacy documents and the
+buckets. Legacy documents are only deleted with --delete-legacy after they verify.
+
+Usage:
+    python scripts/migrate_score_buckets.py --emulator --dry-run
+    python scripts/migrate_score_buckets.py --database 1 --workers 8
+    python scripts/migrate_score_buckets.py --database 1 --verify-only
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from firestore_admin import (
+    firestore, add_connection_args, connect_from_args, describe_target, positive_int,
+    iter_schools, commit_in_batches, Checkpoint, default_checkpoint_path,
+)
+
+
+def bucket_id(subject_id):
+    # Same naming as saveDataTransaction / fetchScoresForClass
+    return f"subject_{subject_id}"
+
+
+def has_legacy_scores(school_ref):
+    return any(True for _ in school_ref.collection('scores').limit(1).select([]).stream())
+
+
+def load_legacy(school_ref):
+    """Group legacy score documents into {subjectId: {scoreId: score}}."""
+    grouped = {}
+    for snap in school_ref.collection('scores').stream():
+        score = snap.to_dict() or {}
+        subject_id = score.get('subjectId')
+        if subject_id is None:
+            continue
+        score_id = str(score.get('id') or snap.id)
+        grouped.setdefault(subject_id, {})[score_id] = score
+    return grouped
+
+
+def load_buckets(school_ref):
+    buckets = {}
+    for snap in school_ref.collection('score_buckets').stream():
+        buckets[snap.id] = (snap.to_dict() or {}).get('scoresMap') or {}
+    return buckets
+
+
+def checksum(scores_map):
+    canonical = json.dumps(scores_map, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def verify_school(school_ref, legacy=None, buckets=None):
+    """Return a list of problems (empty when every legacy score is present and identical in its bucket)."""
+    legacy = load_legacy(school_ref) if legacy is None else legacy
+    buckets = load_buckets(school_ref) if buckets is None else buckets
+    problems = []
+    for subject_id, scores in legacy.items():
+        bucket = buckets.get(bucket_id(subject_id), {})
+        present = {score_id: bucket[score_id] for score_id in scores if score_id in bucket}
+        if len(present) != len(scores):
+            problems.append(f"subject {subject_id}: {len(scores) - len(present)} of {len(scores)} scores missing from bucket")
+        elif checksum(present) != checksum(scores):
+            # Differences are expected where the app has since edited the bucketed copy.
+            changed = sum(1 for score_id in scores if present[score_id] != scores[score_id])
+            problems.append(f"subject {subject_id}: {changed} scores differ from legacy (checksum mismatch)")
+    return problems
+
+
+def migrate_school(db, doc_id, dry_run, delete_legacy):
+    school_ref = db.collection('schools').document(doc_id)
+    started = time.time()
+    legacy = load_legacy(school_ref)
+    buckets = load_buckets(school_ref)
+
+    operations = []
+    added = 0
+    for subject_id, scores in legacy.items():
+        existing = buckets.get(bucket_id(subject_id), {})
+        missing = {score_id: score for score_id, score in scores.items() if score_id not in existing}
+        if missing:
+            added += len(missing)
+            ref = school_ref.collection('score_buckets').document(bucket_id(subject_id))
+            operations.append(('merge', ref, {'scoresMap': missing}))
+            buckets.setdefault(bucket_id(subject_id), {}).update(missing)
+
+    result = {
+        'legacyScores': sum(len(scores) for scores in legacy.values()),
+        'subjects': len(legacy),
+        'added': added,
+    }
+    if dry_run:
+        result['seconds'] = round(time.time() - started, 2)
+        return result
+
+    if operations:
+        operations.append(('update', school_ref, {'metadata.lastUpdated.scores': firestore.SERVER_TIMESTAMP}))
+        commit_in_batches(db, operations)
+
+    problems = verify_school(school_ref)
+    result['problems'] = problems
+    missing_problems = [p for p in problems if 'missing' in p]
+    if delete_legacy and not missing_problems:
+        deletes = [('delete', snap.reference, None) for snap in school_ref.collection('scores').select([]).stream()]
+        commit_in_batches(db, deletes)
+        result['deleted'] = len(deletes)
+    result['seconds'] = round(time.time() - started, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move legacy per-document scores into subject buckets")
+    add_connection_args(parser)
+    parser.add_argument('--prefix', help='Only process docIds starting with this prefix')
+    parser.add_argument('--workers', type=positive_int, default=8, help='Schools migrated at once (default: 8)')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: .checkpoints/migrate_score_buckets-<db>.json)')
+    parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be migrated')
+    parser.add_argument('--verify-only', action='store_true', help='Only compare legacy scores with buckets')
+    parser.add_argument('--delete-legacy', action='store_true', help='Delete legacy documents once verified')
+    args = parser.parse_args()
+
+    db = connect_from_args(args)
+    read_only = args.dry_run or args.verify_only
+    checkpoint = Checkpoint(None if read_only else (args.checkpoint or default_checkpoint_path('migrate_score_buckets', args)))
+    if args.restart:
+        checkpoint.state = {'done': {}}
+
+    print(f"🔍 Looking for legacy scores in {describe_target(args)}...")
+    candidates = []
+    for snap in iter_schools(db, prefix=args.prefix, field_paths=[]):
+        if checkpoint.is_done(snap.id):
+            continue
+        if has_legacy_scores(snap.reference):
+            candidates.append(snap.id)
+    print(f"   {len(candidates)} school term(s) still on the legacy layout")
+
+    started = time.time()
+    failures = 0
+    totals = {'legacyScores': 0, 'added': 0}
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        if args.verify_only:
+            futures = {pool.submit(verify_school, db.collection('schools').document(d)): d for d in candidates}
+        else:
+            futures = {pool.submit(migrate_school, db, d, args.dry_run, args.delete_legacy): d for d in candidates}
+        for future in as_completed(futures):
+            doc_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"   ❌ {doc_id}: {e}")
+                continue
+
+            if args.verify_only:
+                status = '✅ verified' if not result else '⚠️  ' + '; '.join(result)
+                print(f"   {doc_id}: {status}")
+                failures += 1 if result else 0
+                continue
+
+            totals['legacyScores'] += result['legacyScores']
+            totals['added'] += result['added']
+            line = (f"   🍱 {doc_id}: {result['legacyScores']} scores / {result['subjects']} subjects, "
+                    f"{result['added']} added in {result['seconds']}s")
+            if result.get('deleted'):
+                line += f", {result['deleted']} legacy docs deleted"
+            print(line)
+            for problem in result.get('problems', []):
+                print(f"      ⚠️  {problem}")
+            if not args.dry_run:
+                checkpoint.mark(doc_id, result)
+
+    elapsed = time.time() - started
+    if not args.verify_only:
+        verb = 'Would add' if args.dry_run else 'Added'
+        print(f"\n✅ {verb} {totals['added']} of {totals['legacyScores']} legacy scores to buckets in {elapsed:.1f}s")
+    if failures:
+        print(f"⚠️  {failures} school(s) need attention")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+SQLite Mirror
+Keeps a local, normalized SQLite copy of school data so reports and ad-hoc
+queries across schools run locally instead of re-reading Firestore:
+
+    schools         one row per term document (settings without images)
+    users           the term's users (never password hashes)
+    report_data     reportData entries
+    students        schools/{docId}/students (without pictures)
+    scores          one row per student, subject and assessment from score_buckets
+    subscriptions   subscriptions/{schoolId}
+
+`sync` first backfills each collection page by page. The cursor is saved in
+the same SQLite transaction as each page, so an interrupted backfill resumes
+where it stopped. It then attaches on_snapshot listeners (collection groups for
+students and score_buckets) and applies every change as it arrives. A
+listener's first snapshot returns every document again (Firestore bills those
+reads on every start); documents whose update time is already mirrored are
+skipped without touching SQLite. Mirrored documents missing from that first
+snapshot were deleted while sync was not running and are removed.
+
+Lag is measured per change from the document's update time to the moment it
+is committed locally, and reported every --stats-interval seconds together
+with the queue depth.
+
+Usage:
+    python scripts/mirror_to_sqlite.py sync --emulator
+    python scripts/mirror_to_sqlite.py sync --database 1 --backfill-only
+    python scripts/mirror_to_sqlite.py sync --emulator --collections students score_buckets --stats-interval 10
+    python scripts/mirror_to_sqlite.py query --emulator "SELECT class, COUNT(*) FROM students GROUP BY class"
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import datetime
+import json
+import os
+import queue
+import sqlite3
+import statistics
+import sys
+import time
+
+from firestore_admin import (
+    FieldPath, PROJECT_ROOT, add_connection_args, connect_from_args, describe_target, positive_int,
+    encode_value,
+)
+
+COLLECTIONS = ['schools', 'students', 'score_buckets', 'subscriptions']
+# Large fields that reports never need
+SKIPPED_SETTINGS = {'logo', 'headmasterSignature'}
+SKIPPED_STUDENT_FIELDS = {'picture'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS schools (
+    doc_id TEXT PRIMARY KEY,
+    school_name TEXT,
+    academic_year TEXT,
+    academic_term TEXT,
+    access INTEGER,
+    is_promotion_term INTEGER,
+    settings TEXT
+);
+CREATE INDEX IF NOT EXISTS schools_by_name ON schools (school_name, academic_year, academic_term);
+
+CREATE TABLE IF NOT EXISTS users (
+    doc_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    name TEXT,
+    role TEXT,
+    allowed_classes TEXT,
+    allowed_subjects TEXT,
+    class_subjects TEXT,
+    is_read_only INTEGER,
+    PRIMARY KEY (doc_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS report_data (
+    doc_id TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    attendance TEXT,
+    conduct TEXT,
+    interest TEXT,
+    attitude TEXT,
+    teacher_remark TEXT,
+    promoted_to TEXT,
+    PRIMARY KEY (doc_id, student_id)
+);
+
+CREATE TABLE IF NOT EXISTS students (
+    doc_id TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    name TEXT,
+    class TEXT,
+    index_number TEXT,
+    gender TEXT,
+    date_of_birth TEXT,
+    data TEXT,
+    PRIMARY KEY (doc_id, student_id)
+);
+CREATE INDEX IF NOT EXISTS students_by_class ON students (doc_id, class);
+
+CREATE TABLE IF NOT EXISTS scores (
+    doc_id TEXT NOT NULL,
+    bucket_id TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    subject_id TEXT NOT NULL,
+    assessment_id TEXT NOT NULL,
+    marks TEXT,
+    PRIMARY KEY (doc_id, bucket_id, student_id, subject_id, assessment_id)
+);
+CREATE INDEX IF NOT EXISTS scores_by_student ON scores (doc_id, student_id);
+
+CREATE TABLE IF NOT EXISTS subscriptions (
+    school_id TEXT PRIMARY KEY,
+    max_students INTEGER,
+    max_class INTEGER,
+    expiry_date TEXT,
+    last_updated TEXT,
+    data TEXT
+);
+
+-- Update time of every mirrored document, to skip unchanged ones
+CREATE TABLE IF NOT EXISTS mirrored_documents (
+    path TEXT PRIMARY KEY,
+    collection TEXT NOT NULL,
+    update_time TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    collection TEXT PRIMARY KEY,
+    backfill_cursor TEXT,
+    backfill_done INTEGER NOT NULL DEFAULT 0,
+    documents INTEGER NOT NULL DEFAULT 0,
+    last_change_at TEXT
+);
+"""
+
+
+def default_mirror_path(args):
+    target = 'emulator' if args.emulator else f'db{args.database}'
+    return os.path.join(PROJECT_ROOT, '.cache', f'mirror-{target}.sqlite')
+
+
+def open_mirror(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def to_json(value):
+    return json.dumps(encode_value(value), ensure_ascii=False, separators=(',', ':'))
+
+
+def text(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.astimezone(datetime.timezone.utc).isoformat()
+    return str(value)
+
+
+def flag(value):
+    return None if value is None else int(bool(value))
+
+
+# -----------------------------------------------------------------------------
+# APPLYING DOCUMENTS
+# -----------------------------------------------------------------------------
+
+def school_of(ref):
+    """docId of the schools/{docId} a subcollection document hangs off, or None."""
+    school = ref.parent.parent
+    if school is None or school.parent.id != 'schools':
+        return None
+    return school.id
+
+
+def apply_school(conn, ref, data):
+    doc_id = ref.id
+    conn.execute('DELETE FROM users WHERE doc_id = ?', (doc_id,))
+    conn.execute('DELETE FROM report_data WHERE doc_id = ?', (doc_id,))
+    if data is None:
+        conn.execute('DELETE FROM schools WHERE doc_id = ?', (doc_id,))
+        return
+    settings = data.get('settings') or {}
+    conn.execute('INSERT OR REPLACE INTO schools VALUES (?, ?, ?, ?, ?, ?, ?)', (
+        doc_id, settings.get('schoolName') or data.get('schoolName'), settings.get('academicYear'),
+        settings.get('academicTerm'), flag(data.get('Access')), flag(settings.get('isPromotionTerm')),
+        to_json({k: v for k, v in settings.items() if k not in SKIPPED_SETTINGS}),
+    ))
+    conn.executemany('INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [
+        (doc_id, text(u.get('id')), u.get('name'), u.get('role'), to_json(u.get('allowedClasses') or []),
+         to_json(u.get('allowedSubjects') or []), to_json(u.get('classSubjects') or {}), flag(u.get('isReadOnly')))
+        for u in data.get('users') or [] if isinstance(u, dict) and u.get('id') is not None
+    ])
+    conn.executemany('INSERT OR REPLACE INTO report_data VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [
+        (doc_id, text(r.get('studentId')), r.get('attendance'), r.get('conduct'), r.get('interest'),
+         r.get('attitude'), r.get('teacherRemark'), r.get('promotedTo'))
+        for r in data.get('reportData') or [] if isinstance(r, dict) and r.get('studentId') is not None
+    ])
+
+
+def apply_student(conn, ref, data):
+    doc_id = school_of(ref)
+    if data is None:
+        conn.execute('DELETE FROM students WHERE doc_id = ? AND student_id = ?', (doc_id, ref.id))
+        return
+    conn.execute('INSERT OR REPLACE INTO students VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (
+        doc_id, ref.id, data.get('name'), data.get('class'), data.get('indexNumber'), data.get('gender'),
+        data.get('dateOfBirth'), to_json({k: v for k, v in data.items() if k not in SKIPPED_STUDENT_FIELDS}),
+    ))
+
+
+def apply_bucket(conn, ref, data):
+    doc_id = school_of(ref)
+    conn.execute('DELETE FROM scores WHERE doc_id = ? AND bucket_id = ?', (doc_id, ref.id))
+    rows = []
+    for score in ((data or {}).get('scoresMap') or {}).values():
+        if not isinstance(score, dict):
+            continue
+        for assessment_id, marks in (score.get('assessmentScores') or {}).items():
+            rows.append((doc_id, ref.id, text(score.get('studentId')), text(score.get('subjectId')),
+                         text(assessment_id), to_json(marks)))
+    conn.executemany('INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+
+def apply_subscription(conn, ref, data):
+    if data is None:
+        conn.execute('DELETE FROM subscriptions WHERE school_id = ?', (ref.id,))
+        return
+    conn.execute('INSERT OR REPLACE INTO subscriptions VALUES (?, ?, ?, ?, ?, ?)', (
+        ref.id, data.get('maxStudents'), data.get('maxClass'), text(data.get('expiryDate')),
+        text(data.get('lastUpdated')), to_json(data),
+    ))
+
+
+APPLY = {
+    'schools': apply_school,
+    'students': apply_student,
+    'score_buckets': apply_bucket,
+    'subscriptions': apply_subscription,
+}
+
+
+def source(db, collection):
+    """Query for a mirrored collection: top-level collections, or a collection group under schools/."""
+    if collection in ('schools', 'subscriptions'):
+        return db.collection(collection)
+    return db.collection_group(collection)
+
+
+def mirrored(ref):
+    """Collection group queries also match same-named collections outside schools/."""
+    return ref.parent.parent is None or school_of(ref) is not None
+
+
+def apply_snapshot(conn, collection, snap, removed=False):
+    """Apply one document unless its update time is already mirrored. Returns True when applied."""
+    ref = snap.reference
+    if not mirrored(ref):
+        return False
+    update_time = text(snap.update_time) if not removed else None
+    if not removed:
+        row = conn.execute('SELECT update_time FROM mirrored_documents WHERE path = ?', (ref.path,)).fetchone()
+        if row and row[0] == update_time:
+            return False
+    APPLY[collection](conn, ref, None if removed else (snap.to_dict() or {}))
+    if removed:
+        conn.execute('DELETE FROM mirrored_documents WHERE path = ?', (ref.path,))
+    else:
+        conn.execute('INSERT OR REPLACE INTO mirrored_documents VALUES (?, ?, ?)', (ref.path, collection, update_time))
+    return True
+
+
+def prune(db, conn, collection, live_paths):
+    """Remove mirrored documents of a collection that are not in live_paths. Returns the count."""
+    stale = [path for (path,) in conn.execute('SELECT path FROM mirrored_documents WHERE collection = ?', (collection,))
+             if path not in live_paths]
+    for path in stale:
+        APPLY[collection](conn, db.document(path), None)
+        conn.execute('DELETE FROM mirrored_documents WHERE path = ?', (path,))
+    return len(stale)
+
+
+# -----------------------------------------------------------------------------
+# BACKFILL
+# -----------------------------------------------------------------------------
+
+def backfill(db, conn, collection, page_size):
+    """Page through a collection, committing each page together with its cursor. Returns (read, applied)."""
+    state = conn.execute('SELECT backfill_cursor, backfill_done FROM sync_state WHERE collection = ?',
+                         (collection,)).fetchone()
+    if state and state[1]:
+        return 0, 0
+    query = source(db, collection).order_by(FieldPath.document_id())
+    cursor = state[0] if state else None
+    read, applied = 0, 0
+    while True:
+        page = query.start_after({FieldPath.document_id(): db.document(cursor)}) if cursor else query
+        snaps = list(page.limit(page_size).stream())
+        with conn:
+            for snap in snaps:
+                applied += apply_snapshot(conn, collection, snap)
+            read += len(snaps)
+            if snaps:
+                cursor = snaps[-1].reference.path
+            done = len(snaps) < page_size
+            conn.execute('INSERT INTO sync_state (collection, backfill_cursor, backfill_done, documents) '
+                         'VALUES (?, ?, ?, ?) ON CONFLICT (collection) DO UPDATE SET '
+                         'backfill_cursor = excluded.backfill_cursor, backfill_done = excluded.backfill_done, '
+                         'documents = documents + excluded.documents',
+                         (collection, cursor, int(done), len(snaps)))
+        if done:
+            return read, applied
+
+
+# -----------------------------------------------------------------------------
+# LISTENING
+# -----------------------------------------------------------------------------
+
+class LagStats:
+    """Commit-to-mirror lag of changes since the last report."""
+
+    def __init__(self):
+        self.samples = []
+        self.changes = 0
+        self.applied = 0
+
+    def report(self, pending):
+        if self.samples:
+            ordered = sorted(self.samples)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lag = f"lag p50 {statistics.median(ordered) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, max {ordered[-1] * 1000:.0f} ms"
+        else:
+            lag = 'no new changes'
+        line = f"   📈 {self.changes} change(s), {self.applied} applied, {lag}, {pending} snapshot(s) queued"
+        self.samples, self.changes, self.applied = [], 0, 0
+        return line
+
+
+def watch(db, conn, collections, stats_interval):
+    """Apply listener snapshots from one thread until interrupted."""
+    events = queue.Queue()
+    listeners = []
+    for collection in collections:
+        first = [True]
+
+        def on_snapshot(docs, changes, read_time, collection=collection, first=first):
+            # The first snapshot holds every live document; later ones carry REMOVED changes
+            live = {doc.reference.path for doc in docs} if first[0] else None
+            first[0] = False
+            events.put((collection, changes, read_time, live))
+        listeners.append(source(db, collection).on_snapshot(on_snapshot))
+    print(f"👀 Watching {', '.join(collections)} (Ctrl+C to stop)")
+
+    stats = LagStats()
+    next_report = time.time() + stats_interval
+    try:
+        while True:
+            try:
+                collection, changes, read_time, live = events.get(timeout=max(0.1, next_report - time.time()))
+            except queue.Empty:
+                collection = None
+            if collection:
+                with conn:
+                    applied_at = None
+                    for change in changes:
+                        removed = change.type.name == 'REMOVED'
+                        if apply_snapshot(conn, collection, change.document, removed):
+                            stats.applied += 1
+                            applied_at = applied_at or datetime.datetime.now(datetime.timezone.utc)
+                            if not removed and change.document.update_time:
+                                stats.samples.append((applied_at - change.document.update_time).total_seconds())
+                    stats.changes += len(changes)
+                    if live is not None:
+                        pruned = prune(db, conn, collection, live)
+                        if pruned:
+                            stats.applied += pruned
+                            print(f"   🗑️  {collection}: removed {pruned} document(s) deleted while sync was stopped")
+                            applied_at = applied_at or datetime.datetime.now(datetime.timezone.utc)
+                    if applied_at:
+                        conn.execute('UPDATE sync_state SET last_change_at = ? WHERE collection = ?',
+                                     (text(applied_at), collection))
+            if time.time() >= next_report:
+                print(stats.report(events.qsize()))
+                next_report = time.time() + stats_interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for listener in listeners:
+            listener.unsubscribe()
+
+
+def run_sync(args):
+    db = connect_from_args(args)
+    path = args.mirror or default_mirror_path(args)
+    conn = open_mirror(path)
+    if args.restart_backfill:
+        with conn:
+            conn.execute('DELETE FROM sync_state')
+    print(f"🪞 Mirroring {describe_target(args)} → {path}")
+
+    for collection in args.collections:
+        started = time.time()
+        read, applied = backfill(db, conn, collection, args.page_size)
+        if read:
+            print(f"   📥 {collection}: backfilled {read} document(s), {applied} changed, in {time.time() - started:.1f}s")
+        else:
+            print(f"   ✅ {collection}: backfill already complete")
+    if not args.backfill_only:
+        watch(db, conn, args.collections, args.stats_interval)
+    conn.close()
+
+
+def run_query(args):
+    path = args.mirror or default_mirror_path(args)
+    if not os.path.exists(path):
+        print(f"❌ No mirror at {path}; run sync first")
+        sys.exit(1)
+    conn = open_mirror(path)
+    started = time.time()
+    try:
+        cursor = conn.execute(args.sql)
+        rows = cursor.fetchall()
+    except sqlite3.Error as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    elapsed = time.time() - started
+    if cursor.description:
+        print('\t'.join(column[0] for column in cursor.description))
+        for row in rows[:args.limit]:
+            print('\t'.join('' if value is None else str(value) for value in row))
+        if len(rows) > args.limit:
+            print(f"... {len(rows) - args.limit} more row(s)")
+    print(f"⏱️  {len(rows)} row(s) in {elapsed * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mirror school data into a local SQLite database")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sync = add_connection_args(sub.add_parser('sync', help='Backfill, then apply changes from listeners'))
+    sync.add_argument('--mirror', help='SQLite file (default: .cache/mirror-<db>.sqlite)')
+    sync.add_argument('--collections', nargs='+', choices=COLLECTIONS, default=COLLECTIONS,
+                      help='Collections to mirror (default: all)')
+    sync.add_argument('--page-size', type=positive_int, default=500, help='Documents per backfill page (default: 500)')
+    sync.add_argument('--backfill-only', action='store_true', help='Stop after the backfill')
+    sync.add_argument('--restart-backfill', action='store_true', help='Backfill from the start again')
+    sync.add_argument('--stats-interval', type=positive_int, default=30, help='Seconds between lag reports (default: 30)')
+
+    query = add_connection_args(sub.add_parser('query', help='Run SQL against the mirror'))
+    query.add_argument('sql', help='SQL statement')
+    query.add_argument('--mirror', help='SQLite file (default: .cache/mirror-<db>.sqlite)')
+    query.add_argument('--limit', type=positive_int, default=50, help='Rows printed (default: 50)')
+
+    args = parser.parse_args()
+    if args.command == 'sync':
+        run_sync(args)
+    else:
+        run_query(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Image Offload Pipeline
+Finds the inline base64 images stored in school data (Student.picture,
+Subject.signature, Class.teacherSignature, settings.logo and
+settings.headmasterSignature), recompresses them in a process pool and stores
+each distinct image once as a content-addressed blob. With --apply the inline
+data URL is replaced by a blob reference.
+
+The blob directory is a local stand-in for Cloud Storage: blobs are laid out as
+<blob-dir>/<first two hex chars>/<sha256>.<ext>.
+
+Usage:
+    python scripts/offload_images.py --emulator --blob-dir blobs
+    python scripts/offload_images.py --database 1 --blob-dir blobs --format jpeg --max-size 400 --apply
+
+Requires Firebase Admin SDK and Pillow
+"""
+
+import argparse
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from firestore_admin import (
+    add_connection_args, connect_from_args, describe_target, positive_int,
+    iter_schools, commit_in_batches,
+)
+
+try:
+    from PIL import Image
+except ImportError:
+    print("❌ Pillow not installed")
+    print("Install with: pip install Pillow")
+    sys.exit(1)
+
+BLOB_SCHEME = 'sba-blob://sha256/'
+DATA_URL = re.compile(r'^data:(image/[\w.+-]+);base64,(.*)$', re.DOTALL)
+
+# (subcollection, field) pairs holding base64 images; None means the main document
+IMAGE_FIELDS = [
+    (None, 'settings.logo'),
+    (None, 'settings.headmasterSignature'),
+    ('students', 'picture'),
+    ('subjects', 'signature'),
+    ('classes', 'teacherSignature'),
+]
+
+
+def decode_data_url(value):
+    """Return the raw image bytes of a data URL (or bare base64), or None if it is not an image."""
+    if not isinstance(value, str) or not value or value.startswith(BLOB_SCHEME):
+        return None
+    match = DATA_URL.match(value)
+    payload = match.group(2) if match else value
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def recompress(raw, max_size, fmt, quality):
+    """Resize to fit max_size and re-encode. Runs in worker processes; returns (bytes, ext) or None."""
+    try:
+        image = Image.open(io.BytesIO(raw))
+        image.load()
+    except Exception:
+        return None
+
+    image.thumbnail((max_size, max_size))
+    out = io.BytesIO()
+    if fmt == 'webp':
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'P') else 'RGB')
+        image.save(out, 'WEBP', quality=quality, method=6)
+        ext = 'webp'
+    else:
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # Signatures are usually transparent PNGs; flatten them onto paper white.
+            rgba = image.convert('RGBA')
+            background = Image.new('RGB', rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.split()[3])
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.save(out, 'JPEG', quality=quality, optimize=True, progressive=True)
+        ext = 'jpg'
+
+    encoded = out.getvalue()
+    if len(encoded) >= len(raw):
+        # Never make an image bigger; keep the original bytes as the blob.
+        return raw, (Image.open(io.BytesIO(raw)).format or 'bin').lower().replace('jpeg', 'jpg')
+    return encoded, ext
+
+
+def _recompress_job(job):
+    source_hash, raw, max_size, fmt, quality = job
+    return source_hash, recompress(raw, max_size, fmt, quality)
+
+
+def get_field(data, dotted):
+    for part in dotted.split('.'):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+def collect_images(snapshot):
+    """Return [(doc_ref, field_path, inline_value, raw_bytes)] for one school term."""
+    found = []
+    main = snapshot.to_dict() or {}
+    for collection, field in IMAGE_FIELDS:
+        if collection is None:
+            docs = [(snapshot.reference, main)]
+        else:
+            query = snapshot.reference.collection(collection).select([field])
+            docs = [(snap.reference, snap.to_dict() or {}) for snap in query.stream()]
+        for ref, data in docs:
+            value = get_field(data, field)
+            raw = decode_data_url(value)
+            if raw:
+                found.append((ref, field, value, raw))
+    return found
+
+
+def store_blob(blob_dir, data, ext):
+    digest = hashlib.sha256(data).hexdigest()
+    folder = os.path.join(blob_dir, digest[:2])
+    path = os.path.join(folder, f"{digest}.{ext}")
+    if not os.path.exists(path):
+        os.makedirs(folder, exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return f"{BLOB_SCHEME}{digest}.{ext}", len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompress inline base64 images into content-addressed blobs")
+    add_connection_args(parser)
+    parser.add_argument('--blob-dir', required=True, help='Directory used as the blob store')
+    parser.add_argument('--format', choices=['webp', 'jpeg'], default='webp', help='Output format (default: webp)')
+    parser.add_argument('--max-size', type=positive_int, default=600, help='Max width/height in px (default: 600)')
+    parser.add_argument('--quality', type=positive_int, default=70, help='Encoder quality 1-100 (default: 70)')
+    parser.add_argument('--workers', type=positive_int, default=os.cpu_count() or 2, help='Encoder processes')
+    parser.add_argument('--prefix', help='Only process docIds starting with this prefix')
+    parser.add_argument('--apply', action='store_true', help='Replace inline images with blob references')
+    args = parser.parse_args()
+
+    db = connect_from_args(args)
+    mode = 'APPLY' if args.apply else 'report only'
+    print(f"🖼️  Offloading images from {describe_target(args)} → {args.blob_dir} ({args.format}, {mode})")
+    os.makedirs(args.blob_dir, exist_ok=True)
+
+    # source hash -> (reference, blob bytes); shared across schools so repeated
+    # signatures and logos from earlier terms are encoded only once.
+    blobs = {}
+    totals = {'fields': 0, 'inline': 0, 'after': 0}
+    started = time.time()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for snapshot in iter_schools(db, prefix=args.prefix):
+            images = collect_images(snapshot)
+            if not images:
+                continue
+
+            by_source = {}
+            for ref, field, value, raw in images:
+                by_source.setdefault(hashlib.sha256(raw).hexdigest(), raw)
+            jobs = [(h, raw, args.max_size, args.format, args.quality) for h, raw in by_source.items() if h not in blobs]
+            for source_hash, result in pool.map(_recompress_job, jobs, chunksize=4):
+                blobs[source_hash] = store_blob(args.blob_dir, *result) if result else None
+
+            operations = []
+            inline_bytes = reference_bytes = replaced = 0
+            for ref, field, value, raw in images:
+                blob = blobs.get(hashlib.sha256(raw).hexdigest())
+                if blob is None:
+                    continue
+                reference, _ = blob
+                replaced += 1
+                inline_bytes += len(value.encode('utf-8'))
+                reference_bytes += len(reference)
+                operations.append(('update', ref, {field: reference}))
+
+            if args.apply and operations:
+                commit_in_batches(db, operations)
+
+            saved = inline_bytes - reference_bytes
+            totals['fields'] += replaced
+            totals['inline'] += inline_bytes
+            totals['after'] += reference_bytes
+            print(f"   📦 {snapshot.id}: {replaced} images, {len(by_source)} distinct, "
+                  f"{inline_bytes / 1024:,.0f} KB inline → saved {saved / 1024:,.0f} KB")
+
+    stored = [blob for blob in blobs.values() if blob]
+    blob_bytes = sum(size for _, size in stored)
+    elapsed = time.time() - started
+    print(f"\n✅ {totals['fields']} image fields, {len(stored)} unique blobs ({blob_bytes / 1024 / 1024:.2f} MB) in {elapsed:.1f}s")
+    print(f"   Inline bytes removed from documents: {(totals['inline'] - totals['after']) / 1024 / 1024:.2f} MB")
+    if not args.apply:
+        print("   Nothing was written to Firestore (use --apply)")
+
+
+if __name__ == "__main__":
+    main()
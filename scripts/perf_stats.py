@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Performance Statistics Helpers
+Latency histograms and report helpers shared by the benchmark and load tools.
+"""
+
+import math
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram: values (milliseconds) fall into logarithmic buckets whose
+    width is a fixed fraction of their value, so every percentile is accurate to
+    within `precision` regardless of range, in constant memory. Histograms with
+    the same precision can be merged.
+    """
+
+    def __init__(self, precision=0.01):
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value_ms):
+        value_ms = max(value_ms, 0.001)
+        index = math.floor(math.log(value_ms) / self._log_base)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value_ms
+        self.min = min(self.min, value_ms)
+        self.max = max(self.max, value_ms)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge histograms with different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                # Upper edge of the bucket, clamped to the observed range
+                return min(max(math.exp((index + 1) * self._log_base), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'min': round(self.min, 3) if self.count else 0.0,
+            'mean': round(self.mean, 3),
+            'p50': round(self.percentile(50), 3),
+            'p90': round(self.percentile(90), 3),
+            'p99': round(self.percentile(99), 3),
+            'p999': round(self.percentile(99.9), 3),
+            'max': round(self.max, 3),
+        }
+
+    def to_dict(self):
+        return {'precision': self.precision, 'summary': self.summary(), 'buckets': {str(k): v for k, v in sorted(self.counts.items())}}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data['precision'])
+        for index, count in data['buckets'].items():
+            histogram.counts[int(index)] = count
+        summary = data['summary']
+        histogram.count = summary['count']
+        histogram.total = summary['mean'] * summary['count']
+        histogram.min = summary['min'] if summary['count'] else math.inf
+        histogram.max = summary['max']
+        return histogram
+
+
+def format_summary_row(name, summary, width=24):
+    return (f"{name:<{width}} {summary['count']:>8} {summary['mean']:>8.1f} {summary['p50']:>8.1f} "
+            f"{summary['p90']:>8.1f} {summary['p99']:>8.1f} {summary['max']:>9.1f}")
+
+
+def summary_header(width=24):
+    return f"{'Operation':<{width}} {'Count':>8} {'Mean':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'Max ms':>9}"
+
+
+def percent_change(before, after):
+    if not before:
+        return None
+    return 100.0 * (after - before) / before
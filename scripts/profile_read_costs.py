@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Firestore Read/Write Cost Profiler
+Replays page-navigation traces against a seeded school and issues the same
+Firestore calls the web app would for each step (getSchoolData, loadMetadata,
+loadStudents, loadScores / fetchScoresForClass, getSchoolHistory,
+saveDataTransaction), including the DataContext caches that skip repeat loads.
+Document reads, writes and bytes are counted per step, then projected to a
+per-school daily cost.
+
+A trace is JSON:
+
+    {
+      "name": "teacher",
+      "sessionsPerDay": 30,
+      "steps": [
+        {"page": "Login"},
+        {"page": "Dashboard"},
+        {"page": "Score Entry", "subjects": 12},
+        {"page": "Save Scores", "subjects": [1], "scores": 40},
+        {"page": "Report Viewer"}
+      ]
+    }
+
+"subjects" is a list of subject ids, a count (the first N subjects) or "all".
+{"page": "Reload"} starts a fresh browser session (all client caches cleared);
+"waitSeconds" on any step advances the clock used for getSchoolHistory's
+one-minute cache.
+
+Usage:
+    python scripts/profile_read_costs.py --emulator --trace teacher admin
+    python scripts/profile_read_costs.py --emulator --trace my_trace.json --json costs.json
+    python scripts/profile_read_costs.py --emulator --trace teacher admin --baseline costs.json
+
+With --baseline the run fails (exit 1) when any page needs more reads per visit
+than in the baseline report.
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from firestore_admin import (
+    firestore, add_connection_args, connect_from_args, describe_target, iter_schools,
+    document_size, value_size,
+)
+
+# firebaseService.ts CACHE_TTL for getSchoolHistory
+HISTORY_CACHE_SECONDS = 60
+
+# USD per 100,000 operations (Firestore standard edition, single region)
+DEFAULT_READ_PRICE = 0.06
+DEFAULT_WRITE_PRICE = 0.18
+
+TRACES = {
+    'teacher': {
+        'name': 'teacher',
+        'sessionsPerDay': 30,
+        'steps': [
+            {'page': 'Login'},
+            {'page': 'Dashboard'},
+            {'page': 'Score Entry', 'subjects': 12},
+            {'page': 'Save Scores', 'subjects': [1], 'scores': 40},
+            {'page': 'Score Entry', 'subjects': [1]},
+            {'page': 'Report Viewer'},
+        ],
+    },
+    'admin': {
+        'name': 'admin',
+        'sessionsPerDay': 5,
+        'steps': [
+            {'page': 'Login'},
+            {'page': 'Dashboard'},
+            {'page': 'Students'},
+            {'page': 'Score Summary'},
+            {'page': 'Student Progress'},
+            {'page': 'Report Viewer'},
+            {'page': 'Reload', 'waitSeconds': 600},
+            {'page': 'Login'},
+            {'page': 'Student Progress'},
+        ],
+    },
+}
+
+
+class StepMeter:
+    def __init__(self, label):
+        self.label = label
+        self.reads = 0
+        self.writes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.calls = []
+        self.started = time.perf_counter()
+
+    def record_read(self, call, snapshots):
+        # A query that matches nothing is still billed one read
+        reads = max(1, len(snapshots))
+        self.reads += reads
+        self.bytes_read += sum(document_size(s.reference.path, s.to_dict()) for s in snapshots if s.exists)
+        self.calls.append({'call': call, 'reads': reads})
+
+    def record_write(self, call, count, payload_bytes):
+        self.writes += count
+        self.bytes_written += payload_bytes
+        self.calls.append({'call': call, 'writes': count})
+
+    def result(self):
+        return {
+            'step': self.label, 'reads': self.reads, 'writes': self.writes,
+            'bytesRead': self.bytes_read, 'bytesWritten': self.bytes_written,
+            'ms': round((time.perf_counter() - self.started) * 1000, 1), 'calls': self.calls,
+        }
+
+
+class AppSession:
+    """Client-side state of one browser session, mirroring the DataContext caches."""
+
+    def __init__(self, db, doc_id, commit_writes):
+        self.db = db
+        self.doc_id = doc_id
+        self.ref = db.collection('schools').document(doc_id)
+        self.commit_writes = commit_writes
+        self.clock = 0.0
+        self.history_loaded_at = None
+        self.reset()
+
+    def reset(self):
+        self.metadata_loaded = False
+        self.students_loaded = False
+        self.loaded_subjects = set()
+        self.subject_ids = []
+        self.buckets = {}
+
+    # --- firebaseService calls ---------------------------------------------
+
+    def get_school_data(self, meter):
+        snap = self.ref.get()
+        meter.record_read('getSchoolData', [snap])
+
+    def fetch_subcollection(self, meter, name, doc_ref=None, call='fetchSubcollection'):
+        snaps = list((doc_ref or self.ref).collection(name).stream())
+        meter.record_read(f"{call}({name})", snaps)
+        return snaps
+
+    def fetch_scores_for_class(self, meter, subject_id):
+        snap = self.ref.collection('score_buckets').document(f"subject_{subject_id}").get()
+        meter.record_read(f"fetchScoresForClass(subject_{subject_id})", [snap])
+        scores_map = (snap.to_dict() or {}).get('scoresMap') if snap.exists else None
+        if scores_map:
+            return scores_map
+        legacy = list(self.ref.collection('scores').where(
+            filter=firestore.FieldFilter('subjectId', '==', subject_id)).stream())
+        meter.record_read(f"fetchScoresForClass fallback(scores, subject {subject_id})", legacy)
+        return {str((s.to_dict() or {}).get('id', s.id)): s.to_dict() for s in legacy}
+
+    def get_school_history(self, meter):
+        if self.history_loaded_at is not None and self.clock - self.history_loaded_at < HISTORY_CACHE_SECONDS:
+            return
+        prefix = self.doc_id.split('_')[0]
+        # Same document-id range query as getSchoolHistory
+        terms = list(iter_schools(self.db, prefix=prefix))
+        meter.record_read('getSchoolHistory(schools)', terms)
+        for term in terms:
+            for name in ('students', 'subjects', 'classes', 'assessments'):
+                self.fetch_subcollection(meter, name, term.reference, 'getSchoolHistory')
+            buckets = self.fetch_subcollection(meter, 'score_buckets', term.reference, 'getSchoolHistory')
+            if not any((b.to_dict() or {}).get('scoresMap') for b in buckets):
+                self.fetch_subcollection(meter, 'scores', term.reference, 'getSchoolHistory')
+        self.history_loaded_at = self.clock
+
+    # --- DataContext loaders -----------------------------------------------
+
+    def load_metadata(self, meter, force=False):
+        if self.metadata_loaded and not force:
+            return
+        self.fetch_subcollection(meter, 'classes')
+        subjects = self.fetch_subcollection(meter, 'subjects')
+        self.fetch_subcollection(meter, 'assessments')
+        self.subject_ids = sorted((s.to_dict() or {}).get('id') for s in subjects if (s.to_dict() or {}).get('id') is not None)
+        self.metadata_loaded = True
+
+    def load_students(self, meter, force=False):
+        if self.students_loaded and not force:
+            return
+        self.fetch_subcollection(meter, 'students')
+        self.students_loaded = True
+
+    def load_scores(self, meter, subject_id):
+        if subject_id in self.loaded_subjects:
+            return
+        self.buckets[subject_id] = self.fetch_scores_for_class(meter, subject_id)
+        self.loaded_subjects.add(subject_id)
+
+    def save_scores(self, meter, subject_ids, count):
+        """saveDataTransaction for edited scores: one bucket merge per subject plus the main document."""
+        operations = []
+        payload_bytes = 0
+        for subject_id in subject_ids:
+            scores_map = self.buckets.get(subject_id) or {}
+            edits = {score_id: scores_map[score_id] for score_id in sorted(scores_map)[:count]}
+            if not edits:
+                continue
+            ref = self.ref.collection('score_buckets').document(f"subject_{subject_id}")
+            operations.append((ref, {'scoresMap': edits}))
+            payload_bytes += value_size({'scoresMap': edits})
+        if not operations:
+            return
+        metadata = {'metadata.lastUpdated.scores': firestore.SERVER_TIMESTAMP}
+        payload_bytes += value_size({'metadata.lastUpdated.scores': 0})
+        meter.record_write('saveDataTransaction', len(operations) + 1, payload_bytes)
+        if self.commit_writes:
+            batch = self.db.batch()
+            for ref, data in operations:
+                batch.set(ref, data, merge=True)
+            batch.update(self.ref, metadata)
+            batch.commit()
+
+    # --- pages ---------------------------------------------------------------
+
+    def resolve_subjects(self, selector):
+        if not self.metadata_loaded:
+            raise ValueError("Trace must log in before visiting pages that use subjects")
+        if selector in (None, 'all'):
+            return list(self.subject_ids)
+        if isinstance(selector, int):
+            return self.subject_ids[:selector]
+        return [int(s) for s in selector]
+
+    def visit(self, step, meter):
+        self.clock += step.get('waitSeconds', 0)
+        page = step['page']
+        if page == 'Reload':
+            self.reset()
+            self.history_loaded_at = None
+        elif page == 'Login':
+            # fetchInitialData: main document, then metadata eagerly
+            self.get_school_data(meter)
+            self.load_metadata(meter)
+        elif page in ('Dashboard', 'Subjects', 'Assessment Types'):
+            self.load_metadata(meter)
+        elif page == 'Students':
+            self.load_students(meter)
+        elif page == 'Student Progress':
+            self.load_students(meter, force=True)
+            self.load_metadata(meter)
+            self.get_school_history(meter)
+        elif page == 'Score Entry':
+            for subject_id in self.resolve_subjects(step.get('subjects', 1)):
+                self.load_scores(meter, subject_id)
+        elif page == 'Score Summary':
+            for subject_id in self.resolve_subjects('all'):
+                self.load_scores(meter, subject_id)
+        elif page == 'Report Viewer':
+            self.load_students(meter)
+            for subject_id in self.resolve_subjects('all'):
+                self.load_scores(meter, subject_id)
+        elif page == 'Save Scores':
+            self.save_scores(meter, self.resolve_subjects(step.get('subjects', 1)), step.get('scores', 20))
+        else:
+            raise ValueError(f"Unknown page in trace: {page}")
+
+
+def load_trace(name_or_path):
+    if name_or_path in TRACES:
+        return TRACES[name_or_path]
+    with open(name_or_path, 'r', encoding='utf-8') as f:
+        trace = json.load(f)
+    trace.setdefault('name', os.path.splitext(os.path.basename(name_or_path))[0])
+    return trace
+
+
+def replay(db, doc_id, trace, commit_writes):
+    session = AppSession(db, doc_id, commit_writes)
+    steps = []
+    for number, step in enumerate(trace['steps'], 1):
+        label = step['page']
+        if 'subjects' in step:
+            label += f" ({step['subjects']} subjects)" if not isinstance(step['subjects'], list) else f" (subjects {step['subjects']})"
+        meter = StepMeter(f"{number}. {label}")
+        session.visit(step, meter)
+        result = meter.result()
+        result['page'] = step['page']
+        steps.append(result)
+    return steps
+
+
+def page_averages(traces):
+    """Average reads per visit for every page across all traces."""
+    totals = {}
+    for trace in traces:
+        for step in trace['steps']:
+            if step['page'] == 'Reload':
+                continue
+            entry = totals.setdefault(step['page'], {'visits': 0, 'reads': 0})
+            entry['visits'] += 1
+            entry['reads'] += step['reads']
+    return {page: round(t['reads'] / t['visits'], 2) for page, t in sorted(totals.items())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count Firestore reads/writes per page for navigation traces")
+    add_connection_args(parser)
+    parser.add_argument('--trace', nargs='+', default=['teacher', 'admin'],
+                        help=f"Trace JSON files or built-in traces ({', '.join(TRACES)}; default: all built-in)")
+    parser.add_argument('--school', help='School docId to replay against (default: first matching school)')
+    parser.add_argument('--prefix', help='Pick the first school whose docId starts with this prefix')
+    parser.add_argument('--sessions-per-day', type=float, help="Override each trace's sessionsPerDay")
+    parser.add_argument('--read-price', type=float, default=DEFAULT_READ_PRICE, help='USD per 100k reads (default: 0.06)')
+    parser.add_argument('--write-price', type=float, default=DEFAULT_WRITE_PRICE, help='USD per 100k writes (default: 0.18)')
+    parser.add_argument('--baseline', help='Earlier JSON report; exit 1 if any page now needs more reads')
+    parser.add_argument('--tolerance', type=float, default=0.0, help='Allowed increase in reads per page (default: 0)')
+    parser.add_argument('--json', help='Write the report to this file')
+    args = parser.parse_args()
+
+    db = connect_from_args(args)
+    doc_id = args.school
+    if not doc_id:
+        doc_id = next((snap.id for snap in iter_schools(db, prefix=args.prefix, field_paths=[])), None)
+    if not doc_id:
+        print("❌ No school found to replay against")
+        sys.exit(1)
+
+    # Saves are only committed on the emulator; elsewhere they are counted, not written
+    print(f"🧭 Replaying traces against {doc_id} in {describe_target(args)}"
+          f"{'' if args.emulator else ' (writes counted, not committed)'}")
+
+    reports = []
+    daily = {'reads': 0.0, 'writes': 0.0}
+    for name in args.trace:
+        trace = load_trace(name)
+        steps = replay(db, doc_id, trace, commit_writes=args.emulator)
+        sessions = args.sessions_per_day if args.sessions_per_day is not None else trace.get('sessionsPerDay', 1)
+        reads = sum(s['reads'] for s in steps)
+        writes = sum(s['writes'] for s in steps)
+        daily['reads'] += reads * sessions
+        daily['writes'] += writes * sessions
+        reports.append({'name': trace['name'], 'sessionsPerDay': sessions, 'reads': reads, 'writes': writes, 'steps': steps})
+
+        print(f"\n📄 {trace['name']} ({sessions:g} sessions/day)")
+        print(f"{'Step':<40} {'Reads':>7} {'Writes':>7} {'KB read':>9} {'ms':>8}")
+        print("-" * 75)
+        for s in steps:
+            print(f"{s['step']:<40} {s['reads']:>7} {s['writes']:>7} {s['bytesRead'] / 1024:>9.1f} {s['ms']:>8.1f}")
+        print(f"{'Total per session':<40} {reads:>7} {writes:>7}")
+
+    cost = daily['reads'] / 100000 * args.read_price + daily['writes'] / 100000 * args.write_price
+    per_page = page_averages(reports)
+    print(f"\n📈 Projected per school: {daily['reads']:,.0f} reads + {daily['writes']:,.0f} writes/day "
+          f"≈ ${cost:.4f}/day (${cost * 30:.2f}/month, before free tier)")
+    print("\nReads per page visit:")
+    for page, reads in per_page.items():
+        print(f"   {page:<20} {reads:>8}")
+
+    report = {
+        'school': doc_id,
+        'target': describe_target(args),
+        'traces': reports,
+        'readsPerPage': per_page,
+        'daily': {'reads': daily['reads'], 'writes': daily['writes'], 'usd': round(cost, 6)},
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('readsPerPage', {})
+        regressions = [(page, baseline[page], reads) for page, reads in per_page.items()
+                       if page in baseline and reads > baseline[page] + args.tolerance]
+        if regressions:
+            print("\n❌ Reads per page increased:")
+            for page, before, after in regressions:
+                print(f"   {page}: {before} → {after}")
+            sys.exit(1)
+        print("\n✅ No page needs more reads than the baseline")
+
+
+if __name__ == "__main__":
+    main()
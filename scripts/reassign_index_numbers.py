@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Bulk Index Number Reassignment
+Reassigns every student's index number in one pass with the rules of
+utils/indexNumberReassign.ts and indexNumberGenerator.ts:
+
+    index number = globalPrefix + classPrefix + zero-padded counter + classSuffix + globalSuffix
+
+With settings.indexNumberPerClass each class counts from its own
+indexNumberCounter; otherwise one counter starting at
+settings.indexNumberGlobalCounter runs across the school. With
+settings.indexNumberAutoSort (or --sort) students are numbered alphabetically
+(within each class in per-class mode), otherwise in the app's load order.
+
+Only students whose number changes are written, with batched updates. The
+counters are then advanced past the last number used, as adding a student in
+the app does, in the final batch. A run that stops part-way leaves the counters
+untouched, so simply running it again recomputes the same plan and finishes
+it. Once a run has finished, the next one starts from the advanced counters;
+--keep-counters leaves them alone so reassignments stay repeatable. --dry-run
+prints the diff without writing.
+
+Usage:
+    python scripts/reassign_index_numbers.py --emulator --school ayirebida_20242025_First-Term --dry-run
+    python scripts/reassign_index_numbers.py --database 1 --school ayirebida_20242025_First-Term --sort
+    python scripts/reassign_index_numbers.py --database 1 --school ayirebida_20242025_First-Term --keep-counters --diff-out diff.csv
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import csv
+import sys
+import time
+
+from firestore_admin import (
+    firestore, add_connection_args, connect_from_args, describe_target, commit_in_batches, throttle_for, BATCH_SIZE,
+)
+
+STUDENT_FIELDS = ['id', 'name', 'class', 'indexNumber']
+
+
+def generate_index_number(settings, class_obj, counter):
+    """generateIndexNumber with an explicit counter."""
+    class_obj = class_obj or {}
+    digits = settings.get('indexNumberCounterDigits') or 3
+    return (f"{settings.get('indexNumberGlobalPrefix') or ''}{class_obj.get('indexNumberPrefix') or ''}"
+            f"{str(counter).zfill(digits)}"
+            f"{class_obj.get('indexNumberSuffix') or ''}{settings.get('indexNumberGlobalSuffix') or ''}")
+
+
+def name_key(student):
+    # Close to localeCompare for the names schools use: case-insensitive, then exact
+    name = student.get('name') or ''
+    return name.casefold(), name
+
+
+def plan_assignment(students, classes, settings, sort_alphabetically):
+    """
+    ({studentId: new index number}, {counter key: next counter}, [students skipped]).
+    Counter keys are 'global' or a class id. students must be in load order.
+    """
+    by_name = {c.get('name'): c for c in classes}
+    ordered = sorted(students, key=name_key) if sort_alphabetically else list(students)
+    assignment, counters, skipped = {}, {}, []
+
+    if settings.get('indexNumberPerClass'):
+        # Students of unknown classes keep their numbers (the app drops them)
+        by_class = {}
+        for student in ordered:
+            if student.get('class') in by_name:
+                by_class.setdefault(student['class'], []).append(student)
+            else:
+                skipped.append(student)
+        # Sorted mode walks classes in their list order, like the app
+        class_order = [c.get('name') for c in classes] if sort_alphabetically else list(by_class)
+        for class_name in class_order:
+            class_obj = by_name[class_name]
+            counter = class_obj.get('indexNumberCounter') or 1
+            for student in by_class.get(class_name, []):
+                assignment[student['id']] = generate_index_number(settings, class_obj, counter)
+                counter += 1
+            counters[class_obj['id']] = counter
+    else:
+        counter = settings.get('indexNumberGlobalCounter') or 1
+        for student in ordered:
+            assignment[student['id']] = generate_index_number(settings, by_name.get(student.get('class')), counter)
+            counter += 1
+        counters['global'] = counter
+    return assignment, counters, skipped
+
+
+def duplicates(students, assignment):
+    """Index numbers held by more than one student after the reassignment."""
+    holders = {}
+    for student in students:
+        number = assignment.get(student['id'], student.get('indexNumber'))
+        if number:
+            holders.setdefault(number, []).append(student.get('name') or str(student['id']))
+    return {number: names for number, names in holders.items() if len(names) > 1}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reassign all student index numbers of a term with batched writes")
+    add_connection_args(parser)
+    parser.add_argument('--school', required=True, help='Term docId, e.g. myschool_20242025_First-Term')
+    sort = parser.add_mutually_exclusive_group()
+    sort.add_argument('--sort', dest='sort', action='store_true', default=None, help='Number alphabetically')
+    sort.add_argument('--no-sort', dest='sort', action='store_false', help='Number in load order')
+    parser.add_argument('--keep-counters', action='store_true', help='Do not advance the stored counters')
+    parser.add_argument('--diff-out', help='Write every change as CSV (studentId, name, class, old, new)')
+    parser.add_argument('--dry-run', action='store_true', help='Show the diff without writing')
+    args = parser.parse_args()
+
+    db = connect_from_args(args)
+    school_ref = db.collection('schools').document(args.school)
+    started = time.time()
+    main_doc = school_ref.get(['settings'])
+    if not main_doc.exists:
+        print(f"❌ School term {args.school} not found in {describe_target(args)}")
+        sys.exit(1)
+    settings = (main_doc.to_dict() or {}).get('settings') or {}
+    classes = [c.to_dict() for c in school_ref.collection('classes').stream()]
+    # Firestore returns documents in id order, which is the app's load order
+    students = [s.to_dict() for s in school_ref.collection('students').select(STUDENT_FIELDS).stream()]
+    students = [s for s in students if s.get('id') is not None]
+    read_seconds = time.time() - started
+
+    sort_alphabetically = settings.get('indexNumberAutoSort', False) if args.sort is None else args.sort
+    assignment, counters, skipped = plan_assignment(students, classes, settings, sort_alphabetically)
+    changes = [(s, s.get('indexNumber') or '', assignment[s['id']]) for s in students
+               if s['id'] in assignment and assignment[s['id']] != (s.get('indexNumber') or '')]
+
+    mode = 'per-class' if settings.get('indexNumberPerClass') else 'global'
+    print(f"🔢 {args.school}: {len(students)} students, {mode} counters, "
+          f"{'alphabetical' if sort_alphabetically else 'load'} order (read in {read_seconds:.1f}s)")
+    print(f"   {len(changes)} index number(s) change, {len(students) - len(changes) - len(skipped)} unchanged")
+    for student, old, new in changes[:20]:
+        print(f"      {student.get('class', ''):<10} {student.get('name', '')[:30]:<30} {old or '-':>16} → {new}")
+    if len(changes) > 20:
+        print(f"      ... {len(changes) - 20} more")
+    if skipped:
+        print(f"   ⚠️  {len(skipped)} student(s) in classes that do not exist keep their numbers: "
+              f"{', '.join(sorted({s.get('class') or '?' for s in skipped}))}")
+    clashes = duplicates(students, assignment)
+    if clashes:
+        print(f"   ⚠️  {len(clashes)} index number(s) would be shared, e.g. "
+              + '; '.join(f"{n}: {', '.join(names[:3])}" for n, names in list(clashes.items())[:3]))
+
+    if args.diff_out:
+        with open(args.diff_out, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['studentId', 'name', 'class', 'old', 'new'])
+            for student, old, new in changes:
+                writer.writerow([student['id'], student.get('name', ''), student.get('class', ''), old, new])
+        print(f"   Diff → {args.diff_out}")
+
+    if args.dry_run:
+        print("\n✅ Dry run: nothing written")
+        return
+
+    operations = [('update', school_ref.collection('students').document(str(student['id'])), {'indexNumber': new})
+                  for student, _, new in changes]
+    stamps = {}
+    if changes:
+        stamps['metadata.lastUpdated.students'] = firestore.SERVER_TIMESTAMP
+    if not args.keep_counters:
+        if 'global' in counters:
+            if counters['global'] != settings.get('indexNumberGlobalCounter'):
+                stamps['settings.indexNumberGlobalCounter'] = counters['global']
+                stamps['metadata.lastUpdated.settings'] = firestore.SERVER_TIMESTAMP
+        else:
+            by_id = {c.get('id'): c for c in classes}
+            changed = {cid: n for cid, n in counters.items() if by_id[cid].get('indexNumberCounter') != n}
+            for cid, counter in changed.items():
+                operations.append(('update', school_ref.collection('classes').document(str(cid)),
+                                   {'indexNumberCounter': counter}))
+            if changed:
+                stamps['metadata.lastUpdated.classes'] = firestore.SERVER_TIMESTAMP
+    # Counters and metadata go last: until they land, a rerun produces the same plan
+    if stamps:
+        operations.append(('update', school_ref, stamps))
+    if not operations:
+        print("\n✅ Nothing to write")
+        return
+
+    write_started = time.time()
+    commits = commit_in_batches(db, operations)
+    atomic = 'one atomic batch' if commits == 1 else f"{commits} batches of up to {BATCH_SIZE}"
+    print(f"\n✅ Wrote {len(operations)} update(s) in {atomic} in {time.time() - write_started:.1f}s "
+          f"({time.time() - started:.1f}s total)")
+    print(f"   🚦 {throttle_for(db).summary()}")
+
+
+if __name__ == "__main__":
+    main()
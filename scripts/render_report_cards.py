@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+Batch Report Card Renderer
+Renders a whole term's report cards to PDF outside the browser, with the same
+A4 layout as services/pdfGenerator.generateReportsPDF: school header and logo,
+student details and photo, academic performance table, grading key, attendance
+and remarks, signatures and stamp box.
+
+The term's scores are read once and reduced with report_math.py. Classes are
+then rendered in parallel by a process pool; each worker reads its class's
+student documents (with pictures) itself and decodes the logo and signatures
+once, keeping them cached for every page it draws. One PDF is written per
+class, and the class files are merged into one PDF for the school.
+
+Usage:
+    python scripts/render_report_cards.py --emulator --school ayirebida_20242025_First-Term
+    python scripts/render_report_cards.py --database 1 --school ayirebida_20242025_First-Term --workers 8
+    python scripts/render_report_cards.py --emulator --school ayirebida_20242025_First-Term --classes "JHS 1" "JHS 2" --no-merge
+
+Requires Firebase Admin SDK, reportlab and pypdf
+"""
+
+import argparse
+import base64
+import datetime
+import functools
+import io
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from firestore_admin import (
+    PROJECT_ROOT, firestore, add_connection_args, connect_from_args, describe_target, positive_int,
+)
+from report_math import load_rosters, load_totals, split_assessments, class_results, format_score, ordinal
+
+try:
+    from reportlab.lib.units import mm
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.pdfgen import canvas
+    from pypdf import PdfWriter
+except ImportError:
+    print("❌ reportlab or pypdf not installed")
+    print("Install with: pip install reportlab pypdf")
+    sys.exit(1)
+
+# Same layout constants as pdfGenerator.ts (millimetres)
+PAGE_WIDTH = 210
+PAGE_HEIGHT = 297
+CARD_WIDTH = 190
+CARD_HEIGHT = 277
+MARGIN_X = (PAGE_WIDTH - CARD_WIDTH) / 2
+MARGIN_Y = (PAGE_HEIGHT - CARD_HEIGHT) / 2
+CONTENT_MARGIN = 6
+FONTS = {False: 'Times-Roman', True: 'Times-Bold'}
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+          'September', 'October', 'November', 'December']
+POWERED_BY = "Powered by MYKHIL Creations (+233) 0542410613"
+
+# Set once per worker process by init_worker
+_worker = {}
+
+
+@functools.lru_cache(maxsize=32)
+def cached_image(data_url):
+    """Decode a logo or signature data URL once per worker."""
+    return decode_image(data_url)
+
+
+def decode_image(data_url):
+    if not data_url or not isinstance(data_url, str):
+        return None
+    try:
+        payload = data_url.split(',', 1)[1] if data_url.startswith('data:') else data_url
+        reader = ImageReader(io.BytesIO(base64.b64decode(payload)))
+        reader.getSize()
+        return reader
+    except Exception:
+        # Like addImage's try/catch: a broken image is left out, not fatal
+        return None
+
+
+def format_date(value):
+    if not value:
+        return ''
+    try:
+        date = datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return value
+    return f"{ordinal(date.day)} {MONTHS[date.month - 1]}, {date.year}"
+
+
+def format_age(age):
+    if not age or not re.fullmatch(r'\s*-?\d+(\.\d+)?\s*', str(age)):
+        return age or ''
+    return '1 year' if float(age) == 1 else f"{age} years"
+
+
+class Page:
+    """jsPDF-style drawing on a reportlab canvas: millimetres from the top-left corner."""
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+
+    def font(self, bold, size):
+        self.pdf.setFont(FONTS[bold], size)
+
+    def width(self, text, bold, size):
+        return stringWidth(text, FONTS[bold], size) / mm
+
+    def text(self, text, x, y, size, bold=False, align='left'):
+        self.font(bold, size)
+        if align == 'center':
+            self.pdf.drawCentredString(x * mm, (PAGE_HEIGHT - y) * mm, text)
+        elif align == 'right':
+            self.pdf.drawRightString(x * mm, (PAGE_HEIGHT - y) * mm, text)
+        else:
+            self.pdf.drawString(x * mm, (PAGE_HEIGHT - y) * mm, text)
+
+    def fit_text(self, text, x, y, max_width, size, align='left', bold=False):
+        text = str(text)
+        while self.width(text, bold, size) > max_width and size > 6:
+            size -= 0.5
+        self.text(text, x, y, size, bold, align)
+
+    def wrap(self, text, max_width, size, bold=False):
+        """splitTextToSize: greedy word wrap."""
+        lines, line = [], ''
+        for word in str(text).split():
+            candidate = f"{line} {word}".strip()
+            if line and self.width(candidate, bold, size) > max_width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        return lines + [line] if line else lines
+
+    def line(self, x1, y1, x2, y2, width=0.1, dashed=False, gray=0):
+        self.pdf.setLineWidth(width * mm)
+        self.pdf.setStrokeGray(gray)
+        self.pdf.setDash([1 * mm, 1 * mm] if dashed else [])
+        self.pdf.line(x1 * mm, (PAGE_HEIGHT - y1) * mm, x2 * mm, (PAGE_HEIGHT - y2) * mm)
+        self.pdf.setDash([])
+        self.pdf.setStrokeGray(0)
+
+    def rect(self, x, y, w, h, width=0.2, fill=None, stroke=True):
+        self.pdf.setLineWidth(width * mm)
+        if fill is not None:
+            self.pdf.setFillGray(fill)
+        self.pdf.rect(x * mm, (PAGE_HEIGHT - y - h) * mm, w * mm, h * mm, stroke=int(stroke), fill=int(fill is not None))
+        self.pdf.setFillGray(0)
+
+    def image(self, reader, x, y, w, h):
+        if reader is not None:
+            self.pdf.drawImage(reader, x * mm, (PAGE_HEIGHT - y - h) * mm, w * mm, h * mm, mask='auto')
+
+    def field(self, label, value, x, y, total_width, label_width, align='left', bold=False, size=10):
+        """addUnderlinedField: bold label, dotted line, value shrunk to fit."""
+        if label:
+            self.text(label + ':', x, y, 10, bold=True)
+        value_x = x + label_width
+        value_width = total_width - label_width
+        self.line(value_x, y + 1, value_x + value_width, y + 1, dashed=True)
+        text_x = value_x + 2 if align == 'left' else value_x + value_width / 2
+        self.fit_text(value or '', text_x, y, value_width - 2, size, align, bold)
+
+
+def draw_header(page, settings):
+    current_y = MARGIN_Y + CONTENT_MARGIN
+    page.image(cached_image(settings.get('logo')), MARGIN_X + 6, current_y + 1, 28, 26)
+    center_x = MARGIN_X + CARD_WIDTH / 2
+
+    text_y = current_y + 7
+    for line in page.wrap((settings.get('schoolName') or '').upper(), 130, 22, True):
+        page.text(line, center_x, text_y, 22, bold=True, align='center')
+        text_y += 8
+    for part in filter(None, [settings.get('address'), settings.get('district')]):
+        for line in page.wrap(part, 160, 11):
+            page.text(line, center_x, text_y, 11, align='center')
+            text_y += 5
+    text_y += 2
+    page.text("TERMINAL REPORT", center_x, text_y + 5, 16, bold=True, align='center')
+
+    current_y = max(MARGIN_Y + 40, text_y + 10)
+    page.line(MARGIN_X, current_y, MARGIN_X + CARD_WIDTH, current_y, width=0.5)
+    return current_y
+
+
+def draw_student_info(page, current_y, student, report, result, context):
+    settings = context['settings']
+    current_y += 8
+    left_x = MARGIN_X + 6
+    right_x = MARGIN_X + CARD_WIDTH - 6
+    photo_width = 30
+    picture = decode_image(student.get('picture'))
+    info_width = CARD_WIDTH - 12 - photo_width - 5 if student.get('picture') else CARD_WIDTH - 12
+
+    if settings.get('isPromotionTerm'):
+        name_width = (info_width - 4) * 0.65
+        promo_width = (info_width - 4) * 0.35
+        page.field("Name", student.get('name', ''), left_x, current_y, name_width, 15, bold=True, size=14)
+        page.field("Promoted To", report.get('promotedTo') or '', left_x + name_width + 4, current_y, promo_width, 28,
+                   bold=True, size=14)
+    else:
+        page.field("Name", student.get('name', ''), left_x, current_y, info_width, 15, bold=True, size=14)
+
+    gap = 4
+    col = (info_width - gap * 2) / 3
+    current_y += 8
+    page.field("Academic Year", settings.get('academicYear', ''), left_x, current_y, col, 26)
+    page.field("Term", settings.get('academicTerm', ''), left_x + col + gap, current_y, col, 12)
+    page.field("Class", student.get('class', ''), left_x + (col + gap) * 2, current_y, col, 12)
+
+    current_y += 8
+    page.field("Index Number", student.get('indexNumber', ''), left_x, current_y, col, 25)
+    page.field("Age", format_age(student.get('age')), left_x + col + gap, current_y, col, 10)
+    page.field("Gender", student.get('gender', ''), left_x + (col + gap) * 2, current_y, col, 15)
+
+    current_y += 8
+    on_roll = context['numOnRoll']
+    page.field("Total Score", f"{format_score(result['total'])} / {len(context['relevant']) * 100}", left_x, current_y, col, 22)
+    page.field("Aggregate", str(result['aggregate']) if result['aggregate'] > 0 else '-', left_x + col + gap, current_y, col, 18)
+    page.field("Position", f"{ordinal(result['position'])} out of {on_roll} {'student' if on_roll == 1 else 'students'}",
+               left_x + (col + gap) * 2, current_y, col, 16)
+
+    current_y += 8
+    page.field("Vacation Date", format_date(settings.get('vacationDate')), left_x, current_y, col * 1.5, 25)
+    page.field("Reopening Date", format_date(settings.get('reopeningDate')), left_x + col * 1.5 + gap, current_y,
+               col * 1.5, 28)
+
+    if student.get('picture'):
+        photo_y = current_y - 32
+        page.rect(right_x - photo_width, photo_y, photo_width, 36)
+        page.image(picture, right_x - photo_width, photo_y, photo_width, 36)
+    return current_y
+
+
+def draw_table(page, current_y, footer_start_y, result, context):
+    center_x = MARGIN_X + CARD_WIDTH / 2
+    max_table_y = footer_start_y - 5
+    current_y += 15
+    page.text("ACADEMIC PERFORMANCE", center_x, current_y, 12, bold=True, align='center')
+    current_y += 3
+
+    table_x = MARGIN_X + 6
+    table_width = CARD_WIDTH - 12
+    widths = [table_width * f for f in (0.30, 0.11, 0.11, 0.11, 0.08, 0.09, 0.20)]
+    headers = ["SUBJECT", f"CLASS SCORE ({context['classWeight']}%)", f"EXAM SCORE ({context['examWeight']}%)",
+               "TOTAL (100%)", "GRADE", "POSITION", "REMARKS"]
+
+    header_height = 12
+    y = current_y
+    page.rect(table_x, y, table_width, header_height, fill=230 / 255, stroke=False)
+    x = table_x
+    for header, w in zip(headers, widths):
+        page.rect(x, y, w, header_height)
+        # Shrink until the widest word fits, then wrap
+        size = 9
+        while max(page.width(word, True, size) for word in header.split()) > w - 2 and size > 5:
+            size -= 0.5
+        lines = page.wrap(header, w - 2, size, True)
+        line_y = y + header_height / 2 + 1.5 if len(lines) == 1 else y + (header_height - len(lines) * 3.5) / 2 + 2.5
+        for line in lines:
+            page.text(line, x + w / 2, line_y, size, bold=True, align='center')
+            line_y += 3.5
+        x += w
+    y += header_height
+
+    subjects = context['relevant']
+    row_height = 6
+    if subjects and len(subjects) * 6 > max_table_y - y:
+        row_height = max(4.5, (max_table_y - y) / len(subjects))
+
+    for subject in subjects:
+        cell = result['subjects'][subject['id']]
+        baseline = y + row_height / 2 + 1.5
+        x = table_x
+        page.rect(x, y, widths[0], row_height)
+        page.fit_text(subject.get('subject', ''), x + 2, baseline, widths[0] - 4, 11, bold=True)
+        x += widths[0]
+        values = [
+            (format_score(cell['classScore']), False),
+            (format_score(cell['examScore']), False),
+            (format_score(cell['totalScore']), True),
+            (cell['grade'], False),
+            (ordinal(cell['position']) if cell['position'] > 0 else '-', False),
+        ]
+        for (text, bold), w in zip(values, widths[1:6]):
+            page.rect(x, y, w, row_height)
+            page.fit_text(text, x + w / 2, baseline, w - 2, 11, align='center', bold=bold)
+            x += w
+        page.rect(x, y, widths[6], row_height)
+        page.fit_text(cell['remark'], x + 2, baseline, widths[6] - 4, 11, bold=True)
+        y += row_height
+
+
+def draw_footer(page, footer_start_y, key_rows_height, report, context):
+    settings = context['settings']
+    grades = context['sortedGrades']
+    center_x = MARGIN_X + CARD_WIDTH / 2
+    table_x = MARGIN_X + 6
+    table_width = CARD_WIDTH - 12
+    columns = 3
+    per_column = max(1, -(-len(grades) // columns))
+    key_height = 12 + key_rows_height
+
+    # Grading key: white on black
+    current_y = footer_start_y
+    page.rect(table_x, current_y, table_width, key_height, fill=0, stroke=False)
+    page.pdf.setFillGray(1)
+    page.text("GRADING KEY", center_x, current_y + 5, 10, bold=True, align='center')
+    current_y += 12
+    item_width = 55
+    used_columns = -(-len(grades) // per_column) if grades else 0
+    grid_x = center_x - used_columns * item_width / 2
+    for c in range(columns):
+        gy = current_y
+        col_x = grid_x + c * item_width
+        for grade in grades[c * per_column:(c + 1) * per_column]:
+            page.pdf.setFillGray(1)
+            page.text(str(grade.get('name', '')), col_x, gy, 8, bold=True)
+            page.text(f"{grade.get('minScore')}-{grade.get('maxScore')}%", col_x + 12, gy, 8)
+            page.text(str(grade.get('remark', '')), col_x + 32, gy, 8)
+            gy += 4
+        if c < columns - 1:
+            sep_x = grid_x + (c + 1) * item_width - item_width * 0.1
+            page.line(sep_x, current_y - 3, sep_x, current_y + key_rows_height - 3, width=0.2, gray=1)
+    page.pdf.setFillGray(0)
+
+    # Attendance and remarks
+    current_y = footer_start_y + key_height + 5
+    page.field("Attendance", report.get('attendance') or '', MARGIN_X + 6, current_y, 30, 20)
+    page.text("out of", MARGIN_X + 40, current_y, 10)
+    page.field("", context['totalSchoolDays'], MARGIN_X + 54, current_y, 20, 0)
+    current_y += 12
+    for label, key, label_width in (("Conduct", 'conduct', 20), ("Interest", 'interest', 20),
+                                    ("Attitude", 'attitude', 20), ("Class Teacher's Remarks", 'teacherRemark', 40)):
+        page.field(label, report.get(key) or '', MARGIN_X + 6, current_y, table_width, label_width)
+        current_y += 6
+
+    # Signatures and stamp
+    current_y += 6
+    page.line(MARGIN_X + 6, current_y, MARGIN_X + CARD_WIDTH - 6, current_y, width=0.5)
+    current_y += 5
+    sig_y = current_y + 15
+    sig_width = 50
+    class_info = context['classInfo']
+    for sig_x, image, caption, name in (
+            (MARGIN_X + 10, class_info.get('teacherSignature'), "Class Teacher's Signature", class_info.get('teacherName')),
+            (MARGIN_X + CARD_WIDTH / 2 - sig_width / 2, settings.get('headmasterSignature'), "Headmaster's Signature",
+             settings.get('headmasterName'))):
+        page.image(cached_image(image), sig_x + 10, current_y, 30, 15)
+        page.line(sig_x, sig_y, sig_x + sig_width, sig_y, width=0.5, dashed=True)
+        page.text(caption, sig_x + sig_width / 2, sig_y + 4, 9, bold=True, align='center')
+        if name:
+            page.text(f"({name})", sig_x + sig_width / 2, sig_y + 8, 9, align='center')
+
+    stamp_x = MARGIN_X + CARD_WIDTH - 10 - 50
+    gray = 150 / 255
+    for x1, y1, x2, y2 in ((stamp_x, current_y, stamp_x + 50, current_y),
+                           (stamp_x, current_y + 25, stamp_x + 50, current_y + 25),
+                           (stamp_x, current_y, stamp_x, current_y + 25),
+                           (stamp_x + 50, current_y, stamp_x + 50, current_y + 25)):
+        page.line(x1, y1, x2, y2, width=0.5, gray=gray)
+    page.pdf.setFillGray(gray)
+    page.text("Official School Stamp", stamp_x + 25, current_y + 12, 9, bold=True, align='center')
+    page.pdf.setFillGray(0)
+
+    page.text(f"Printed on: {context['printedOn']}", MARGIN_X + 6, MARGIN_Y + CARD_HEIGHT + 4, 8)
+    page.text(POWERED_BY, MARGIN_X + CARD_WIDTH - 6, MARGIN_Y + CARD_HEIGHT + 4, 8, align='right')
+
+
+def draw_card(pdf, student, report, result, context):
+    page = Page(pdf)
+    page.rect(MARGIN_X, MARGIN_Y, CARD_WIDTH, CARD_HEIGHT, width=0.8)
+    current_y = draw_header(page, context['settings'])
+    current_y = draw_student_info(page, current_y, student, report, result, context)
+
+    # The footer is anchored to the bottom border; the table takes what is left
+    key_rows_height = -(-len(context['sortedGrades']) // 3) * 4
+    footer_start_y = MARGIN_Y + CARD_HEIGHT - (12 + key_rows_height + 35 + 35 + 5) - 5
+    draw_table(page, current_y, footer_start_y, result, context)
+    draw_footer(page, footer_start_y, key_rows_height, report, context)
+    pdf.showPage()
+
+
+def init_worker(args, shared):
+    _worker['db'] = connect_from_args(args)
+    _worker['shared'] = shared
+
+
+def render_class(job):
+    """Render one class to its own PDF. Runs in a worker process."""
+    started = time.time()
+    db = _worker['db']
+    shared = _worker['shared']
+    school_ref = db.collection('schools').document(shared['docId'])
+    query = school_ref.collection('students').where(filter=firestore.FieldFilter('class', '==', job['class']))
+    students = sorted((s.to_dict() for s in query.stream()), key=lambda s: (s.get('name') or '').lower())
+    read_seconds = time.time() - started
+
+    context = dict(shared, **job)
+    pdf = canvas.Canvas(job['path'], pagesize=(PAGE_WIDTH * mm, PAGE_HEIGHT * mm), pageCompression=1)
+    pdf.setTitle(f"{shared['settings'].get('schoolName', '')} - {job['class']}")
+    pages = 0
+    for student in students:
+        result = job['results'].get(student.get('id'))
+        if result is None:
+            # Added after the scores were read; rendered on the next run
+            continue
+        draw_card(pdf, student, job['reports'].get(student.get('id')) or {}, result, context)
+        pages += 1
+    if pages:
+        pdf.save()
+    return {'class': job['class'], 'path': job['path'] if pages else None, 'pages': pages,
+            'readSeconds': round(read_seconds, 2), 'seconds': round(time.time() - started, 2)}
+
+
+def file_name(name):
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name or 'Unassigned').strip('_') or 'Unassigned'
+
+
+def plan_jobs(db, doc_id, out_dir, only_classes, page_size):
+    """Shared settings plus one job per class with its computed results."""
+    school_ref = db.collection('schools').document(doc_id)
+    main = school_ref.get(['settings', 'grades', 'reportData', 'classData'])
+    if not main.exists:
+        raise SystemExit(f"❌ School term {doc_id} not found")
+    data = main.to_dict() or {}
+    grades = data.get('grades') or []
+    subjects = [s.to_dict() for s in school_ref.collection('subjects').stream()]
+    assessments = [a.to_dict() for a in school_ref.collection('assessments').stream()]
+    classes = {c.get('name'): c for c in (snap.to_dict() for snap in school_ref.collection('classes').stream())}
+    rosters, _ = load_rosters(school_ref, page_size)
+    totals = load_totals(school_ref, subjects, assessments)
+
+    class_assessments, exam = split_assessments(assessments)
+    today = datetime.date.today()
+    shared = {
+        'docId': doc_id,
+        'settings': data.get('settings') or {},
+        'sortedGrades': sorted(grades, key=lambda g: g.get('minScore', 0), reverse=True),
+        'classWeight': sum(a.get('weight') or 0 for a in class_assessments),
+        'examWeight': (exam or {}).get('weight') or 0,
+        'printedOn': f"{ordinal(today.day)} {MONTHS[today.month - 1]}, {today.year}",
+    }
+    reports = {r.get('studentId'): r for r in data.get('reportData') or []}
+    class_data = {d.get('classId'): d for d in data.get('classData') or []}
+
+    jobs = []
+    for name in sorted(rosters, key=lambda n: (n not in classes, n)):
+        if only_classes and name not in only_classes:
+            continue
+        roster = rosters[name]
+        student_ids = [sid for sid, _, _ in roster]
+        results, relevant = class_results(student_ids, subjects, totals, grades)
+        info = classes.get(name) or {}
+        jobs.append({
+            'class': name,
+            'path': os.path.join(out_dir, f"{file_name(name)}.pdf"),
+            'classInfo': info,
+            'totalSchoolDays': (class_data.get(info.get('id')) or {}).get('totalSchoolDays') or '-',
+            'numOnRoll': len(roster),
+            'relevant': relevant,
+            'results': results,
+            'reports': {sid: reports[sid] for sid in student_ids if sid in reports},
+        })
+    return shared, jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a term's report cards to PDF with a process pool")
+    add_connection_args(parser)
+    parser.add_argument('--school', required=True, help='Term docId, e.g. myschool_20242025_First-Term')
+    parser.add_argument('--classes', nargs='+', help='Only these class names (default: all)')
+    parser.add_argument('--out-dir', help='Output directory (default: reports/<docId>)')
+    parser.add_argument('--workers', type=positive_int, default=os.cpu_count() or 4,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--page-size', type=positive_int, default=500, help='Students read per page (default: 500)')
+    parser.add_argument('--no-merge', action='store_true', help='Only write the per-class PDFs')
+    args = parser.parse_args()
+
+    out_dir = args.out_dir or os.path.join(PROJECT_ROOT, 'reports', args.school)
+    os.makedirs(out_dir, exist_ok=True)
+    db = connect_from_args(args)
+    print(f"🖨️  Rendering report cards of {args.school} from {describe_target(args)}...")
+
+    started = time.time()
+    shared, jobs = plan_jobs(db, args.school, out_dir, set(args.classes or []), args.page_size)
+    plan_seconds = time.time() - started
+    print(f"   Scores of {sum(j['numOnRoll'] for j in jobs)} students in {len(jobs)} class(es) computed in {plan_seconds:.1f}s")
+
+    render_started = time.time()
+    results, failures = [], 0
+    # spawn: gRPC channels do not survive fork, so each worker opens its own client
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(args.workers, max(1, len(jobs))), mp_context=context,
+                             initializer=init_worker, initargs=(args, shared)) as pool:
+        futures = {pool.submit(render_class, job): job['class'] for job in jobs}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"   ❌ {futures[future]}: {e}")
+                continue
+            results.append(result)
+            rate = result['pages'] / result['seconds'] if result['seconds'] else 0
+            print(f"   📄 {result['class']}: {result['pages']} page(s) in {result['seconds']}s "
+                  f"(read {result['readSeconds']}s, {rate:.1f} pages/s)")
+    render_seconds = time.time() - render_started
+    pages = sum(r['pages'] for r in results)
+
+    merged = None
+    if not args.no_merge and results:
+        merge_started = time.time()
+        merged = os.path.join(out_dir, f"{args.school}-reports.pdf")
+        writer = PdfWriter()
+        order = {job['class']: i for i, job in enumerate(jobs)}
+        for result in sorted(results, key=lambda r: order[r['class']]):
+            if result['path']:
+                writer.append(result['path'])
+        with open(merged, 'wb') as f:
+            writer.write(f)
+        print(f"   📚 Merged into {merged} in {time.time() - merge_started:.1f}s")
+
+    total = time.time() - started
+    print(f"\n✅ {pages} page(s) in {total:.1f}s: {pages / render_seconds if render_seconds else 0:.1f} pages/s rendering "
+          f"with {args.workers} worker(s), {pages / total if total else 0:.1f} pages/s overall")
+    print(f"   Output: {merged or out_dir}")
+    if failures:
+        print(f"⚠️  {failures} class(es) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
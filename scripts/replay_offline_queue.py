@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Offline Queue Replay Benchmark
+Generates the offline queues teachers build up while a school's connection is
+down, replays them on reconnect the way the web app would and measures the
+flush: wall time, writes, commit latency, hot main-document writes, retries,
+and whether the final scores are what the teachers last typed.
+
+While offline, saveToCloud (context/DataContext.tsx) pushes the whole value of
+every dirty field onto OfflineQueueManager (services/offlineQueue.ts), so each
+queued item for score entry holds the device's full local `scores` array.
+Replaying an item is a saveDataTransaction call: one set(merge) of
+score_buckets/subject_{id} per subject in the payload plus an update of
+metadata.lastUpdated.scores on the main document, chunked into 450-write
+batches.
+
+Strategies:
+    fifo           OfflineQueueManager.processQueue: every item, oldest first, one at a
+                   time; a failed item stays queued and the pass carries on with the next
+    current_state  the DataContext reconnect effect: one save of the device's current
+                   state, then the queue is cleared
+    coalesced      only the scores the device changed offline, one merge per subject bucket
+    field_merge    update() of scoresMap.{scoreId}.assessmentScores.{assessmentId} for each
+                   mark the device changed, so marks other teachers entered are kept
+
+Each teacher is the class teacher of one class and enters marks for all its
+subjects, so every subject bucket is shared by all devices. --overlap sends a
+share of the sessions into another teacher's class (subject teachers, admin
+corrections), which is where marks can be lost. The expected final mark of
+every edited cell is the one typed last, across all devices.
+
+Data lives in a scratch school document that is reset before each strategy.
+
+Usage:
+    python scripts/replay_offline_queue.py --emulator
+    python scripts/replay_offline_queue.py --emulator --teachers 10 --edits 600 --overlap 0.1
+    python scripts/replay_offline_queue.py --emulator --strategies fifo coalesced --drop-rate 0.05 --json replay.json
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from firestore_admin import (
+    firestore, FieldPath, add_connection_args, connect_from_args, describe_target, positive_int,
+    iter_documents, commit_in_batches, throttle_for, value_size,
+)
+from perf_stats import LatencyHistogram, summary_header, format_summary_row
+from seed_emulator import generate_term, ASSESSMENTS, MARK_MAX
+
+SCRATCH_DOC_ID = 'replay_offline_queue'
+STRATEGIES = ['fifo', 'current_state', 'coalesced', 'field_merge']
+EXAM_ID = str(next(i for i, name, _ in ASSESSMENTS if name == 'Exam'))
+# saveToCloud runs after 10s without typing
+IDLE_SAVE_SECONDS = 10
+
+
+class ConnectionDropped(Exception):
+    """Simulated loss of connection during a save."""
+
+
+# -----------------------------------------------------------------------------
+# QUEUE GENERATION
+# -----------------------------------------------------------------------------
+
+class Device:
+    """One teacher's browser: its local scores and the offline queue it built."""
+
+    def __init__(self, teacher, class_id):
+        self.teacher = teacher
+        self.class_id = class_id
+        self.local = {}
+        self.queue = []
+        # (scoreId, assessmentId) -> mark, last value typed on this device
+        self.changed = {}
+
+    def load_class(self, bucket_scores):
+        # fetchScoresForClass: every subject's scores for the class's students
+        for score_id, score in bucket_scores.items():
+            self.local.setdefault(score_id, score)
+
+    def edit(self, score_id, assessment_id, mark):
+        # Copy on write, so queued snapshots keep the values they were taken with
+        score = dict(self.local[score_id])
+        score['assessmentScores'] = dict(score.get('assessmentScores') or {}, **{assessment_id: [mark]})
+        self.local[score_id] = score
+        self.changed[(score_id, assessment_id)] = mark
+
+    def enqueue(self, timestamp):
+        # saveToCloud offline: the whole `scores` field, as currentData holds it
+        self.queue.append({
+            'id': f"{self.teacher}-{len(self.queue)}", 'timestamp': timestamp,
+            'data': {'scores': list(self.local.values())}, 'retryCount': 0,
+        })
+
+
+def class_of(score):
+    # generate_term numbers students classId * 10000 + n
+    return score['studentId'] // 10000
+
+
+def generate_queues(buckets, args):
+    """
+    Build one Device per teacher from the seeded buckets. Returns (devices,
+    expected) where expected maps (scoreId, assessmentId) to the mark typed last.
+    """
+    rng = random.Random(args.seed)
+    by_class = {}
+    for bucket in buckets.values():
+        for score_id, score in bucket['scoresMap'].items():
+            by_class.setdefault(class_of(score), {})[score_id] = score
+    class_ids = sorted(by_class)
+    subject_ids = sorted({score['subjectId'] for scores in by_class.values() for score in scores.values()})
+
+    devices, latest = [], {}
+    window = args.offline_hours * 3600
+    for teacher in range(args.teachers):
+        device = Device(teacher, class_ids[teacher % len(class_ids)])
+        device.load_class(by_class[device.class_id])
+        clock = rng.uniform(0, window * 0.2)
+        edits = 0
+        while edits < args.edits:
+            class_id = device.class_id
+            if len(class_ids) > 1 and rng.random() < args.overlap:
+                class_id = rng.choice([c for c in class_ids if c != device.class_id])
+                device.load_class(by_class[class_id])
+            subject_id = rng.choice(subject_ids)
+            assessment_id = str(rng.choice(ASSESSMENTS)[0])
+            maximum = 100 if assessment_id == EXAM_ID else rng.choice(MARK_MAX)
+            students = sorted(s for s, score in by_class[class_id].items() if score['subjectId'] == subject_id)
+            # A session: marks for a run of students in register order, saved when the teacher pauses
+            start = rng.randrange(len(students))
+            for n, score_id in enumerate(students[start:start + rng.randint(min(5, len(students)), len(students))]):
+                if edits >= args.edits:
+                    break
+                clock += rng.uniform(4, 30)
+                mark = f"{rng.randint(0, maximum)}/{maximum}"
+                device.edit(score_id, assessment_id, mark)
+                cell = (score_id, assessment_id)
+                if cell not in latest or latest[cell][0] < clock:
+                    latest[cell] = (clock, mark)
+                edits += 1
+                if (n + 1) % args.save_every == 0:
+                    device.enqueue(clock + IDLE_SAVE_SECONDS)
+            device.enqueue(clock + IDLE_SAVE_SECONDS)
+            clock += rng.uniform(60, 900)
+        devices.append(device)
+    return devices, {cell: mark for cell, (_, mark) in latest.items()}
+
+
+# -----------------------------------------------------------------------------
+# REPLAY
+# -----------------------------------------------------------------------------
+
+def clear_scratch(db):
+    school_ref = db.collection('schools').document(SCRATCH_DOC_ID)
+    deletes = [('delete', snap.reference, None) for _, snap in iter_documents(school_ref)]
+    commit_in_batches(db, deletes + [('delete', school_ref, None)])
+    return school_ref
+
+
+def reset_scratch(db, main, buckets):
+    school_ref = clear_scratch(db)
+    operations = [('set', school_ref, main)]
+    operations += [('set', school_ref.collection('score_buckets').document(bucket_id), data)
+                   for bucket_id, data in buckets.items()]
+    commit_in_batches(db, operations)
+    return school_ref
+
+
+def metadata_update(school_ref):
+    return ('update', school_ref, {'metadata.lastUpdated.scores': firestore.SERVER_TIMESTAMP})
+
+
+def save_scores_operations(school_ref, scores):
+    """saveDataTransaction for a {'scores': [...]} payload."""
+    by_subject = {}
+    for score in scores:
+        by_subject.setdefault(score['subjectId'], {})[score['id']] = score
+    buckets = school_ref.collection('score_buckets')
+    operations = [('merge', buckets.document(f"subject_{subject_id}"), {'scoresMap': scores_map})
+                  for subject_id, scores_map in by_subject.items()]
+    return operations + [metadata_update(school_ref)]
+
+
+def field_merge_operations(school_ref, changed):
+    by_bucket = {}
+    for (score_id, assessment_id), mark in changed.items():
+        subject_id = score_id.rsplit('-', 1)[1]
+        path = FieldPath('scoresMap', score_id, 'assessmentScores', assessment_id).to_api_repr()
+        by_bucket.setdefault(subject_id, {})[path] = [mark]
+    buckets = school_ref.collection('score_buckets')
+    operations = [('update', buckets.document(f"subject_{subject_id}"), fields) for subject_id, fields in by_bucket.items()]
+    return operations + [metadata_update(school_ref)]
+
+
+def flush_items(device, strategy, school_ref):
+    """What the device has to send on reconnect, as queue items of (op, ref, data) lists."""
+    if strategy == 'fifo':
+        return [dict(item, ops=save_scores_operations(school_ref, item['data']['scores'])) for item in device.queue]
+    last = max(item['timestamp'] for item in device.queue)
+    if strategy == 'current_state':
+        ops = save_scores_operations(school_ref, list(device.local.values()))
+    elif strategy == 'coalesced':
+        changed = sorted({score_id for score_id, _ in device.changed})
+        ops = save_scores_operations(school_ref, [device.local[score_id] for score_id in changed])
+    else:
+        ops = field_merge_operations(school_ref, device.changed)
+    return [{'id': f"{device.teacher}-flush", 'timestamp': last, 'ops': ops, 'retryCount': 0}]
+
+
+class Replayer:
+    def __init__(self, db, device, strategy, school_ref, args, seed):
+        self.db = db
+        self.device = device
+        self.queue = flush_items(device, strategy, school_ref)
+        self.args = args
+        self.rng = random.Random(seed)
+        self.histogram = LatencyHistogram()
+        self.items = len(self.queue)
+        self.commits = 0
+        self.writes = 0
+        self.main_writes = 0
+        self.bytes = 0
+        self.passes = 0
+        self.out_of_order = 0
+        self.failures = {}
+        self.seconds = 0.0
+
+    def save(self, item):
+        if self.rng.random() < self.args.drop_rate:
+            raise ConnectionDropped()
+        self.commits += commit_in_batches(self.db, item['ops'])
+        self.writes += len(item['ops'])
+        self.main_writes += sum(1 for _, ref, _ in item['ops'] if ref.path.count('/') == 1)
+        self.bytes += sum(value_size(data) for _, _, data in item['ops'])
+
+    def run(self, delay, start_barrier):
+        start_barrier.wait()
+        time.sleep(delay)
+        started = time.monotonic()
+        newest = None
+        # Each pass is one processQueue call on an `online` event
+        while self.queue and self.passes < self.args.max_passes:
+            self.passes += 1
+            for item in list(self.queue):
+                began = time.perf_counter()
+                try:
+                    self.save(item)
+                except Exception as e:
+                    key = type(e).__name__
+                    self.failures[key] = self.failures.get(key, 0) + 1
+                    item['retryCount'] += 1
+                    continue
+                self.histogram.record((time.perf_counter() - began) * 1000)
+                self.queue.remove(item)
+                if newest is not None and item['timestamp'] < newest:
+                    self.out_of_order += 1
+                newest = max(newest or item['timestamp'], item['timestamp'])
+        self.seconds = time.monotonic() - started
+
+
+def verify(db, school_ref, seeded, expected):
+    """Compare every mark with what was typed last (edited cells) or seeded (the rest)."""
+    lost = stale = changed_untouched = 0
+    for bucket_id, seeded_bucket in seeded.items():
+        snap = school_ref.collection('score_buckets').document(bucket_id).get()
+        scores_map = (snap.to_dict() or {}).get('scoresMap') or {}
+        for score_id, seeded_score in seeded_bucket['scoresMap'].items():
+            marks = (scores_map.get(score_id) or {}).get('assessmentScores') or {}
+            for assessment_id, seeded_mark in (seeded_score.get('assessmentScores') or {}).items():
+                actual = marks.get(assessment_id)
+                cell = (score_id, assessment_id)
+                if cell in expected:
+                    if actual != [expected[cell]]:
+                        lost += 1
+                        if actual == seeded_mark:
+                            stale += 1
+                elif actual != seeded_mark:
+                    changed_untouched += 1
+    return {'cells': len(expected), 'lost': lost, 'revertedToSeed': stale, 'changedUntouched': changed_untouched}
+
+
+def run_strategy(db, strategy, main, buckets, devices, expected, args):
+    school_ref = reset_scratch(db, main, buckets)
+    throttle = throttle_for(db)
+    before = throttle.stats()
+    rng = random.Random(args.seed)
+    replayers = [Replayer(db, device, strategy, school_ref, args, args.seed * 1000 + i) for i, device in enumerate(devices)]
+    delays = [rng.uniform(0, args.reconnect_spread) for _ in replayers]
+    start_barrier = threading.Barrier(len(replayers) + 1)
+    with ThreadPoolExecutor(max_workers=len(replayers)) as pool:
+        futures = [pool.submit(r.run, delay, start_barrier) for r, delay in zip(replayers, delays)]
+        start_barrier.wait()
+        started = time.monotonic()
+        for future in futures:
+            future.result()
+        elapsed = time.monotonic() - started
+    after = throttle.stats()
+
+    histogram = LatencyHistogram()
+    failures = {}
+    for r in replayers:
+        histogram.merge(r.histogram)
+        for key, count in r.failures.items():
+            failures[key] = failures.get(key, 0) + count
+    main_writes = sum(r.main_writes for r in replayers)
+    return {
+        'strategy': strategy,
+        'seconds': round(elapsed, 2),
+        'slowestDeviceSeconds': round(max(r.seconds for r in replayers), 2),
+        'items': sum(r.items for r in replayers),
+        'commits': sum(r.commits for r in replayers),
+        'writes': sum(r.writes for r in replayers),
+        'megabytes': round(sum(r.bytes for r in replayers) / 1024 / 1024, 2),
+        'mainDocWritesPerSecond': round(main_writes / elapsed, 1) if elapsed else 0.0,
+        'latency': histogram.summary(),
+        'retries': after['retries'] - before['retries'],
+        'failures': failures,
+        'unsynced': sum(len(r.queue) for r in replayers),
+        'outOfOrder': sum(r.out_of_order for r in replayers),
+        'result': verify(db, school_ref, buckets, expected),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay generated offline queues and measure the reconnect flush")
+    add_connection_args(parser)
+    parser.add_argument('--strategies', nargs='+', choices=STRATEGIES, default=STRATEGIES, help='Strategies to run (default: all)')
+    parser.add_argument('--teachers', type=positive_int, default=6, help='Devices flushing at once (default: 6)')
+    parser.add_argument('--classes', type=positive_int, help='Classes in the school (default: one per teacher)')
+    parser.add_argument('--students', type=positive_int, default=40, help='Students per class (default: 40)')
+    parser.add_argument('--subjects', type=positive_int, default=8, help='Subjects, one bucket each (default: 8)')
+    parser.add_argument('--edits', type=positive_int, default=300, help='Marks each teacher enters offline (default: 300)')
+    parser.add_argument('--save-every', type=positive_int, default=10,
+                        help='Marks between idle saves within a session (default: 10)')
+    parser.add_argument('--offline-hours', type=float, default=3.0, help='Length of the outage (default: 3)')
+    parser.add_argument('--overlap', type=float, default=0.05,
+                        help="Share of sessions spent in another teacher's class (default: 0.05)")
+    parser.add_argument('--reconnect-spread', type=float, default=0.0,
+                        help='Devices come back online over this many seconds (default: 0, all at once)')
+    parser.add_argument('--drop-rate', type=float, default=0.0,
+                        help='Chance a save fails as if the connection dropped again (default: 0)')
+    parser.add_argument('--max-passes', type=positive_int, default=10,
+                        help='processQueue calls before giving up on failed items (default: 10)')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed (default: 7)')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    if not args.emulator:
+        print("❌ The replay rewrites a scratch school; run it against the emulator (--emulator)")
+        sys.exit(1)
+
+    db = connect_from_args(args)
+    _, main_doc, subs = generate_term(args.seed, 0, args.classes or args.teachers, args.students,
+                                      '2024/2025', 'First Term', prefix='replay', subjects=args.subjects)
+    buckets = subs['score_buckets']
+    devices, expected = generate_queues(buckets, args)
+    queued = sum(len(d.queue) for d in devices)
+    print(f"📦 Offline queue replay on {describe_target(args)}: {args.teachers} devices, "
+          f"{args.edits} marks each over {args.offline_hours:g}h, {queued} queued saves, "
+          f"{len(expected)} cells edited")
+
+    results = []
+    print(f"\n{summary_header(14)} {'Flush s':>8} {'Writes':>7} {'MB':>6} {'Main/s':>7} "
+          f"{'Retries':>8} {'Failed':>7} {'Lost':>6}")
+    for strategy in args.strategies:
+        result = run_strategy(db, strategy, main_doc, buckets, devices, expected, args)
+        results.append(result)
+        print(f"{format_summary_row(strategy, result['latency'], 14)} {result['seconds']:>8.2f} "
+              f"{result['writes']:>7} {result['megabytes']:>6.2f} {result['mainDocWritesPerSecond']:>7.1f} "
+              f"{result['retries']:>8} {sum(result['failures'].values()):>7} {result['result']['lost']:>6}")
+        for key, count in result['failures'].items():
+            print(f"{'':<16}{key}: {count}")
+        if result['unsynced']:
+            print(f"{'':<16}⚠️  {result['unsynced']} item(s) still queued after {args.max_passes} passes")
+        if result['outOfOrder']:
+            print(f"{'':<16}🔀 {result['outOfOrder']} item(s) committed after a newer one from the same device")
+        if result['result']['changedUntouched']:
+            print(f"{'':<16}❗ {result['result']['changedUntouched']} mark(s) nobody edited were changed")
+
+    clear_scratch(db)
+    print("\nLatency is per queue item (one saveFn call). Lost = edited marks whose final value "
+          "is not the one typed last.")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'target': describe_target(args), 'config': vars(args), 'results': results}, f, indent=2)
+        print(f"\n📝 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
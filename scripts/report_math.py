@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Report Card Math
+Python port of the score calculations in hooks/useReportCardData.ts, so
+server-side exports and reports produce the same totals, grades, positions and
+aggregates as the web app. Works on compact per-student subject totals rather
+than the whole score list, so callers can stream buckets one subject at a time
+(load_rosters / load_totals read a term that way).
+
+Keep in sync with calculateReportData / getGradeAndRemark.
+"""
+
+import math
+from decimal import Decimal, ROUND_HALF_UP
+
+from firestore_admin import iter_paged
+
+STUDENT_FIELDS = ['id', 'name', 'indexNumber', 'class']
+
+
+def js_round(value):
+    """Math.round: halves round up."""
+    return math.floor(value + 0.5)
+
+
+def _number(text):
+    # Number('') is 0 in JS; anything unparsable is treated as 0 as well
+    try:
+        return float(text.strip()) if text and text.strip() else 0.0
+    except ValueError:
+        return 0.0
+
+
+def split_assessments(assessments):
+    """(class assessments, exam assessment or None): the exam is the first whose name contains 'exam'."""
+    exam = next((a for a in assessments if 'exam' in (a.get('name') or '').lower()), None)
+    classwork = [a for a in assessments if exam is None or a.get('id') != exam.get('id')]
+    return classwork, exam
+
+
+def assessment_score(marks, assessment):
+    """Weighted score of one assessment from its mark strings ("15/20")."""
+    if not marks:
+        return 0.0
+    weight = assessment.get('weight') or 0
+    if 'exam' in (assessment.get('name') or '').lower():
+        # Exam marks are out of 100: average them and scale to the weight
+        average = sum(_number(m.split('/')[0]) for m in marks) / len(marks)
+        return average / 100 * weight
+    total = sum(_number(m.split('/')[0]) for m in marks)
+    maximum = sum(_number(m.split('/')[1]) if '/' in m and _number(m.split('/')[1]) else weight for m in marks)
+    if not maximum:
+        return 0.0
+    return total / maximum * weight
+
+
+def subject_scores(score, class_assessments, exam):
+    """(class score, exam score) of one Score document."""
+    marks = (score or {}).get('assessmentScores') or {}
+
+    def marks_for(assessment):
+        return marks.get(str(assessment.get('id'))) or marks.get(assessment.get('id')) or []
+
+    class_score = sum(assessment_score(marks_for(a), a) for a in class_assessments)
+    exam_score = assessment_score(marks_for(exam), exam) if exam else 0.0
+    return class_score, exam_score
+
+
+def grade_and_remark(mark, grades):
+    rounded = js_round(mark)
+    for grade in sorted(grades, key=lambda g: g.get('minScore', 0), reverse=True):
+        if grade.get('minScore', 0) <= rounded <= grade.get('maxScore', 0):
+            return grade.get('name') or 'N/A', grade.get('remark') or 'N/A'
+    return 'N/A', 'N/A'
+
+
+def numeric_grade_map(grades):
+    """Grade name → 1 for the best grade, 2 for the next, ... (as used for aggregates)."""
+    ordered = sorted(grades, key=lambda g: g.get('maxScore', 0), reverse=True)
+    return {g.get('name'): index + 1 for index, g in enumerate(ordered)}
+
+
+def format_score(score):
+    if score == 0:
+        return '-'
+    # toFixed(1) rounds the exact binary value half up; format() would round half to even
+    text = str(Decimal(score).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP))
+    return text[:-2] if text.endswith('.0') else text
+
+
+def ordinal(n):
+    if n <= 0:
+        return '-'
+    suffixes = ['th', 'st', 'nd', 'rd']
+    v = n % 100
+    # getOrdinal: s[(v - 20) % 10] || s[v] || s[0], where a negative index is undefined
+    if v >= 20 and (v - 20) % 10 < 4:
+        return f"{n}{suffixes[(v - 20) % 10]}"
+    return f"{n}{suffixes[v] if v < 4 else 'th'}"
+
+
+def competition_ranks(totals):
+    """{id: total} → {id: position}; equal totals share a position (1, 2, 2, 4)."""
+    ordered = sorted(totals.items(), key=lambda item: -item[1])
+    ranks = {}
+    rank = 1
+    for index, (key, total) in enumerate(ordered):
+        if index > 0 and total < ordered[index - 1][1]:
+            rank = index + 1
+        ranks[key] = rank
+    return ranks
+
+
+def class_results(student_ids, subjects, totals, grades):
+    """
+    Report figures for every student of one class.
+
+    totals is {subjectId: {studentId: (class score, exam score)}} with an entry
+    for each student who has a Score document in that subject. Returns
+    {studentId: {'subjects': {subjectId: result}, 'total', 'position', 'aggregate'}}
+    where result has classScore, examScore, totalScore, grade, remark, position.
+    """
+    members = set(student_ids)
+    relevant = [s for s in subjects if members & set(totals.get(s['id'], {}))]
+    grade_numbers = numeric_grade_map(grades)
+    least_grade = max(grade_numbers.values(), default=0)
+
+    subject_ranks = {}
+    subject_totals = {}
+    for subject in relevant:
+        by_student = totals.get(subject['id'], {})
+        subject_totals[subject['id']] = {sid: sum(by_student.get(sid, (0.0, 0.0))) for sid in student_ids}
+        subject_ranks[subject['id']] = competition_ranks(subject_totals[subject['id']])
+
+    overall = {sid: sum(subject_totals[s['id']][sid] for s in relevant) for sid in student_ids}
+    overall_ranks = competition_ranks(overall)
+
+    results = {}
+    for sid in student_ids:
+        per_subject = {}
+        core, electives = 0, []
+        for subject in relevant:
+            class_score, exam_score = totals.get(subject['id'], {}).get(sid, (0.0, 0.0))
+            total = class_score + exam_score
+            if total == 0:
+                per_subject[subject['id']] = {'classScore': 0, 'examScore': 0, 'totalScore': 0,
+                                              'grade': '-', 'remark': '-', 'position': 0}
+                if subject.get('type') == 'Core' and grade_numbers:
+                    # Missing core subject counts as the worst grade
+                    core += least_grade
+                continue
+            grade, remark = grade_and_remark(total, grades)
+            per_subject[subject['id']] = {'classScore': class_score, 'examScore': exam_score, 'totalScore': total,
+                                          'grade': grade, 'remark': remark, 'position': subject_ranks[subject['id']][sid]}
+            number = grade_numbers.get(grade)
+            if number:
+                if subject.get('type') == 'Core':
+                    core += number
+                elif subject.get('type') == 'Elective':
+                    electives.append(number)
+        results[sid] = {
+            'subjects': per_subject,
+            'total': overall[sid],
+            'position': overall_ranks[sid] if student_ids else 0,
+            'aggregate': core + sum(sorted(electives)[:2]),
+        }
+    return results, relevant
+
+
+def load_rosters(school_ref, page_size):
+    """{className: [(id, name, indexNumber)]} read page by page, pictures excluded."""
+    rosters = {}
+    count = 0
+    query = school_ref.collection('students').select(STUDENT_FIELDS)
+    for snap in iter_paged(query, page_size):
+        student = snap.to_dict() or {}
+        if student.get('id') is None:
+            continue
+        rosters.setdefault(student.get('class') or '', []).append(
+            (student['id'], student.get('name') or '', student.get('indexNumber') or ''))
+        count += 1
+    return rosters, count
+
+
+def load_totals(school_ref, subjects, assessments):
+    """{subjectId: {studentId: (class score, exam score)}}, one bucket in memory at a time."""
+    class_assessments, exam = split_assessments(assessments)
+    totals = {}
+    for subject in subjects:
+        bucket = school_ref.collection('score_buckets').document(f"subject_{subject['id']}").get()
+        scores_map = (bucket.to_dict() or {}).get('scoresMap') or {}
+        by_student = {}
+        for score in scores_map.values():
+            if score.get('subjectId') == subject['id'] and score.get('studentId') is not None:
+                by_student[score['studentId']] = subject_scores(score, class_assessments, exam)
+        totals[subject['id']] = by_student
+    return totals
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Bulk Term Rollover
+Creates the next term for many schools at once, doing what the "New Term"
+dialog in DataManagement does one school at a time: copy settings, users,
+grades and the password into a new {school}_{year}_{term} document, copy the
+students, classes, subjects and assessments subcollections, and start the
+term with no scores, remarks, class data, sessions or logs.
+
+When the source term has settings.isPromotionTerm, students move to the class
+in their reportData.promotedTo, the academic year is advanced and the flag is
+cleared, exactly as the dialog does. The next term defaults to the dialog's
+choice (First → Second → Third → First Term) and can be overridden.
+
+The new main document is written last and carries a `rollover` marker, so a
+rerun skips finished schools and redoes interrupted ones. Terms that already
+exist without the marker (created from the app) are never touched.
+
+Usage:
+    python scripts/rollover_term.py --emulator --source-year 2024/2025 --source-term "Third Term" --dry-run
+    python scripts/rollover_term.py --database 1 --schools ayirebida_20242025_Third-Term otherschool_20242025_Third-Term
+    python scripts/rollover_term.py --database 1 --schools-file schools.txt --year 2025/2026 --term "First Term" --workers 16
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from firestore_admin import (
+    firestore, add_connection_args, connect_from_args, describe_target, positive_int,
+    iter_schools, create_document_id, parse_doc_id, sanitize_academic_year, sanitize_academic_term,
+    commit_in_batches, Checkpoint, default_checkpoint_path,
+)
+
+COPIED_SUBCOLLECTIONS = ['students', 'classes', 'subjects', 'assessments']
+NEXT_TERM = {'first term': 'Second Term', 'second term': 'Third Term', 'third term': 'First Term'}
+# Every AppDataType key the dialog writes, stamped in metadata.lastUpdated
+TERM_KEYS = ['settings', 'students', 'subjects', 'classes', 'grades', 'assessments', 'scores', 'reportData',
+             'classData', 'users', 'password', 'Access', 'activeSessions', 'userLogs']
+
+
+def next_period(settings):
+    """(year, term) the New Term dialog proposes for these settings."""
+    term = NEXT_TERM.get((settings.get('academicTerm') or '').lower().strip(), 'First Term')
+    year = settings.get('academicYear') or ''
+    if settings.get('isPromotionTerm'):
+        year = re.sub(r'\d+', lambda m: str(int(m.group()) + 1).zfill(len(m.group())), year)
+    return year, term
+
+
+def promote_students(students, settings, report_data, class_names):
+    """Apply reportData.promotedTo when the source term is a promotion term."""
+    promoted, unknown = 0, set()
+    if not settings.get('isPromotionTerm'):
+        return students, promoted, unknown
+    promoted_to = {r.get('studentId'): r.get('promotedTo') for r in report_data or [] if r.get('promotedTo')}
+    result = []
+    for student in students:
+        target = promoted_to.get(student.get('id'))
+        if target:
+            student = dict(student, **{'class': target})
+            promoted += 1
+            if target not in class_names:
+                unknown.add(target)
+        result.append(student)
+    return result, promoted, unknown
+
+
+def rollover_school(db, source_id, args):
+    timings = {}
+    started = time.time()
+    source_ref = db.collection('schools').document(source_id)
+    source = source_ref.get()
+    if not source.exists:
+        return {'status': 'missing source'}
+    data = source.to_dict() or {}
+    settings = dict(data.get('settings') or {})
+
+    year, term = next_period(settings)
+    year, term = args.year or year, args.term or term
+    base = parse_doc_id(source_id)[0]
+    target_id = create_document_id(base, year, term)
+    if target_id == source_id:
+        return {'status': 'target equals source', 'target': target_id}
+
+    target_ref = db.collection('schools').document(target_id)
+    existing = target_ref.get(['rollover'])
+    if existing.exists:
+        marker = (existing.to_dict() or {}).get('rollover') or {}
+        status = 'already rolled over' if marker.get('sourceDocId') == source_id else 'target exists'
+        return {'status': status, 'target': target_id}
+
+    subcollections = {name: [s.to_dict() for s in source_ref.collection(name).stream()] for name in COPIED_SUBCOLLECTIONS}
+    timings['read'] = time.time() - started
+
+    class_names = {c.get('name') for c in subcollections['classes']}
+    students, promoted, unknown = promote_students(subcollections['students'], settings, data.get('reportData'), class_names)
+    subcollections['students'] = students
+
+    new_settings = dict(settings, academicYear=year, academicTerm=term, isPromotionTerm=False)
+    users = [dict(u, isReadOnly=False) for u in data.get('users') or []]
+    main = {
+        'settings': new_settings,
+        'users': users,
+        'grades': data.get('grades') or [],
+        'password': data.get('password'),
+        'Access': True,
+        'reportData': [],
+        'classData': [],
+        'activeSessions': {},
+        'userLogs': [],
+        'metadata': {'lastUpdated': {key: firestore.SERVER_TIMESTAMP for key in TERM_KEYS}},
+        'rollover': {'sourceDocId': source_id, 'completedAt': firestore.SERVER_TIMESTAMP},
+    }
+
+    result = {
+        'status': 'would roll over' if args.dry_run else 'rolled over',
+        'target': target_id,
+        'docs': sum(len(items) for items in subcollections.values()),
+        'promoted': promoted,
+        'unknownClasses': sorted(unknown),
+    }
+    if args.dry_run:
+        result['seconds'] = round(time.time() - started, 2)
+        return result
+
+    write_started = time.time()
+    operations = []
+    for name, items in subcollections.items():
+        for item in items:
+            if item.get('id') is not None:
+                operations.append(('set', target_ref.collection(name).document(str(item['id'])), item))
+    commit_in_batches(db, operations)
+    final = []
+    if args.lock_current_users:
+        final.append(('update', source_ref, {
+            'users': [dict(u, isReadOnly=True) for u in data.get('users') or []],
+            'metadata.lastUpdated.users': firestore.SERVER_TIMESTAMP,
+        }))
+    # Main document last: its marker is what makes the rollover count as done
+    final.append(('set', target_ref, main))
+    commit_in_batches(db, final)
+    timings['write'] = time.time() - write_started
+    result['seconds'] = round(time.time() - started, 2)
+    result['readSeconds'] = round(timings['read'], 2)
+    result['writeSeconds'] = round(timings['write'], 2)
+    return result
+
+
+def select_sources(db, args):
+    if args.schools:
+        return list(args.schools)
+    if args.schools_file:
+        with open(args.schools_file, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    suffix = f"_{sanitize_academic_year(args.source_year)}_{sanitize_academic_term(args.source_term)}"
+    return [snap.id for snap in iter_schools(db, prefix=args.prefix, field_paths=[]) if snap.id.endswith(suffix)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create the next term for many schools at once")
+    add_connection_args(parser)
+    source = parser.add_argument_group('source terms (pick one)')
+    source.add_argument('--schools', nargs='+', help='Source term docIds')
+    source.add_argument('--schools-file', help='File with one source term docId per line')
+    source.add_argument('--source-year', help='Roll over every school in this academic year ...')
+    source.add_argument('--source-term', help='... and term (e.g. "Third Term")')
+    parser.add_argument('--prefix', help='With --source-year/--source-term, only docIds starting with this prefix')
+    parser.add_argument('--year', help='New academic year (default: as the New Term dialog proposes)')
+    parser.add_argument('--term', help='New academic term (default: as the New Term dialog proposes)')
+    parser.add_argument('--lock-current-users', action='store_true', help='Mark users of the source term read-only')
+    parser.add_argument('--workers', type=positive_int, default=8, help='Schools rolled over at once (default: 8)')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: .checkpoints/rollover_term-<db>.json)')
+    parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be created')
+    args = parser.parse_args()
+
+    if not (args.schools or args.schools_file or (args.source_year and args.source_term)):
+        parser.error('give --schools, --schools-file or both --source-year and --source-term')
+
+    db = connect_from_args(args)
+    checkpoint = Checkpoint(None if args.dry_run else (args.checkpoint or default_checkpoint_path('rollover_term', args)))
+    if args.restart:
+        checkpoint.state = {'done': {}}
+
+    sources = [s for s in select_sources(db, args) if not checkpoint.is_done(s)]
+    print(f"📆 Rolling over {len(sources)} school term(s) in {describe_target(args)}...")
+
+    started = time.time()
+    counts = {}
+    failures = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(rollover_school, db, source_id, args): source_id for source_id in sources}
+        for future in as_completed(futures):
+            source_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"   ❌ {source_id}: {e}")
+                continue
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+            line = f"   {source_id} → {result.get('target', '?')}: {result['status']}"
+            if 'docs' in result:
+                line += f", {result['docs']} docs"
+                if result['promoted']:
+                    line += f", {result['promoted']} promoted"
+                line += f" in {result['seconds']}s"
+                if 'readSeconds' in result:
+                    line += f" (read {result['readSeconds']}s, write {result['writeSeconds']}s)"
+            print(line)
+            if result.get('unknownClasses'):
+                print(f"      ⚠️  promotedTo names no existing class: {', '.join(result['unknownClasses'])}")
+            if result['status'] in ('rolled over', 'already rolled over'):
+                checkpoint.mark(source_id, {'target': result['target'], 'seconds': result.get('seconds')})
+
+    summary = ', '.join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"\n✅ {summary or 'nothing to do'} in {time.time() - started:.1f}s")
+    if failures or counts.get('target exists') or counts.get('missing source'):
+        print(f"⚠️  {failures} failed; {counts.get('target exists', 0)} target(s) already existed; "
+              f"{counts.get('missing source', 0)} source(s) missing")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Compact Score Bucket Encoding
+Encodes a score bucket (scoresMap of Score objects whose marks are strings such
+as "15/20") into the packed-v1 layout and back, losslessly.
+
+Firestore stores every number as 8 bytes, so numeric arrays are no smaller than
+"15/20" strings. packed-v1 therefore keeps the marks in a single bytes field:
+
+    format         'packed-v1'
+    subjectId      bucket subject
+    assessmentIds  column order of the assessments
+    rows           bytes, one record per score, little endian:
+                     uint32 studentId
+                     per assessment: uint8 mark count (255 = key absent)
+                                     count × (uint16 numerator×10, uint16 denominator×10)
+    extras         map scoreId -> original Score for anything rows cannot hold exactly
+
+A denominator of 0 encodes a bare mark without "/max".
+
+Usage:
+    python scripts/score_encoding.py benchmark --students 50 500 3000
+    python scripts/score_encoding.py benchmark --emulator --students 1000 --reads 50
+    python scripts/score_encoding.py convert --database 1 --prefix myschool --dry-run
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import random
+import re
+import statistics
+import struct
+import sys
+import time
+
+from firestore_admin import (
+    add_connection_args, connect_from_args, describe_target, positive_int,
+    iter_schools, document_size, commit_in_batches, throttle_for,
+)
+
+FORMAT = 'packed-v1'
+PACKED_COLLECTION = 'score_buckets_packed'
+ABSENT = 255
+SCALE = 10
+MAX_UNITS = 0xFFFF
+MARK = re.compile(r'^(\d+(?:\.\d)?)(?:/(\d+(?:\.\d)?))?$')
+
+
+def format_number(units):
+    """Render a value stored in tenths the way JavaScript's String(Number) would."""
+    whole, tenth = divmod(units, SCALE)
+    return str(whole) if tenth == 0 else f"{whole}.{tenth}"
+
+
+def encode_mark(text):
+    """Return (num_units, den_units) for a mark string, or None if it cannot be stored exactly."""
+    if not isinstance(text, str):
+        return None
+    match = MARK.match(text)
+    if not match:
+        return None
+    num = round(float(match.group(1)) * SCALE)
+    den = round(float(match.group(2)) * SCALE) if match.group(2) is not None else 0
+    if num > MAX_UNITS or den > MAX_UNITS or (match.group(2) is not None and den == 0):
+        return None
+    if decode_mark(num, den) != text:
+        return None
+    return num, den
+
+
+def decode_mark(num, den):
+    return format_number(num) if den == 0 else f"{format_number(num)}/{format_number(den)}"
+
+
+def _encode_row(score, subject_id, assessment_ids):
+    student_id = score.get('studentId')
+    if not isinstance(student_id, int) or not 0 <= student_id <= 0xFFFFFFFF:
+        return None
+    if score.get('subjectId') != subject_id or score.get('id') != f"{student_id}-{subject_id}":
+        return None
+    if set(score) - {'id', 'studentId', 'subjectId', 'assessmentScores'}:
+        return None
+    marks_by_assessment = score.get('assessmentScores')
+    if not isinstance(marks_by_assessment, dict):
+        return None
+    if not set(marks_by_assessment) <= {str(assessment_id) for assessment_id in assessment_ids}:
+        return None
+
+    out = bytearray(struct.pack('<I', student_id))
+    for assessment_id in assessment_ids:
+        marks = marks_by_assessment.get(str(assessment_id))
+        if marks is None:
+            out.append(ABSENT)
+            continue
+        if not isinstance(marks, list) or len(marks) >= ABSENT:
+            return None
+        out.append(len(marks))
+        for text in marks:
+            pair = encode_mark(text)
+            if pair is None:
+                return None
+            out += struct.pack('<HH', *pair)
+    return bytes(out)
+
+
+def encode_bucket(subject_id, scores_map):
+    """Encode a bucket's scoresMap into a packed-v1 document."""
+    assessment_ids = sorted({
+        int(key) for score in scores_map.values() if isinstance(score, dict)
+        for key in (score.get('assessmentScores') or {}) if isinstance(key, str) and key.isdigit() and key == str(int(key))
+    })
+    rows, extras = bytearray(), {}
+    for score_id, score in sorted(scores_map.items(), key=lambda item: str(item[0])):
+        row = _encode_row(score, subject_id, assessment_ids) if isinstance(score, dict) and score_id == score.get('id') else None
+        if row is None:
+            extras[score_id] = score
+        else:
+            rows += row
+    return {
+        'format': FORMAT,
+        'subjectId': subject_id,
+        'assessmentIds': assessment_ids,
+        'rows': bytes(rows),
+        'extras': extras,
+    }
+
+
+def iter_rows(packed):
+    """Yield (studentId, {assessmentId: [(num, den), ...]}) with marks as floats, without building strings."""
+    data, offset = packed['rows'], 0
+    assessment_ids = packed['assessmentIds']
+    while offset < len(data):
+        (student_id,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        marks = {}
+        for assessment_id in assessment_ids:
+            count = data[offset]
+            offset += 1
+            if count == ABSENT:
+                continue
+            values = struct.unpack_from(f'<{2 * count}H', data, offset)
+            offset += 4 * count
+            marks[assessment_id] = [(values[i] / SCALE, values[i + 1] / SCALE) for i in range(0, len(values), 2)]
+        yield student_id, marks
+
+
+def decode_bucket(packed):
+    """Rebuild the original scoresMap from a packed-v1 document."""
+    if packed.get('format') != FORMAT:
+        raise ValueError(f"Unsupported bucket format: {packed.get('format')}")
+    subject_id = packed['subjectId']
+    data, offset = packed['rows'], 0
+    scores = {}
+    while offset < len(data):
+        (student_id,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        assessment_scores = {}
+        for assessment_id in packed['assessmentIds']:
+            count = data[offset]
+            offset += 1
+            if count == ABSENT:
+                continue
+            values = struct.unpack_from(f'<{2 * count}H', data, offset)
+            offset += 4 * count
+            assessment_scores[str(assessment_id)] = [decode_mark(values[i], values[i + 1]) for i in range(0, len(values), 2)]
+        score_id = f"{student_id}-{subject_id}"
+        scores[score_id] = {
+            'id': score_id,
+            'studentId': student_id,
+            'subjectId': subject_id,
+            'assessmentScores': assessment_scores,
+        }
+    scores.update(packed.get('extras') or {})
+    return scores
+
+
+def parse_legacy(scores_map):
+    """What every client load does today: split each "n/d" string into numbers."""
+    parsed = {}
+    for score in scores_map.values():
+        marks = {}
+        for assessment_id, values in (score.get('assessmentScores') or {}).items():
+            pairs = []
+            for text in values:
+                num, _, den = text.partition('/')
+                pairs.append((float(num), float(den) if den else 0.0))
+            marks[int(assessment_id)] = pairs
+        parsed[score['studentId']] = marks
+    return parsed
+
+
+# -----------------------------------------------------------------------------
+# BENCHMARK
+# -----------------------------------------------------------------------------
+
+def synthetic_bucket(rng, subject_id, students, assessments=5, max_marks=3):
+    """A bucket shaped like real data: 1-3 marks per assessment, mostly whole numbers."""
+    scores = {}
+    for student_id in range(1, students + 1):
+        marks = {}
+        for assessment_id in range(1, assessments + 1):
+            maximum = 100 if assessment_id == assessments else rng.choice([10, 20, 30, 50])
+            count = rng.randint(1, max_marks)
+            values = []
+            for _ in range(count):
+                mark = rng.randint(0, maximum * 2) / 2 if rng.random() < 0.1 else rng.randint(0, maximum)
+                values.append(f"{format_number(round(mark * SCALE))}/{maximum}")
+            marks[str(assessment_id)] = values
+        score_id = f"{student_id}-{subject_id}"
+        scores[score_id] = {'id': score_id, 'studentId': student_id, 'subjectId': subject_id, 'assessmentScores': marks}
+    return scores
+
+
+def pct(size):
+    return f"{100 * size / (1024 * 1024):.1f}%"
+
+
+def time_call(fn, arg, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def read_latency(db, path, data, reads):
+    ref = db.document(path)
+    throttle = throttle_for(db)
+    throttle.call(ref.set, data, writes=1, documents=[ref.path])
+    samples = []
+    for _ in range(reads):
+        started = time.perf_counter()
+        ref.get()
+        samples.append((time.perf_counter() - started) * 1000)
+    throttle.call(ref.delete, writes=1, documents=[ref.path])
+    samples.sort()
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def run_benchmark(args):
+    rng = random.Random(args.seed)
+    db = connect_from_args(args) if args.emulator else None
+    if db is not None:
+        print(f"⏱️  Read latency measured on {describe_target(args)}")
+
+    header = (f"{'Students':>8} {'Legacy B':>11} {'Packed B':>10} {'Ratio':>6} {'Parse ms':>9} {'Decode ms':>10} "
+              f"{'% limit old/new':>16}")
+    if db is not None:
+        header += f" {'Read p50 old/new ms':>20}"
+    print(header)
+    print("-" * len(header))
+
+    for students in args.students:
+        legacy = synthetic_bucket(rng, 1, students, args.assessments, args.max_marks)
+        packed = encode_bucket(1, legacy)
+        if decode_bucket(packed) != legacy:
+            print(f"❌ Round trip failed for {students} students")
+            sys.exit(1)
+
+        path = 'schools/_benchmarks/score_buckets/subject_1'
+        legacy_bytes = document_size(path, {'scoresMap': legacy})
+        packed_bytes = document_size(path, packed)
+        parse_ms = time_call(parse_legacy, legacy, args.repeat)
+        decode_ms = time_call(lambda p: list(iter_rows(p)), packed, args.repeat)
+        line = (f"{students:>8} {legacy_bytes:>11,} {packed_bytes:>10,} {legacy_bytes / packed_bytes:>5.1f}x "
+                f"{parse_ms:>9.2f} {decode_ms:>10.2f} {pct(legacy_bytes):>8} / {pct(packed_bytes):<5}")
+        if db is not None:
+            if legacy_bytes < 1024 * 1024:
+                old_p50, _ = read_latency(db, f'_benchmarks/score_encoding_legacy_{students}', {'scoresMap': legacy}, args.reads)
+            else:
+                old_p50 = float('nan')
+            new_p50, _ = read_latency(db, f'_benchmarks/score_encoding_packed_{students}', packed, args.reads)
+            line += f" {old_p50:>9.2f} / {new_p50:<8.2f}"
+        print(line)
+        if packed['extras']:
+            print(f"         ({len(packed['extras'])} scores kept verbatim in extras)")
+
+
+# -----------------------------------------------------------------------------
+# CONVERTER
+# -----------------------------------------------------------------------------
+
+def run_convert(args):
+    db = connect_from_args(args)
+    print(f"🔄 Converting score buckets in {describe_target(args)} → {PACKED_COLLECTION}{' (dry run)' if args.dry_run else ''}")
+    totals = {'buckets': 0, 'before': 0, 'after': 0, 'extras': 0}
+    for school in iter_schools(db, prefix=args.prefix, field_paths=[]):
+        operations = []
+        for snap in school.reference.collection('score_buckets').stream():
+            data = snap.to_dict() or {}
+            scores_map = data.get('scoresMap') or {}
+            subject_id = int(snap.id.split('_')[-1]) if snap.id.split('_')[-1].isdigit() else None
+            if subject_id is None:
+                continue
+            packed = encode_bucket(subject_id, scores_map)
+            if decode_bucket(packed) != scores_map:
+                print(f"   ❌ {snap.reference.path}: round trip mismatch, skipped")
+                continue
+            totals['buckets'] += 1
+            totals['before'] += document_size(snap.reference.path, data)
+            totals['after'] += document_size(snap.reference.path, packed)
+            totals['extras'] += len(packed['extras'])
+            operations.append(('set', school.reference.collection(PACKED_COLLECTION).document(snap.id), packed))
+
+        if operations and not args.dry_run:
+            commit_in_batches(db, operations)
+            for _, ref, packed in operations:
+                stored = ref.get().to_dict()
+                original = school.reference.collection('score_buckets').document(ref.id).get().to_dict() or {}
+                if decode_bucket(stored) != (original.get('scoresMap') or {}):
+                    print(f"   ⚠️  {ref.path}: stored copy differs from source (bucket edited during conversion?)")
+        if operations:
+            print(f"   🍱 {school.id}: {len(operations)} buckets")
+
+    if totals['buckets']:
+        print(f"\n✅ {totals['buckets']} buckets: {totals['before']:,} → {totals['after']:,} bytes "
+              f"({totals['before'] / max(totals['after'], 1):.1f}x smaller), {totals['extras']} scores in extras")
+    else:
+        print("\nNo score buckets found")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Packed score bucket encoding: benchmark and converter")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    bench = add_connection_args(sub.add_parser('benchmark', help='Compare legacy and packed buckets'))
+    bench.add_argument('--students', type=positive_int, nargs='+', default=[50, 200, 1000, 3000],
+                       help='Bucket sizes to test (default: 50 200 1000 3000)')
+    bench.add_argument('--assessments', type=positive_int, default=5, help='Assessments per subject (default: 5)')
+    bench.add_argument('--max-marks', type=positive_int, default=3, help='Max marks per assessment (default: 3)')
+    bench.add_argument('--repeat', type=positive_int, default=20, help='Parse timing repetitions (default: 20)')
+    bench.add_argument('--reads', type=positive_int, default=30, help='Emulator reads per format (default: 30)')
+    bench.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+
+    convert = add_connection_args(sub.add_parser('convert', help=f'Write packed copies to {PACKED_COLLECTION}'))
+    convert.add_argument('--prefix', help='Only convert docIds starting with this prefix')
+    convert.add_argument('--dry-run', action='store_true', help='Only report sizes')
+
+    args = parser.parse_args()
+    {'benchmark': run_benchmark, 'convert': run_convert}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
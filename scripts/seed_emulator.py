@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Emulator Seeder
+Deterministically generates N schools × M classes × K students with subjects,
+assessments, grades, users, report data and fully populated score_buckets in
+the shapes defined by types.ts, and writes them to the Firestore emulator with
+concurrent batched commits.
+
+The same --seed always produces the same documents, so benchmarks and tests can
+rely on exact ids and counts.
+
+Usage:
+    python scripts/seed_emulator.py --schools 50 --classes 6 --students 40
+    python scripts/seed_emulator.py --schools 5 --terms 3 --classes 2 --students 10 --seed 7 --prefix demo
+
+Requires Firebase Admin SDK
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from firestore_admin import (
+    BATCH_SIZE, firestore, add_connection_args, connect_from_args, describe_target, positive_int,
+    create_document_id, commit_in_batches,
+)
+
+# Mirrors INITIAL_SUBJECTS / INITIAL_ASSESSMENTS / INITIAL_GRADES in constants.ts
+SUBJECTS = [
+    (1, 'English Language', 'Core'), (2, 'Science', 'Core'), (3, 'Mathematics', 'Core'),
+    (4, 'Social Studies', 'Core'), (5, 'Computing', 'Elective'), (6, 'Career Technology', 'Elective'),
+    (7, 'Creative Arts & Design', 'Elective'), (8, 'Religious & Moral Education', 'Elective'),
+    (9, 'Ghanaian Language', 'Elective'),
+]
+ASSESSMENTS = [(1, 'Class Exercise', 10), (2, 'Class Test', 15), (3, 'Assignment', 10), (4, 'Group Work', 15), (5, 'Exam', 50)]
+GRADES = [
+    (1, '1', 80, 100, 'Excellent'), (2, '2', 70, 79, 'Very Good'), (3, '3', 65, 69, 'Good'),
+    (4, '4', 60, 64, 'High Average'), (5, '5', 55, 59, 'Average'), (6, '6', 50, 54, 'Pass'),
+    (7, '7', 40, 49, 'Weak Pass'), (8, '8', 35, 39, 'Lower'), (9, '9', 0, 34, 'Lowest'),
+]
+CLASS_NAMES = ['KG 1', 'KG 2', 'Basic 1', 'Basic 2', 'Basic 3', 'Basic 4', 'Basic 5', 'Basic 6', 'JHS 1', 'JHS 2', 'JHS 3']
+FIRST_NAMES = ['Kwame', 'Ama', 'Kofi', 'Akosua', 'Yaw', 'Abena', 'Kojo', 'Efua', 'Kwabena', 'Adwoa',
+               'Kwaku', 'Akua', 'Fiifi', 'Esi', 'Yaa', 'Nana', 'Selasi', 'Elikem', 'Mawuli', 'Dzifa']
+LAST_NAMES = ['Mensah', 'Owusu', 'Boateng', 'Asante', 'Osei', 'Agyeman', 'Addo', 'Darko', 'Appiah', 'Amoah',
+              'Frimpong', 'Ofori', 'Tetteh', 'Quaye', 'Nkrumah', 'Ansah', 'Badu', 'Sarpong', 'Gyamfi', 'Kumi']
+CONDUCT = ['Good', 'Very Good', 'Excellent', 'Satisfactory']
+REMARKS = ['Hardworking', 'Can do better', 'Excellent performance', 'Keep it up', 'Needs improvement']
+MARK_MAX = [10, 20, 30]
+TERMS = ['First Term', 'Second Term', 'Third Term']
+
+
+def mark_string(rng, maximum, ability):
+    """A mark out of maximum centred on the student's ability (0-1)."""
+    value = max(0, min(maximum, round(rng.gauss(ability * maximum, maximum * 0.12))))
+    return f"{value}/{maximum}"
+
+
+def generate_term(seed, school_index, classes, students_per_class, year, term, prefix='seed', subjects=None):
+    """
+    Build one school term. Returns (docId, main_document, {subcollection: {docId: data}}).
+    Output depends only on the arguments.
+    """
+    rng = random.Random(f"{seed}:{school_index}")
+    # Rosters depend only on the school; marks and remarks change every term.
+    term_rng = random.Random(f"{seed}:{school_index}:{year}:{term}")
+    school_name = f"{prefix.title()} School {school_index:03d}"
+    doc_id = create_document_id(school_name, year, term)
+    subject_rows = SUBJECTS[:subjects] if subjects else SUBJECTS
+
+    class_docs, students, report_data, class_data = {}, {}, [], []
+    for c in range(classes):
+        class_id = c + 1
+        name = CLASS_NAMES[c] if c < len(CLASS_NAMES) else f"Class {class_id}"
+        class_docs[str(class_id)] = {
+            'id': class_id, 'name': name,
+            'teacherName': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", 'teacherSignature': '',
+        }
+        class_data.append({'classId': class_id, 'totalSchoolDays': '60'})
+        for s in range(students_per_class):
+            student_id = class_id * 10000 + s + 1
+            students[str(student_id)] = {
+                'id': student_id,
+                'name': f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)} {s + 1}",
+                'indexNumber': f"{school_index:03d}{class_id:02d}{s + 1:03d}",
+                'gender': 'Male' if rng.random() < 0.5 else 'Female',
+                'class': name,
+                'dateOfBirth': f"{2008 + c // 2}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                'age': str(15 - c // 2),
+                'picture': '',
+            }
+            report_data.append({
+                'studentId': student_id,
+                'attendance': str(term_rng.randint(40, 60)),
+                'conduct': term_rng.choice(CONDUCT),
+                'interest': term_rng.choice(['Sports', 'Reading', 'Music', 'Art']),
+                'attitude': term_rng.choice(CONDUCT),
+                'teacherRemark': term_rng.choice(REMARKS),
+            })
+
+    buckets = {}
+    for subject_id, _, _ in subject_rows:
+        scores = {}
+        for student in students.values():
+            base = random.Random(f"{seed}:{school_index}:{student['id']}").uniform(0.35, 0.95)
+            ability = min(0.98, max(0.05, base + term_rng.uniform(-0.08, 0.08)))
+            marks = {}
+            for assessment_id, name, _ in ASSESSMENTS:
+                if name == 'Exam':
+                    marks[str(assessment_id)] = [mark_string(term_rng, 100, ability)]
+                else:
+                    marks[str(assessment_id)] = [
+                        mark_string(term_rng, term_rng.choice(MARK_MAX), ability) for _ in range(term_rng.randint(1, 2))
+                    ]
+            score_id = f"{student['id']}-{subject_id}"
+            scores[score_id] = {'id': score_id, 'studentId': student['id'], 'subjectId': subject_id, 'assessmentScores': marks}
+        buckets[f"subject_{subject_id}"] = {'scoresMap': scores}
+
+    class_names = [c['name'] for c in class_docs.values()]
+    subject_names = [name for _, name, _ in subject_rows]
+    users = [{
+        'id': 1, 'name': 'Admin', 'role': 'Admin', 'allowedClasses': class_names,
+        'allowedSubjects': subject_names, 'passwordHash': 'seed', 'notifications': [],
+    }]
+    for c, name in enumerate(class_names):
+        users.append({
+            'id': 100 + c, 'name': class_docs[str(c + 1)]['teacherName'], 'role': 'Teacher',
+            'allowedClasses': [name], 'allowedSubjects': subject_names, 'passwordHash': 'seed', 'notifications': [],
+        })
+
+    now = datetime.datetime(2025, 1, 6, 8, 0, tzinfo=datetime.timezone.utc)
+    main = {
+        'settings': {
+            'schoolName': school_name, 'district': f"District {school_index % 10}", 'address': 'P.O. Box 1',
+            'academicYear': year, 'academicTerm': term, 'vacationDate': '', 'reopeningDate': '',
+            'headmasterName': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", 'logo': '', 'headmasterSignature': '',
+            'isDataEntryLocked': False, 'autoAssignIndexNumbers': False, 'indexNumberGlobalPrefix': '',
+            'indexNumberGlobalSuffix': '', 'indexNumberCounterDigits': 3, 'indexNumberPerClass': False,
+            'indexNumberAutoSort': False, 'indexNumberGlobalCounter': 1,
+        },
+        'grades': [{'id': g[0], 'name': g[1], 'minScore': g[2], 'maxScore': g[3], 'remark': g[4]} for g in GRADES],
+        'reportData': report_data,
+        'classData': class_data,
+        'users': users,
+        'userLogs': [],
+        'activeSessions': {},
+        'deviceCredentials': [],
+        'password': 'password',
+        'Access': True,
+        'metadata': {'lastUpdated': {key: now for key in ('settings', 'students', 'classes', 'subjects', 'assessments', 'scores')}},
+    }
+    subcollections = {
+        'classes': class_docs,
+        'students': students,
+        'subjects': {str(i): {'id': i, 'subject': n, 'type': t, 'facilitator': '', 'signature': ''} for i, n, t in subject_rows},
+        'assessments': {str(i): {'id': i, 'name': n, 'weight': w} for i, n, w in ASSESSMENTS},
+        'score_buckets': buckets,
+    }
+    return doc_id, main, subcollections
+
+
+def academic_periods(first_year, count):
+    """Yield (year, term) for count consecutive terms starting at First Term of first_year ('2024/2025')."""
+    start = int(first_year.split('/')[0])
+    for index in range(count):
+        year = start + index // len(TERMS)
+        yield f"{year}/{year + 1}", TERMS[index % len(TERMS)]
+
+
+def term_operations(db, doc_id, main, subcollections):
+    school_ref = db.collection('schools').document(doc_id)
+    operations = [('set', school_ref, main)]
+    for name, docs in subcollections.items():
+        for child_id, data in docs.items():
+            operations.append(('set', school_ref.collection(name).document(child_id), data))
+    base = doc_id.split('_')[0]
+    operations.append(('set', db.collection('subscriptions').document(base), {
+        'maxStudents': 100000, 'maxClass': 10000,
+        'expiryDate': datetime.datetime(2099, 12, 31, tzinfo=datetime.timezone.utc),
+        'lastUpdated': firestore.SERVER_TIMESTAMP,
+    }))
+    return operations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the Firestore emulator with deterministic school data")
+    add_connection_args(parser)
+    parser.add_argument('--schools', type=positive_int, default=50, help='Number of schools (default: 50)')
+    parser.add_argument('--classes', type=positive_int, default=6, help='Classes per school (default: 6)')
+    parser.add_argument('--students', type=positive_int, default=40, help='Students per class (default: 40)')
+    parser.add_argument('--subjects', type=positive_int, help=f'Subjects per school (default: all {len(SUBJECTS)})')
+    parser.add_argument('--year', default='2024/2025', help='First academic year (default: 2024/2025)')
+    parser.add_argument('--terms', type=positive_int, default=1, help='Consecutive terms per school, from First Term (default: 1)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    parser.add_argument('--prefix', default='seed', help='School name prefix (default: seed)')
+    parser.add_argument('--workers', type=positive_int, default=16, help='Concurrent batch commits (default: 16)')
+    args = parser.parse_args()
+
+    if not args.emulator:
+        print("❌ The seeder only writes to the emulator; pass --emulator")
+        sys.exit(1)
+
+    db = connect_from_args(args)
+    print(f"🌱 Seeding {args.schools} schools × {args.terms} term(s) × {args.classes} classes × {args.students} students into {describe_target(args)}")
+
+    started = time.time()
+    operations = []
+    for school_index in range(1, args.schools + 1):
+        for year, term in academic_periods(args.year, args.terms):
+            doc_id, main_doc, subcollections = generate_term(
+                args.seed, school_index, args.classes, args.students, year, term, args.prefix, args.subjects)
+            operations.extend(term_operations(db, doc_id, main_doc, subcollections))
+    generated = time.time() - started
+
+    chunks = [operations[i:i + BATCH_SIZE] for i in range(0, len(operations), BATCH_SIZE)]
+    write_started = time.time()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(lambda chunk: commit_in_batches(db, chunk), chunks))
+    write_seconds = max(time.time() - write_started, 1e-9)
+
+    print(f"✅ Wrote {len(operations):,} docs in {len(chunks)} batches")
+    print(f"   Generate: {generated:.2f}s, write: {write_seconds:.2f}s ({len(operations) / write_seconds:,.0f} docs/s)")
+    print("   Login with any seeded school name, password: password")
+
+
+if __name__ == "__main__":
+    main()
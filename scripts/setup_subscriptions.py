@@ -16,6 +16,8 @@ except ImportError:
     print("Install with: pip install firebase-admin")
     sys.exit(1)
 
+from firestore_admin import throttle_for
+
 def initialize_firebase(service_account_path):
     """Initialize Firebase Admin SDK."""
     try:
@@ -36,7 +38,8 @@ def create_subscription(db, school_id, max_students, max_classes, expiry_date):
             'lastUpdated': firestore.SERVER_TIMESTAMP
         }
         
-        db.collection('subscriptions').document(school_id).set(subscription_data)
+        ref = db.collection('subscriptions').document(school_id)
+        throttle_for(db).call(ref.set, subscription_data, writes=1, documents=[ref.path])
         print(f"✅ Subscription created for {school_id}")
         print(f"   Max Students: {max_students}")
         print(f"   Max Classes: {max_classes}")
@@ -51,7 +54,7 @@ def create_subscription(db, school_id, max_students, max_classes, expiry_date):
 def list_subscriptions(db):
     """List all existing subscriptions."""
     try:
-        subscriptions = db.collection('subscriptions').stream()
+        subscriptions = throttle_for(db).call(lambda: list(db.collection('subscriptions').stream()))
         print("\n📋 Existing Subscriptions:")
         print("-" * 80)
         
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Student Progress Engine
+Builds the student × term × subject score matrix behind the Student Progress
+page for a whole school, across every {school}_{year}_{term} document, and
+computes per-student trends, term-to-term deltas and class rank movement with
+numpy instead of per-student loops.
+
+Each term is reduced to a compact .npz file (student names, index numbers,
+classes, subject names and a students × subjects score matrix) cached under
+.cache/ and keyed by its docId and metadata.lastUpdated. Past terms do not change, so after the
+first run only the current term (or any term edited since) is read again.
+
+Students are matched across terms like StudentProgress.tsx: each student is
+taken as they appear in their latest term and looked up in every other term by
+index number, falling back to the lower-cased name, so a student whose index
+number was assigned mid-history stays one row. Term averages count subjects
+with a total above zero, and class positions are the order of those averages
+among all students of the class in that term, as on the page.
+
+Usage:
+    python scripts/student_progress.py --emulator --school ayirebida_20242025_First-Term
+    python scripts/student_progress.py --database 1 --school ayirebida --out progress.csv
+    python scripts/student_progress.py --emulator --school ayirebida --student GH-0001 --json
+
+Requires Firebase Admin SDK and numpy
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from firestore_admin import (
+    PROJECT_ROOT, add_connection_args, connect_from_args, describe_target, positive_int,
+    iter_schools, last_updated_fingerprint,
+)
+from report_math import load_rosters, load_totals
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ numpy not installed")
+    print("Install with: pip install numpy")
+    sys.exit(1)
+
+CACHE_VERSION = 2
+TERM_FIELDS = ['settings.academicYear', 'settings.academicTerm', 'metadata.lastUpdated']
+# Same thresholds as calculateInsights on the page
+STRENGTH_MIN = 60
+INSIGHT_COUNT = 3
+
+
+def student_key(index_number, name):
+    return f"#{index_number}" if index_number else f"@{(name or '').lower()}"
+
+
+# -----------------------------------------------------------------------------
+# Per-term cache
+# -----------------------------------------------------------------------------
+
+def cache_path(cache_dir, doc_id):
+    return os.path.join(cache_dir, f"{doc_id}.npz")
+
+
+def load_cached_term(cache_dir, doc_id, fingerprint):
+    path = cache_path(cache_dir, doc_id)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != CACHE_VERSION or str(data['fingerprint']) != fingerprint:
+                return None
+            return {key: data[key] for key in data.files}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def read_term(db, doc_id, page_size):
+    """Reduce one term to arrays: names, index numbers, classes, subjects and a students × subjects score matrix."""
+    school_ref = db.collection('schools').document(doc_id)
+    subjects = sorted((s.to_dict() for s in school_ref.collection('subjects').stream()), key=lambda s: s.get('subject', ''))
+    assessments = [a.to_dict() for a in school_ref.collection('assessments').stream()]
+    rosters, _ = load_rosters(school_ref, page_size)
+    totals = load_totals(school_ref, subjects, assessments)
+
+    students = [(sid, name, index_number, class_name)
+                for class_name, roster in rosters.items() for sid, name, index_number in roster]
+    scores = np.full((len(students), len(subjects)), np.nan, dtype=np.float32)
+    for column, subject in enumerate(subjects):
+        by_student = totals.get(subject['id'], {})
+        for row, (sid, _, _, _) in enumerate(students):
+            if sid in by_student:
+                scores[row, column] = sum(by_student[sid])
+    return {
+        'names': np.array([s[1] for s in students], dtype=str),
+        'indexNumbers': np.array([s[2] for s in students], dtype=str),
+        'classes': np.array([s[3] for s in students], dtype=str),
+        'subjects': np.array([s.get('subject', '') for s in subjects], dtype=str),
+        'scores': scores,
+    }
+
+
+def save_term(cache_dir, doc_id, fingerprint, term):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(cache_dir, doc_id)
+    temp_path = path + '.tmp.npz'
+    np.savez_compressed(temp_path, version=np.array(CACHE_VERSION), fingerprint=np.array(fingerprint), **term)
+    os.replace(temp_path, path)
+
+
+def load_terms(db, prefix, cache_dir, page_size, refresh=False):
+    """[(docId, settings, term arrays)] sorted like the page (by docId), plus cache statistics."""
+    stats = {'hits': 0, 'misses': 0, 'readSeconds': 0.0}
+    terms = []
+    for snap in iter_schools(db, prefix=prefix, field_paths=TERM_FIELDS):
+        data = snap.to_dict() or {}
+        fingerprint = last_updated_fingerprint(data)
+        term = None if refresh else load_cached_term(cache_dir, snap.id, fingerprint)
+        if term is None:
+            started = time.time()
+            term = read_term(db, snap.id, page_size)
+            stats['readSeconds'] += time.time() - started
+            stats['misses'] += 1
+            save_term(cache_dir, snap.id, fingerprint, term)
+        else:
+            stats['hits'] += 1
+        terms.append((snap.id, data.get('settings') or {}, term))
+    terms.sort(key=lambda t: t[0])
+    return terms, stats
+
+
+# -----------------------------------------------------------------------------
+# Matrix and progress measures
+# -----------------------------------------------------------------------------
+
+def match_students(terms):
+    """
+    Rows of students matched across terms the way the page finds a selected
+    student in each term: by index number when the student has one, otherwise
+    (or when that finds nobody) by lower-cased name, first match wins.
+
+    Terms are walked from the latest back; a student no earlier row finds
+    starts a new row, described by that appearance. Returns (keys, names,
+    members) where members is a rows × terms array of each row's student
+    index within the term (-1 when absent).
+    """
+    anchors, columns = [], [None] * len(terms)
+    for t in reversed(range(len(terms))):
+        term = terms[t][2]
+        students = list(zip(term['indexNumbers'].tolist(), term['names'].tolist()))
+        by_index, by_name = {}, {}
+        for i, (index_number, name) in enumerate(students):
+            if index_number:
+                by_index.setdefault(index_number, i)
+            by_name.setdefault(name.lower(), i)
+
+        def find(index_number, name):
+            found = by_index.get(index_number) if index_number else None
+            return found if found is not None else by_name.get(name.lower())
+
+        column = [find(*anchor) for anchor in anchors]
+        claimed = set(column)
+        for index_number, name in students:
+            found = find(index_number, name)
+            if found not in claimed:
+                anchors.append((index_number, name))
+                column.append(found)
+                claimed.add(found)
+        columns[t] = column
+
+    members = np.full((len(anchors), len(terms)), -1, dtype=np.intp)
+    for t, column in enumerate(columns):
+        members[:len(column), t] = [-1 if i is None else i for i in column]
+    keys = [student_key(index_number, name) for index_number, name in anchors]
+    names = [name for _, name in anchors]
+    return keys, names, members
+
+
+def build_matrix(terms, members):
+    """
+    Align every term's scores on the matched rows and on subject names.
+
+    Returns (subjects, scores, classes) where scores is a students × terms ×
+    subjects float array (NaN when there is no score) and classes is
+    students × terms.
+    """
+    subjects = sorted({s for _, _, term in terms for s in term['subjects']})
+    subject_index = {s: i for i, s in enumerate(subjects)}
+
+    scores = np.full((len(members), len(terms), len(subjects)), np.nan, dtype=np.float32)
+    classes = np.full((len(members), len(terms)), '', dtype=object)
+    for t, (_, _, term) in enumerate(terms):
+        rows = np.nonzero(members[:, t] >= 0)[0]
+        students = members[rows, t]
+        columns = np.array([subject_index[s] for s in term['subjects']], dtype=np.intp)
+        if len(columns):
+            scores[rows[:, None], t, columns[None, :]] = term['scores'][students]
+        classes[rows, t] = term['classes'][students]
+    return subjects, scores, classes
+
+
+def term_averages(scores):
+    """Students × terms average over subjects with a total above zero (0 when none)."""
+    taken = np.where(scores > 0, scores, np.nan)
+    counts = np.sum(~np.isnan(taken), axis=2)
+    sums = np.nansum(taken, axis=2)
+    return np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+
+def class_positions(averages, classes):
+    """Position of each of a term's students within their class (ranksPerClass) and the class sizes."""
+    labels, codes = np.unique(classes.astype(str), return_inverse=True)
+    # Stable sort: class, then average descending
+    order = np.lexsort((-averages, codes))
+    sorted_codes = codes[order]
+    starts = np.searchsorted(sorted_codes, sorted_codes, side='left')
+    positions = np.zeros(len(averages), dtype=np.int32)
+    positions[order] = np.arange(len(order)) - starts + 1
+    sizes = np.bincount(codes, minlength=len(labels))[codes].astype(np.int32)
+    return positions, sizes
+
+
+def slopes(values, present):
+    """Least-squares slope per row over the term index, using only present terms."""
+    x = np.broadcast_to(np.arange(values.shape[1], dtype=np.float64), values.shape)
+    n = present.sum(axis=1)
+    mean_x = np.divide((x * present).sum(axis=1), n, out=np.zeros(len(n)), where=n > 0)
+    mean_y = np.divide((values * present).sum(axis=1), n, out=np.zeros(len(n)), where=n > 0)
+    dx = (x - mean_x[:, None]) * present
+    dy = (values - mean_y[:, None]) * present
+    denominator = (dx * dx).sum(axis=1)
+    return np.divide((dx * dy).sum(axis=1), denominator, out=np.zeros(len(n)), where=denominator > 0)
+
+
+def first_and_last(present):
+    """Indexes of each row's first and last present term (-1 when none), and the one before the last."""
+    term_count = present.shape[1]
+    any_present = present.any(axis=1)
+    first = np.where(any_present, present.argmax(axis=1), -1)
+    last = np.where(any_present, term_count - 1 - present[:, ::-1].argmax(axis=1), -1)
+    before = present.copy()
+    before[np.arange(len(last)), np.maximum(last, 0)] = False
+    previous = np.where(before.any(axis=1), term_count - 1 - before[:, ::-1].argmax(axis=1), -1)
+    return first, last, previous
+
+
+def progress(terms):
+    keys, names, members = match_students(terms)
+    subjects, scores, classes = build_matrix(terms, members)
+    present = members >= 0
+    averages = term_averages(scores)
+    # Ranked among every student of the class in the term, matched to a row or not
+    positions = np.zeros(members.shape, dtype=np.int32)
+    sizes = np.zeros(members.shape, dtype=np.int32)
+    for t, (_, _, term) in enumerate(terms):
+        rows = np.nonzero(present[:, t])[0]
+        if not len(rows):
+            continue
+        term_positions, term_sizes = class_positions(term_averages(term['scores'][:, None, :])[:, 0], term['classes'])
+        positions[rows, t] = term_positions[members[rows, t]]
+        sizes[rows, t] = term_sizes[members[rows, t]]
+    first, last, previous = first_and_last(present)
+    rows = np.arange(len(keys))
+
+    def at(matrix, index, empty=0):
+        return np.where(index >= 0, matrix[rows, np.maximum(index, 0)], empty)
+
+    # Subject averages across terms for strengths and weaknesses, as calculateInsights
+    taken = np.where(scores > 0, scores, np.nan)
+    counts = np.sum(~np.isnan(taken), axis=1)
+    subject_means = np.divide(np.nansum(taken, axis=1), counts,
+                              out=np.full(counts.shape, np.nan, dtype=np.float32), where=counts > 0)
+
+    return {
+        'keys': keys,
+        'names': names,
+        'subjects': subjects,
+        'scores': scores,
+        'classes': classes,
+        'averages': averages,
+        'positions': positions,
+        'sizes': sizes,
+        'present': present,
+        'first': first,
+        'last': last,
+        'previous': previous,
+        'firstAverage': at(averages, first),
+        'latestAverage': at(averages, last),
+        'delta': np.where(previous >= 0, at(averages, last) - at(averages, previous), 0),
+        'overallDelta': np.where(first >= 0, at(averages, last) - at(averages, first), 0),
+        'slope': slopes(averages, present),
+        'latestPosition': at(positions, last),
+        'latestSize': at(sizes, last),
+        # Positive: moved up the class since the previous term
+        'rankMovement': np.where(previous >= 0, at(positions, previous) - at(positions, last), 0),
+        'subjectMeans': subject_means,
+    }
+
+
+def insights(result, row):
+    means = result['subjectMeans'][row]
+    ranked = [(result['subjects'][i], float(means[i])) for i in np.argsort(-np.nan_to_num(means, nan=-1)) if not np.isnan(means[i])]
+    strengths = [name for name, avg in ranked[:INSIGHT_COUNT] if avg >= STRENGTH_MIN]
+    weaknesses = [name for name, avg in reversed(ranked[-INSIGHT_COUNT:]) if avg < STRENGTH_MIN]
+    return strengths, weaknesses
+
+
+# -----------------------------------------------------------------------------
+# Output
+# -----------------------------------------------------------------------------
+
+def student_summary(result, row):
+    strengths, weaknesses = insights(result, row)
+    last = int(result['last'][row])
+    return {
+        'key': result['keys'][row],
+        'name': result['names'][row],
+        'class': result['classes'][row, last] if last >= 0 else '',
+        'terms': int(result['present'][row].sum()),
+        'firstAverage': round(float(result['firstAverage'][row]), 1),
+        'latestAverage': round(float(result['latestAverage'][row]), 1),
+        'delta': round(float(result['delta'][row]), 1),
+        'overallDelta': round(float(result['overallDelta'][row]), 1),
+        'slopePerTerm': round(float(result['slope'][row]), 2),
+        'position': f"{result['latestPosition'][row]} / {result['latestSize'][row]}" if last >= 0 else '',
+        'rankMovement': int(result['rankMovement'][row]),
+        'strengths': strengths,
+        'weaknesses': weaknesses,
+    }
+
+
+def student_history(result, terms, row):
+    history = []
+    for t, (doc_id, settings, _) in enumerate(terms):
+        if not result['present'][row, t]:
+            continue
+        subjects = {result['subjects'][s]: round(float(v), 1)
+                    for s, v in enumerate(result['scores'][row, t]) if v > 0}
+        history.append({
+            'termId': doc_id,
+            'academicYear': settings.get('academicYear', ''),
+            'academicTerm': settings.get('academicTerm', ''),
+            'class': result['classes'][row, t],
+            'averageScore': round(float(result['averages'][row, t]), 1),
+            'position': f"{result['positions'][row, t]} / {result['sizes'][row, t]}",
+            'subjects': subjects,
+        })
+    return history
+
+
+def write_csv(path, summaries):
+    fields = ['key', 'name', 'class', 'terms', 'firstAverage', 'latestAverage', 'delta', 'overallDelta',
+              'slopePerTerm', 'position', 'rankMovement', 'strengths', 'weaknesses']
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for summary in summaries:
+            writer.writerow(dict(summary, strengths='; '.join(summary['strengths']),
+                                 weaknesses='; '.join(summary['weaknesses'])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-term student progress for a whole school")
+    add_connection_args(parser)
+    parser.add_argument('--school', required=True, help='Any term docId of the school, or its base name')
+    parser.add_argument('--student', help='Only show this index number (or name)')
+    parser.add_argument('--out', help='Write the whole-school summary to this CSV file')
+    parser.add_argument('--cache-dir', default=os.path.join(PROJECT_ROOT, '.cache', 'student_progress'),
+                        help='Per-term cache directory (default: .cache/student_progress)')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached terms and read everything again')
+    parser.add_argument('--page-size', type=positive_int, default=500, help='Students read per page (default: 500)')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    args = parser.parse_args()
+
+    db = connect_from_args(args)
+    # Same prefix as the page: the part of the docId before the first underscore
+    prefix = args.school.split('_')[0] + '_'
+    started = time.time()
+    terms, stats = load_terms(db, prefix, args.cache_dir, args.page_size, args.refresh)
+    load_seconds = time.time() - started
+    if not terms:
+        print(f"❌ No terms found for {prefix}* in {describe_target(args)}")
+        sys.exit(1)
+
+    compute_started = time.time()
+    result = progress(terms)
+    rows = range(len(result['keys']))
+    if args.student:
+        wanted = {student_key(args.student, ''), student_key('', args.student)}
+        rows = [i for i in rows if result['keys'][i] in wanted]
+        if not rows:
+            print(f"❌ No student with index number or name {args.student!r}")
+            sys.exit(1)
+    summaries = [student_summary(result, i) for i in rows]
+    compute_seconds = time.time() - compute_started
+
+    timing = {
+        'terms': len(terms), 'students': len(result['keys']), 'subjects': len(result['subjects']),
+        'cacheHits': stats['hits'], 'cacheMisses': stats['misses'],
+        'loadSeconds': round(load_seconds, 2), 'firestoreSeconds': round(stats['readSeconds'], 2),
+        'computeSeconds': round(compute_seconds, 3),
+    }
+    if args.out:
+        write_csv(args.out, summaries)
+    if args.json:
+        payload = {'timing': timing, 'students': summaries}
+        if args.student:
+            payload['history'] = {result['keys'][i]: student_history(result, terms, i) for i in rows}
+        print(json.dumps(payload, indent=2))
+        return
+
+    print(f"📈 {len(terms)} term(s) of {prefix}* in {describe_target(args)}")
+    if args.student:
+        for i, summary in zip(rows, summaries):
+            print(f"\n   {summary['name']} ({summary['key']}), {summary['class']}")
+            for term in student_history(result, terms, i):
+                print(f"   {term['academicYear']:<10} {term['academicTerm']:<12} {term['class']:<10} "
+                      f"avg {term['averageScore']:>5}  pos {term['position']}")
+            print(f"   Δ last term {summary['delta']:+}, overall {summary['overallDelta']:+}, "
+                  f"slope {summary['slopePerTerm']:+}/term, rank movement {summary['rankMovement']:+}")
+            print(f"   Strengths: {', '.join(summary['strengths']) or '-'}; "
+                  f"weaknesses: {', '.join(summary['weaknesses']) or '-'}")
+    else:
+        improving = sorted(summaries, key=lambda s: -s['delta'])[:5]
+        declining = sorted(summaries, key=lambda s: s['delta'])[:5]
+        print("\n   Most improved since last term:")
+        for s in improving:
+            print(f"      {s['name']:<30} {s['class']:<10} {s['delta']:+6.1f}  rank {s['rankMovement']:+d}")
+        print("   Largest drops since last term:")
+        for s in declining:
+            print(f"      {s['name']:<30} {s['class']:<10} {s['delta']:+6.1f}  rank {s['rankMovement']:+d}")
+    print(f"\n✅ {timing['students']} students × {timing['terms']} terms × {timing['subjects']} subjects; "
+          f"loaded in {timing['loadSeconds']}s ({timing['cacheHits']} cached, {timing['cacheMisses']} read), "
+          f"computed in {timing['computeSeconds']}s")
+    if args.out:
+        print(f"   Summary written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Tests for the in-memory Firestore fake, the shared helpers in firestore_admin
+and a smoke run of each tool's main path against the fake.
+
+Run from the repository root:
+    python -m unittest discover -s scripts/tests
+    python -m pytest -q scripts/tests
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import unittest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+try:
+    import firebase_admin  # noqa: F401
+except ImportError:
+    raise unittest.SkipTest("Firebase Admin SDK not installed")
+
+from firestore_admin import (
+    firestore, FieldPath, api_exceptions, configure_throttle, iter_paged, iter_schools,
+    commit_in_batches, run_transaction,
+)
+from firestore_fake import Client, ChangeType
+from seed_emulator import generate_term, term_operations
+
+
+def fake_client():
+    db = Client()
+    # No quotas to respect in memory
+    configure_throttle(db, write_rate=None)
+    return db
+
+
+def seed_term(db, school_index=0, classes=2, students=4, subjects=2):
+    doc_id, main, subs = generate_term(1, school_index, classes, students, '2024/2025', 'First Term', subjects=subjects)
+    commit_in_batches(db, term_operations(db, doc_id, main, subs))
+    return doc_id, main, subs
+
+
+class FakeClientTest(unittest.TestCase):
+    def setUp(self):
+        self.db = fake_client()
+
+    def test_writes_and_sentinels(self):
+        ref = self.db.document('schools/a')
+        ref.set({'n': 1, 'tags': ['x'], 'nested': {'keep': 1, 'drop': 2}})
+        ref.set({'nested': {'added': 3}}, merge=True)
+        ref.update({
+            'n': firestore.Increment(2),
+            'tags': firestore.ArrayUnion(['y']),
+            'nested.drop': firestore.DELETE_FIELD,
+            'stamp': firestore.SERVER_TIMESTAMP,
+            FieldPath('odd', '10001-1').to_api_repr(): True,
+        })
+        data = ref.get().to_dict()
+        self.assertEqual(data['n'], 3)
+        self.assertEqual(data['tags'], ['x', 'y'])
+        self.assertEqual(data['nested'], {'keep': 1, 'added': 3})
+        self.assertEqual(data['odd'], {'10001-1': True})
+        self.assertIsInstance(data['stamp'], datetime.datetime)
+
+    def test_update_of_missing_document_fails(self):
+        with self.assertRaises(api_exceptions.NotFound):
+            self.db.document('schools/missing').update({'a': 1})
+
+    def test_queries_and_cursors(self):
+        people = self.db.collection('people')
+        for i, age in enumerate([30, 20, 40, 20]):
+            people.document(f"p{i}").set({'age': age, 'name': f"n{i}"})
+        query = people.where(filter=firestore.FieldFilter('age', '>=', 20)).order_by('age')
+        self.assertEqual([s.id for s in query.stream()], ['p1', 'p3', 'p0', 'p2'])
+        self.assertEqual([s.id for s in query.start_after({'age': 20}).limit(1).stream()], ['p0'])
+        self.assertEqual(next(iter(people.select(['age']).stream())).to_dict(), {'age': 30})
+        self.db.document('schools/a/people/p9').set({'age': 50})
+        self.assertEqual(len(list(self.db.collection_group('people').stream())), 5)
+
+    def test_listener_reports_changes(self):
+        events = []
+        watch = self.db.collection('items').on_snapshot(
+            lambda docs, changes, read_time: events.extend((c.type, c.document.id) for c in changes))
+        ref = self.db.document('items/a')
+        ref.set({'v': 1})
+        ref.update({'v': 2})
+        ref.delete()
+        watch.unsubscribe()
+        self.assertEqual(events, [(ChangeType.ADDED, 'a'), (ChangeType.MODIFIED, 'a'), (ChangeType.REMOVED, 'a')])
+
+    def test_transaction_retries_after_a_conflicting_write(self):
+        ref = self.db.document('counters/c')
+        ref.set({'n': 0})
+        attempts = []
+
+        def increment(transaction):
+            current = ref.get(transaction=transaction).to_dict()['n']
+            if not attempts:
+                ref.update({'n': 10})  # another writer wins the race
+            attempts.append(current)
+            transaction.update(ref, {'n': current + 1})
+
+        firestore.transactional(increment)(self.db.transaction())
+        self.assertEqual(attempts, [0, 10])
+        self.assertEqual(ref.get().to_dict()['n'], 11)
+
+    def test_snapshot_round_trip(self):
+        seed_term(self.db)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'snapshot.jsonl')
+            self.db.dump(path)
+            copy = Client.from_snapshot(path)
+        self.assertEqual(list(copy.records()), list(self.db.records()))
+
+
+class SharedHelpersTest(unittest.TestCase):
+    def setUp(self):
+        self.db = fake_client()
+
+    def test_iter_paged_reads_every_page_in_id_order(self):
+        students = self.db.collection('schools/a/students')
+        for i in [5, 1, 4, 2, 3]:
+            students.document(str(i)).set({'id': i})
+        self.assertEqual([s.id for s in iter_paged(students, page_size=2)], ['1', '2', '3', '4', '5'])
+
+    def test_iter_schools_prefix_and_projection(self):
+        for doc_id in ['abc_2024_1', 'abd_2024_1', 'xyz_2024_1']:
+            self.db.collection('schools').document(doc_id).set({'settings': {'schoolName': doc_id}})
+        self.assertEqual([s.id for s in iter_schools(self.db, prefix='ab')], ['abc_2024_1', 'abd_2024_1'])
+        self.assertEqual([s.to_dict() for s in iter_schools(self.db, prefix='xyz', field_paths=[])], [{}])
+
+    def test_commit_in_batches(self):
+        refs = [self.db.document(f"docs/{i}") for i in range(7)]
+        self.assertEqual(commit_in_batches(self.db, [('set', ref, {'a': 1, 'b': 1}) for ref in refs], batch_size=3), 3)
+        commit_in_batches(self.db, [
+            ('merge', refs[0], {'c': 1}),
+            ('update', refs[1], {'b': 2}),
+            ('delete', refs[2], None),
+        ])
+        self.assertEqual(refs[0].get().to_dict(), {'a': 1, 'b': 1, 'c': 1})
+        self.assertEqual(refs[1].get().to_dict(), {'a': 1, 'b': 2})
+        self.assertFalse(refs[2].get().exists)
+
+    def test_run_transaction(self):
+        ref = self.db.document('schools/a')
+        ref.set({'n': 1})
+
+        def bump(transaction, by):
+            n = ref.get(transaction=transaction).to_dict()['n']
+            transaction.update(ref, {'n': n + by})
+            return n + by
+
+        self.assertEqual(run_transaction(self.db, bump, 4, documents=[ref.path]), 5)
+        self.assertEqual(ref.get().to_dict()['n'], 5)
+
+
+class ToolSmokeTest(unittest.TestCase):
+    """Each tool's main path on a seeded term in the fake."""
+
+    def setUp(self):
+        self.db = fake_client()
+        self.doc_id, self.main, self.subs = seed_term(self.db)
+        self.school_ref = self.db.collection('schools').document(self.doc_id)
+
+    def test_check_integrity(self):
+        import check_integrity
+        self.school_ref.collection('students').document('10001').delete()
+        result = check_integrity.check_school(self.db, self.doc_id, set(check_integrity.FINDING_TYPES), 3, True)
+        self.assertGreater(result['findings']['score-student'], 0)
+        again = check_integrity.check_school(self.db, self.doc_id, set(check_integrity.FINDING_TYPES), 3, False)
+        self.assertNotIn('score-student', again['findings'])
+        self.assertNotIn('report-student', again['findings'])
+
+    def test_report_rosters(self):
+        from report_math import load_rosters
+        self.assertTrue(load_rosters(self.school_ref, 3))
+
+    def test_completion_summaries(self):
+        import build_completion_summaries
+        self.assertEqual(build_completion_summaries.build_school(self.db, self.doc_id, False, False)['status'], 'rebuilt')
+        self.assertEqual(build_completion_summaries.build_school(self.db, self.doc_id, False, False)['status'], 'up to date')
+
+    def test_document_sizes(self):
+        from analyze_document_sizes import analyze_school
+        snapshot = next(iter_schools(self.db, prefix=self.doc_id[:4]))
+        self.assertGreater(analyze_school(snapshot, {}, datetime.datetime.now(datetime.timezone.utc))['bytes'], 0)
+
+    def test_school_search_index(self):
+        import build_school_search_index as search
+        search.apply_school(self.db, 'seedschool', {'name': 'Seed School'}, set())
+        self.assertIn('seedschool', search.index_ref(self.db, 'seed').get().to_dict()['schools'])
+        search.search_scan(self.db, 'seed')
+
+    def test_sqlite_mirror_backfill(self):
+        import mirror_to_sqlite
+        conn = mirror_to_sqlite.open_mirror(':memory:')
+        for collection in mirror_to_sqlite.COLLECTIONS:
+            mirror_to_sqlite.backfill(self.db, conn, collection, 3)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM students').fetchone()[0], 8)
+        conn.close()
+
+    def test_write_benchmark_layouts(self):
+        import benchmark_write_patterns as bench
+        args = argparse.Namespace(saves=2, scores_per_save=3, metadata=True, max_attempts=3, seed=1)
+        fixture = bench.load_fixture(2, 3, 1)
+        for layout in ('per_score_docs', 'field_update', 'subject_bucket'):
+            result = bench.run_case(self.db, layout, 2, fixture, argparse.Namespace(duration=1, **vars(args)))
+            self.assertEqual(result['failures'], {})
+
+    def test_offline_queue_replay(self):
+        import replay_offline_queue as replay
+        args = argparse.Namespace(seed=1, teachers=2, edits=20, save_every=5, offline_hours=1.0, overlap=0.2,
+                                  reconnect_spread=0.0, drop_rate=0.0, max_passes=2)
+        _, main, subs = generate_term(1, 0, 2, 4, '2024/2025', 'First Term', prefix='replay', subjects=2)
+        devices, expected = replay.generate_queues(subs['score_buckets'], args)
+        for strategy in replay.STRATEGIES:
+            result = replay.run_strategy(self.db, strategy, main, subs['score_buckets'], devices, expected, args)
+            self.assertEqual(result['unsynced'], 0)
+            self.assertEqual(result['result']['changedUntouched'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()